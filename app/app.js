@@ -1,5 +1,5 @@
 (() => {
-  const APP_VERSION = "1.1.5";
+  const APP_VERSION = "1.1.6";
   const VERSION_URL = "./version.json";
   const STORAGE_KEYS = {
     version: "koedeam.version",
@@ -7,12 +7,29 @@
     recentDrafts: "koedeam.recentDrafts",
     templates: "koedeam.templates",
     settings: "koedeam.settings",
-    fieldTestSession: "koedeam.fieldTestSession"
+    fieldTestSession: "koedeam.fieldTestSession",
+    draftShadow: "koedeam.draftShadow"
   };
+  const DOCUMENT_DB_NAME = "koedeam";
+  const DOCUMENT_DB_VERSION = 1;
+  const DOCUMENT_DB_STORES = ["documents", "snapshots"];
+  const DOCUMENT_FLUSH_TIMEOUT_MS = 1000;
   const MAX_SHARE_SHORTCUTS = 12;
   const STORAGE_QUOTA_ESTIMATE_BYTES = 5 * 1024 * 1024;
+  const STORAGE_RESYNC_TIMEOUT_MS = 5000;
   const STORAGE_WARN_SOFT_RATIO = 0.8;
   const STORAGE_WARN_HARD_RATIO = 0.92;
+  const REPLAY_INSTANT_BATCH = 256;
+  const UNDO_DEPTH_MAX = 200;
+  const UNDO_MEMORY_BUDGET_BYTES = 8 * 1024 * 1024;
+  const UNDO_CHECKPOINT_MIN_CHARS = 64 * 1024;
+  const FIND_DEBOUNCE_MS = 120;
+  const FIND_SLICE_MS = 8;
+  const ZIP_WORKER_URL = "./zip_worker.js";
+  const ZIP_INLINE_TEXT_CHARS = 64 * 1024;
+  const TELEMETRY_EVENT_CAP = 2000;
+  const TELEMETRY_SEGMENT_EVENTS = 100;
+  const FIELD_TEST_STORAGE_FORMAT = 2;
   const DEFAULT_SHARE_SHORTCUT_DEFS = [
     { name: "メール", urlTemplate: "mailto:?subject={title}&body={text}" },
     { name: "LINE", urlTemplate: "https://line.me/R/share?text={prompt}" },
@@ -158,6 +175,7 @@
     shareShortcuts: buildDefaultShareShortcuts(),
     documents: [],
     currentDocId: "",
+    storageBackend: "localStorage",
     ui: { sidebar: false },
     candidate: {
       threshold: 0.65,
@@ -178,12 +196,14 @@
       consentedAt: "",
       environmentTag: "local-dev"
     },
-    undoDepth: 3
+    undoDepth: 50
   };
 
   const state = {
     draft: "",
     recentDrafts: [],
+    docStore: null,
+    snapshotIds: new Set(),
     templates: [],
     settings: structuredClone(DEFAULT_SETTINGS),
     shareMode: "all",
@@ -192,6 +212,7 @@
       voiceEngine: "real",
       replayMode: "realtime",
       replayEventsUrl: "",
+      replayId: "",
       synthetic: false,
       syntheticSeed: "koedeam-seed",
       syntheticText: "これは合成音声イベントの再生テストです。"
@@ -200,7 +221,24 @@
     recognition: null,
     speaking: false,
     activeMatchIndex: -1,
-    matches: [],
+    search: {
+      query: "",
+      flags: "",
+      text: "",
+      regex: null,
+      starts: [],
+      ends: [],
+      scanPos: 0,
+      done: true,
+      candidates: null,
+      candidateIndex: 0,
+      candidateEnd: 0,
+      probe: null,
+      token: 0,
+      timer: null,
+      debounceTimer: null
+    },
+    caretGeometry: null,
     waitingWorker: null,
     autoSnapshotTimer: null,
     lastAutoSnapshotText: "",
@@ -230,10 +268,12 @@
     editPanelMode: "navigation",
     timeMenuOpen: false,
     telemetry: {
-      events: [],
+      events: createTelemetryLog(TELEMETRY_EVENT_CAP, TELEMETRY_SEGMENT_EVENTS),
       sessions: [],
       activeSession: null,
-      maxSessions: 200
+      maxSessions: 200,
+      persistedSessions: null,
+      totals: { completed: 0, durationMs: 0, finalChars: 0 }
     },
     voiceEvalActive: null,
     candidateState: {
@@ -244,13 +284,19 @@
     history: {
       undoStack: [],
       redoStack: [],
+      text: "",
+      view: null,
+      bytes: 0,
+      sinceCheckpoint: 0,
       typingTimer: null,
       applying: false,
-      maxDepth: 3
+      maxDepth: 50
     },
     fieldTestPersistTimer: null,
+    fieldTestExporting: false,
     nextInputReason: "",
-    storageWarnBand: "ok"
+    storageWarnBand: "ok",
+    storageUsage: null
   };
 
   const el = getElements();
@@ -264,6 +310,7 @@
     state.recentDrafts = safeGetArray(STORAGE_KEYS.recentDrafts, []);
     state.templates = safeGetArray(STORAGE_KEYS.templates, DEFAULT_TEMPLATES);
     state.settings = safeGetObject(STORAGE_KEYS.settings, DEFAULT_SETTINGS);
+    state.docStore = createDocumentStore();
     if (state.settings.sidebarTab === "replace") {
       state.settings.sidebarTab = "templates";
       saveSettings();
@@ -325,7 +372,7 @@
       saveSettings();
     }
     state.settings.undoDepth = Number.isFinite(Number(state.settings.undoDepth))
-      ? Math.max(1, Math.min(5, Number(state.settings.undoDepth)))
+      ? Math.max(1, Math.min(UNDO_DEPTH_MAX, Number(state.settings.undoDepth)))
       : DEFAULT_SETTINGS.undoDepth;
     normalizeEditPanelSections();
     ensureDocuments();
@@ -366,14 +413,16 @@
     seedUndoState();
     persistSessionJsonNow();
     updateStorageCapacityWarning();
+    hydrateDocumentStore();
   }
 
   function parseRuntimeFlags(search) {
     const params = new URLSearchParams(search || "");
     const raw = `${params.get("testMode") || ""}`.trim().toLowerCase();
     const replayModeRaw = `${params.get("replayMode") || ""}`.trim().toLowerCase();
-    const replayMode = replayModeRaw === "fast" ? "fast" : "realtime";
+    const replayMode = ["fast", "instant"].includes(replayModeRaw) ? replayModeRaw : "realtime";
     const replayEventsUrl = `${params.get("eventsUrl") || params.get("replayUrl") || ""}`.trim();
+    const replayId = `${params.get("replayId") || ""}`.trim();
     const voiceEngineRaw = `${params.get("voiceEngine") || ""}`.trim().toLowerCase();
     const syntheticOn = `${params.get("synthetic") || ""}`.trim() === "1" || voiceEngineRaw === "synthetic";
     const replayOn = voiceEngineRaw === "replay" || syntheticOn || `${params.get("replay") || ""}`.trim() === "1";
@@ -384,6 +433,7 @@
       voiceEngine: replayOn ? "replay" : "real",
       replayMode,
       replayEventsUrl,
+      replayId,
       synthetic: syntheticOn,
       syntheticSeed,
       syntheticText: syntheticText || "これは合成音声イベントの再生テストです。"
@@ -400,15 +450,109 @@
       voiceEngineType: state.runtime.voiceEngine || "real",
       replayMode: state.runtime.replayMode || "realtime",
       replayEventsUrl: state.runtime.replayEventsUrl || "",
+      replayId: state.runtime.replayId || "",
       synthetic: !!state.runtime.synthetic,
       syntheticSeed: state.runtime.syntheticSeed || "koedeam-seed",
       syntheticText: state.runtime.syntheticText || "",
       forceReloadInvoked: !!existing.forceReloadInvoked
     };
+    if (state.runtime.testMode || existing.signals === true) installTestSignals(window.__KOEDEAM_TEST__);
+    if (state.runtime.testMode) {
+      // Direct handles for benchmarks that time document-length-sensitive paths in isolation.
+      window.__KOEDEAM_TEST__.hotPaths = {
+        refreshMatches,
+        replaceAll,
+        pushUndoSnapshot,
+        getCaretCoordinates,
+        invalidateCaretGeometry: () => getCaretGeometry().invalidate()
+      };
+      // Sizes of state that accumulates over a long-running session, sampled by the soak run.
+      window.__KOEDEAM_TEST__.runtimeStats = () => ({
+        telemetryEvents: state.telemetry.events.size(),
+        telemetrySessions: state.telemetry.sessions.length,
+        storageBytes: estimateKoedeamStorageBytes(),
+        // Snapshots held, counted as before the delta history: the steps plus the current state.
+        undoDepth: state.history.undoStack.length + 1
+      });
+    }
+  }
+
+  // Readiness signals for the Playwright harness: an append-only log plus an awaitable helper.
+  function installTestSignals(bridge) {
+    const listeners = new Set();
+    bridge.signals = true;
+    bridge.signalSeq = 0;
+    bridge.signalCounts = {};
+    bridge.signalLog = [];
+    const matches = (entry, name, since, detail) => entry.seq > since
+      && entry.name === name
+      && Object.keys(detail).every((k) => entry.detail?.[k] === detail[k]);
+    bridge.emitSignal = (name, detail = {}) => {
+      bridge.signalSeq += 1;
+      bridge.signalCounts[name] = (bridge.signalCounts[name] || 0) + 1;
+      const entry = { seq: bridge.signalSeq, name, detail, at: performance.now() };
+      bridge.signalLog.push(entry);
+      if (bridge.signalLog.length > 500) bridge.signalLog.splice(0, bridge.signalLog.length - 500);
+      listeners.forEach((cb) => cb(entry));
+    };
+    bridge.onSignal = (cb) => {
+      listeners.add(cb);
+      return () => listeners.delete(cb);
+    };
+    bridge.waitForSignal = (name, options = {}) => {
+      const since = Number(options.since ?? -1);
+      const detail = options.detail || {};
+      const hit = bridge.signalLog.find((entry) => matches(entry, name, since, detail));
+      if (hit) return Promise.resolve(hit);
+      return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => {
+          off();
+          reject(new Error(`signal timeout: ${name}`));
+        }, Number(options.timeoutMs || 5000));
+        const off = bridge.onSignal((entry) => {
+          if (!matches(entry, name, since, detail)) return;
+          clearTimeout(timer);
+          off();
+          resolve(entry);
+        });
+      });
+    };
+    const observer = new MutationObserver((records) => {
+      records.forEach((record) => {
+        emitTestSignal("dialog", { id: record.target.id, open: !!record.target.open });
+      });
+    });
+    document.querySelectorAll("dialog").forEach((dialog) => {
+      observer.observe(dialog, { attributes: true, attributeFilter: ["open"] });
+    });
+  }
+
+  function emitTestSignal(name, detail = {}) {
+    const bridge = window.__KOEDEAM_TEST__;
+    if (bridge && typeof bridge.emitSignal === "function") bridge.emitSignal(name, detail);
   }
 
   function bindEvents() {
     let saveTimer = null;
+    const saveEditor = () => {
+      saveTimer = null;
+      state.draft = el.editor.value;
+      syncCurrentDocumentFromEditor();
+      persistCurrentDraft();
+      el.saveStatus.textContent = "Saved";
+      applySystemState(navigator.onLine ? "LOCAL" : "OFFLINE");
+    };
+    // A tab that is hidden or closed inside the 800ms debounce still saves its last edit.
+    const flushPendingSave = () => {
+      if (!saveTimer) return;
+      clearTimeout(saveTimer);
+      saveEditor();
+      state.docStore?.flush();
+    };
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "hidden") flushPendingSave();
+    });
+    window.addEventListener("pagehide", flushPendingSave);
     const closeMenuIfOpen = () => {
       if (el.menuOverlay && !el.menuOverlay.classList.contains("hidden")) closeMenu();
     };
@@ -420,18 +564,13 @@
       el.saveStatus.textContent = "Typing...";
       applyPrimary("EDIT");
       applySystemState("SAVING");
-      saveTimer = setTimeout(() => {
-        state.draft = el.editor.value;
-        syncCurrentDocumentFromEditor();
-        safeSet(STORAGE_KEYS.currentDraft, state.draft);
-        el.saveStatus.textContent = "Saved";
-        applySystemState(navigator.onLine ? "LOCAL" : "OFFLINE");
-      }, 800);
+      saveTimer = setTimeout(saveEditor, 800);
       if (!state.history.applying) {
         if (inputReason === "typing") scheduleTypingHistoryCommit();
         else pushUndoSnapshot(inputReason);
       }
       updateCaretUI();
+      emitTestSignal("input-committed", { reason: inputReason });
     });
     el.editor.addEventListener("compositionstart", () => {
       state.isComposing = true;
@@ -580,7 +719,7 @@
       closeMenuIfOpen();
       openFindReplace(false);
     });
-    el.findQuery.addEventListener("input", refreshMatches);
+    el.findQuery.addEventListener("input", scheduleRefreshMatches);
     el.findQuery.addEventListener("blur", () => recordSearch(el.findQuery.value));
     el.optCase.addEventListener("change", updateSearchOptions);
     el.optRegex.addEventListener("change", updateSearchOptions);
@@ -713,7 +852,7 @@
     if (el.undoDepth) {
       el.undoDepth.addEventListener("change", () => {
         const depth = Number(el.undoDepth.value);
-        state.settings.undoDepth = Number.isFinite(depth) ? Math.max(1, Math.min(5, depth)) : 3;
+        state.settings.undoDepth = Number.isFinite(depth) ? Math.max(1, Math.min(UNDO_DEPTH_MAX, depth)) : DEFAULT_SETTINGS.undoDepth;
         state.history.maxDepth = state.settings.undoDepth;
         trimUndoStack();
         applyUndoSettingsUI();
@@ -929,11 +1068,7 @@
         state.settings.fieldTest.enabled = false;
         saveSettings();
         applyFieldTestUI();
-        try {
-          localStorage.removeItem(STORAGE_KEYS.fieldTestSession);
-        } catch {
-          // ignore
-        }
+        removeStoredSessionJson();
         el.dlgFieldTestConsent?.close();
       });
     }
@@ -1140,46 +1275,177 @@
     else if (tool === "share") el.btnShare.click();
   }
 
+  // Literal queries whose occurrences cannot overlap (no proper prefix equal to a suffix):
+  // then every match of a longer query starts at a match of this one.
+  // Case-folds one UTF-16 unit at a time the way a non-unicode RegExp `i` flag does, so the
+  // folded string keeps the original offsets (`ß` stays `ß` instead of growing into `SS`).
+  function foldSearchCase(value) {
+    let out = "";
+    for (let i = 0; i < value.length; i += 1) {
+      const ch = value[i];
+      const upper = ch.toUpperCase();
+      out += upper.length === 1 && !(ch.charCodeAt(0) >= 128 && upper.charCodeAt(0) < 128) ? upper : ch;
+    }
+    return out;
+  }
+
+  function queryCannotOverlap(query) {
+    const border = new Array(query.length).fill(0);
+    for (let i = 1, k = 0; i < query.length; i += 1) {
+      while (k > 0 && query[i] !== query[k]) k = border[k - 1];
+      if (query[i] === query[k]) k += 1;
+      border[i] = k;
+    }
+    return !query.length || border[query.length - 1] === 0;
+  }
+
+  function cancelFindScan() {
+    const search = state.search;
+    if (search.timer) clearTimeout(search.timer);
+    search.timer = null;
+    search.token += 1;
+  }
+
+  function scheduleRefreshMatches() {
+    if (state.search.debounceTimer) clearTimeout(state.search.debounceTimer);
+    state.search.debounceTimer = setTimeout(() => {
+      state.search.debounceTimer = null;
+      refreshMatches();
+    }, FIND_DEBOUNCE_MS);
+  }
+
+  function renderFindStatus() {
+    const { starts, done } = state.search;
+    const count = `${starts.length}件${done ? "" : "…"}`;
+    el.findStatus.textContent = state.activeMatchIndex >= 0 && starts.length
+      ? `${count} (${state.activeMatchIndex + 1}/${starts.length})`
+      : count;
+  }
+
+  // Matches are kept as offsets into the scanned text and found in time-sliced steps, so the
+  // first hits are selectable immediately while the count of a long document keeps arriving.
   function refreshMatches() {
+    const search = state.search;
     const query = el.findQuery.value;
     const text = el.editor.value;
-    state.matches = [];
+    if (search.debounceTimer) {
+      clearTimeout(search.debounceTimer);
+      search.debounceTimer = null;
+    }
+    cancelFindScan();
+    const prev = { query: search.query, flags: search.flags, text: search.text, starts: search.starts, scanPos: search.scanPos };
+    search.starts = [];
+    search.ends = [];
+    search.done = true;
+    search.query = "";
+    state.activeMatchIndex = -1;
     if (!query) {
-      state.activeMatchIndex = -1;
       el.findStatus.textContent = "0件";
       return;
     }
     const { regex, error } = buildSearchRegex(query);
     if (error) {
-      state.activeMatchIndex = -1;
       el.findStatus.textContent = "正規表現エラー";
       return;
     }
-    if (regex) {
+    const opts = state.settings.searchOptions || {};
+    search.query = query;
+    search.flags = `${opts.caseSensitive ? "c" : ""}${opts.useRegex ? "r" : ""}`;
+    search.text = text;
+    search.regex = regex;
+    search.scanPos = 0;
+    search.done = false;
+    // Growing a literal query: only the previous hits can still match, re-check them in place.
+    const fold = (value) => (opts.caseSensitive ? value : foldSearchCase(value));
+    search.candidates = !opts.useRegex
+      && prev.flags === search.flags
+      && prev.query
+      && query.length > prev.query.length
+      && fold(query).startsWith(fold(prev.query))
+      && queryCannotOverlap(fold(prev.query))
+      && prev.text === text
+      ? prev.starts
+      : null;
+    search.candidateIndex = 0;
+    search.candidateEnd = search.candidates ? prev.scanPos : 0;
+    search.probe = search.candidates ? new RegExp(regex.source, `${regex.flags.replace("g", "")}y`) : null;
+    runFindSlice(search.token);
+  }
+
+  function runFindSlice(token) {
+    const search = state.search;
+    if (token !== search.token) return;
+    const deadline = performance.now() + FIND_SLICE_MS;
+    const { text, starts, ends } = search;
+    const found = starts.length;
+    let steps = 0;
+    if (search.candidates) {
+      const { candidates, probe } = search;
+      while (search.candidateIndex < candidates.length) {
+        const pos = candidates[search.candidateIndex];
+        search.candidateIndex += 1;
+        if (ends.length && pos < ends[ends.length - 1]) continue;
+        probe.lastIndex = pos;
+        const match = probe.exec(text);
+        if (match) {
+          starts.push(pos);
+          ends.push(pos + match[0].length);
+        }
+        steps += 1;
+        if ((steps & 255) === 0 && performance.now() > deadline) break;
+      }
+      if (search.candidateIndex >= candidates.length) {
+        // The previous scan may have stopped early; scan the rest normally.
+        search.candidates = null;
+        search.scanPos = Math.max(search.candidateEnd, ends.length ? ends[ends.length - 1] : 0);
+      }
+    }
+    if (!search.candidates) {
+      const { regex } = search;
+      regex.lastIndex = search.scanPos;
       let match;
       while ((match = regex.exec(text)) !== null) {
-        const m = match[0];
-        state.matches.push({ start: match.index, end: match.index + m.length, text: m });
-        if (m.length === 0) regex.lastIndex += 1;
+        starts.push(match.index);
+        ends.push(match.index + match[0].length);
+        if (match[0].length === 0) regex.lastIndex += 1;
+        steps += 1;
+        if ((steps & 255) === 0 && performance.now() > deadline) break;
       }
+      search.scanPos = match === null ? text.length : regex.lastIndex;
+      search.done = match === null;
+    }
+    if (found === 0 && starts.length) {
+      state.activeMatchIndex = 0;
+      selectMatch(0);
+    } else {
+      renderFindStatus();
+    }
+    if (search.done) {
+      emitTestSignal("find-complete", { count: starts.length });
+      return;
     }
-    state.activeMatchIndex = state.matches.length ? 0 : -1;
-    el.findStatus.textContent = `${state.matches.length}件`;
-    if (state.matches.length) selectMatch(state.activeMatchIndex);
+    search.timer = setTimeout(() => runFindSlice(token), 0);
+  }
+
+  function matchAt(index) {
+    const { starts, ends } = state.search;
+    if (index < 0 || index >= starts.length) return null;
+    return { start: starts[index], end: ends[index] };
   }
 
   function jumpMatch(step) {
-    if (!state.matches.length) return toast("一致なし");
-    state.activeMatchIndex = (state.activeMatchIndex + step + state.matches.length) % state.matches.length;
+    const count = state.search.starts.length;
+    if (!count) return toast(state.search.done ? "一致なし" : "検索中です");
+    state.activeMatchIndex = (state.activeMatchIndex + step + count) % count;
     selectMatch(state.activeMatchIndex);
   }
 
   function selectMatch(index) {
-    const m = state.matches[index];
+    const m = matchAt(index);
     if (!m) return;
     el.editor.focus();
     el.editor.setSelectionRange(m.start, m.end);
-    el.findStatus.textContent = `${state.matches.length}件 (${index + 1}/${state.matches.length})`;
+    renderFindStatus();
   }
 
   function replaceCurrent() {
@@ -1187,7 +1453,7 @@
     if (!find) return;
     const replace = el.replaceQuery.value;
     const { selectionStart, selectionEnd, value } = el.editor;
-    const active = state.matches[state.activeMatchIndex];
+    const active = matchAt(state.activeMatchIndex);
     const { regex, error } = buildSearchRegex(find, true);
     if (error) return toast("正規表現エラー");
     if (active && selectionStart === active.start && selectionEnd === active.end) {
@@ -1310,7 +1576,8 @@
     const used = new Set();
     const normalized = docs.map((doc) => {
       const text = typeof doc?.text === "string" ? doc.text : "";
-      const title = firstLine(text) || "無題ドキュメント";
+      // With the document store, settings only carry metadata until the text is loaded.
+      const title = firstLine(text) || `${doc?.title || ""}` || "無題ドキュメント";
       const updatedAt = Number.isFinite(Number(doc?.updatedAt)) ? Number(doc.updatedAt) : Date.now();
       let id = typeof doc?.id === "string" ? doc.id.trim() : "";
       if (!id || used.has(id)) id = createDocId(used);
@@ -1327,6 +1594,7 @@
         text: seedText,
         updatedAt: Date.now()
       }];
+      persistDocument(state.settings.documents[0].id);
     }
     const exists = state.settings.documents.some((doc) => doc.id === state.settings.currentDocId);
     if (!exists) state.settings.currentDocId = state.settings.documents[0].id;
@@ -1344,6 +1612,7 @@
     current.text = el.editor.value;
     current.title = firstLine(current.text) || "無題ドキュメント";
     current.updatedAt = Date.now();
+    persistDocument(current.id);
     saveSettings();
     renderDocumentLists();
   }
@@ -1360,8 +1629,9 @@
     state.settings.currentDocId = doc.id;
     state.draft = "";
     el.editor.value = "";
+    persistDocument(doc.id);
     saveSettings();
-    safeSet(STORAGE_KEYS.currentDraft, state.draft);
+    persistCurrentDraft();
     renderDocumentLists();
     renderHistory();
     toast("新規ドキュメントを作成");
@@ -1373,12 +1643,16 @@
   function switchDocument(docId) {
     const doc = state.settings.documents.find((item) => item.id === docId);
     if (!doc) return;
+    if (documentTextsUnavailable() && doc.id !== state.settings.currentDocId) {
+      toast("文書を読み込めていないため切り替えできません。再読み込みしてください。", 2400, "warning");
+      return;
+    }
     syncCurrentDocumentFromEditor();
     state.settings.currentDocId = doc.id;
     state.draft = doc.text || "";
     el.editor.value = state.draft;
     saveSettings();
-    safeSet(STORAGE_KEYS.currentDraft, state.draft);
+    persistCurrentDraft();
     renderDocumentLists();
     updateCaretUI();
     toast("ドキュメントを切り替えました");
@@ -1404,12 +1678,13 @@
       const ok = confirm("このドキュメントを削除します。よろしいですか？");
       if (!ok) return;
       state.settings.documents = state.settings.documents.filter((doc) => doc.id !== id);
+      if (usesDocumentStore()) state.docStore.markDeleted("documents", id);
       if (state.settings.currentDocId === id) {
         state.settings.currentDocId = state.settings.documents[0]?.id || "";
         const current = getCurrentDocument();
         state.draft = current?.text || "";
         el.editor.value = state.draft;
-        safeSet(STORAGE_KEYS.currentDraft, state.draft);
+        persistCurrentDraft();
       }
       saveSettings();
       renderDocumentLists();
@@ -1483,7 +1758,7 @@
     };
     state.recentDrafts.unshift(item);
     state.recentDrafts = state.recentDrafts.slice(0, 5);
-    persistRecentDrafts();
+    persistRecentDrafts(item.id);
     state.lastAutoSnapshotText = text;
     toast(isAuto ? "自動スナップショットを保存" : "スナップショットを保存");
   }
@@ -1524,7 +1799,7 @@
       const item = state.recentDrafts.find((h) => h.id === target.dataset.hid);
       if (item) {
         item.title = target.value.trim() || firstLine(item.text);
-        persistRecentDrafts();
+        persistRecentDrafts(item.id);
         renderHistory();
         renderSidebar();
       }
@@ -1992,6 +2267,27 @@
     };
   }
 
+  // Corpus = NDJSON (one fixture per line) + <name>.index.json with byte [offset, length] per id.
+  // Only the requested line is read: a Range request when the server honours it, otherwise sliced from the body.
+  async function fetchReplayCorpusEntry(hostWindow, corpusUrl, id) {
+    const indexUrl = corpusUrl.replace(/\.ndjson(?=$|[?#])/, ".index.json");
+    const indexRes = await hostWindow.fetch(indexUrl, { cache: "no-store" });
+    if (!indexRes.ok) throw new Error(`replay corpus index fetch failed: ${indexRes.status}`);
+    const index = await indexRes.json();
+    const entry = index?.fixtures?.[id];
+    if (!Array.isArray(entry) || entry.length < 2) throw new Error(`replay fixture not in corpus: ${id}`);
+    const offset = Number(entry[0]);
+    const length = Number(entry[1]);
+    const res = await hostWindow.fetch(corpusUrl, {
+      cache: "no-store",
+      headers: { Range: `bytes=${offset}-${offset + length - 1}` }
+    });
+    if (!res.ok) throw new Error(`replay corpus fetch failed: ${res.status}`);
+    const bytes = new Uint8Array(await res.arrayBuffer());
+    const line = res.status === 206 ? bytes : bytes.subarray(offset, offset + length);
+    return JSON.parse(new TextDecoder().decode(line));
+  }
+
   function normalizeReplayEventList(raw) {
     const source = Array.isArray(raw) ? raw : (Array.isArray(raw?.events) ? raw.events : []);
     if (!source.length) return [];
@@ -2169,13 +2465,16 @@
 
   function createReplayVoiceEngine(hostWindow, options = {}) {
     const listeners = new Map();
-    const mode = options.replayMode === "fast" ? "fast" : "realtime";
+    const mode = ["fast", "instant"].includes(options.replayMode) ? options.replayMode : "realtime";
     const stateReplay = {
       events: [],
       timers: [],
+      generation: 0,
       loaded: false,
       playing: false,
-      loading: null
+      loading: null,
+      baseAtMs: 0,
+      startedAt: 0
     };
 
     const emit = (type, payload = {}) => {
@@ -2184,7 +2483,22 @@
       arr.forEach((cb) => cb(ev));
     };
 
+    // Scheduled vs. observed emit offsets, read by the harness to verify realtime timing.
+    const recordEmit = (item) => {
+      const bridge = hostWindow.__KOEDEAM_TEST__;
+      if (!bridge || typeof bridge !== "object") return;
+      if (!Array.isArray(bridge.replayEmitLog)) bridge.replayEmitLog = [];
+      bridge.replayEmitLog.push({
+        type: item.type,
+        scheduledMs: Math.max(0, Number(item.atMs || 0) - stateReplay.baseAtMs),
+        observedMs: Math.round((hostWindow.performance.now() - stateReplay.startedAt) * 1000) / 1000,
+        at: hostWindow.performance.now()
+      });
+    };
+
     const clearTimers = () => {
+      // Queued microtasks cannot be cancelled; they compare generations instead.
+      stateReplay.generation += 1;
       while (stateReplay.timers.length) {
         clearTimeout(stateReplay.timers.pop());
       }
@@ -2216,6 +2530,13 @@
           return;
         }
         const replayUrl = `${options.replayEventsUrl || ""}`.trim();
+        const replayId = `${options.replayId || ""}`.trim();
+        if (replayUrl && replayId) {
+          const fixture = await fetchReplayCorpusEntry(hostWindow, replayUrl, replayId);
+          stateReplay.events = normalizeReplayEventList(fixture);
+          stateReplay.loaded = true;
+          return;
+        }
         if (replayUrl) {
           const res = await hostWindow.fetch(replayUrl, { cache: "no-store" });
           if (!res.ok) throw new Error(`replay events fetch failed: ${res.status}`);
@@ -2236,6 +2557,7 @@
     };
 
     const replayOne = (item) => {
+      recordEmit(item);
       if (item.type === "start") {
         emit("start");
         return;
@@ -2267,6 +2589,26 @@
       run(0);
     };
 
+    // No timers between events: batches run back to back as microtasks, so a long
+    // fixture costs no timer clamping. stop() between batches is still honoured.
+    const replayAllInstant = (items) => {
+      const generation = stateReplay.generation;
+      const run = (from) => {
+        if (generation !== stateReplay.generation) return;
+        const to = Math.min(items.length, from + REPLAY_INSTANT_BATCH);
+        for (let i = from; i < to; i += 1) {
+          if (!stateReplay.playing) return;
+          replayOne(items[i]);
+        }
+        if (to >= items.length) {
+          stateReplay.playing = false;
+          return;
+        }
+        hostWindow.queueMicrotask(() => run(to));
+      };
+      run(0);
+    };
+
     const replayAllRealtime = (items) => {
       const base = items.length ? Number(items[0].atMs || 0) : 0;
       items.forEach((item, i) => {
@@ -2295,12 +2637,19 @@
           stateReplay.playing = true;
           if (!stateReplay.events.length) {
             emit("start");
-            const tid = setTimeout(() => {
+            const finish = () => {
               if (!stateReplay.playing) return;
               emit("end");
               stateReplay.playing = false;
-            }, 0);
-            stateReplay.timers.push(tid);
+            };
+            if (mode === "instant") {
+              const generation = stateReplay.generation;
+              hostWindow.queueMicrotask(() => {
+                if (generation === stateReplay.generation) finish();
+              });
+              return;
+            }
+            stateReplay.timers.push(setTimeout(finish, 0));
             return;
           }
           const items = stateReplay.events.slice();
@@ -2311,7 +2660,13 @@
             const lastAt = Number(items[items.length - 1]?.atMs || 0);
             items.push({ idx: 999999, type: "end", atMs: lastAt + 10, payload: {} });
           }
-          if (mode === "fast") replayAllFast(items);
+          stateReplay.baseAtMs = Number(items[0]?.atMs || 0);
+          stateReplay.startedAt = hostWindow.performance.now();
+          if (hostWindow.__KOEDEAM_TEST__ && typeof hostWindow.__KOEDEAM_TEST__ === "object") {
+            hostWindow.__KOEDEAM_TEST__.replayEmitLog = [];
+          }
+          if (mode === "instant") replayAllInstant(items);
+          else if (mode === "fast") replayAllFast(items);
           else replayAllRealtime(items);
         }).catch((err) => {
           emit("error", { error: `${err?.message || "replay-load-failed"}` });
@@ -2350,6 +2705,7 @@
       ? createReplayVoiceEngine(hostWindow, {
           replayMode: state.runtime.replayMode,
           replayEventsUrl: state.runtime.replayEventsUrl,
+          replayId: state.runtime.replayId,
           synthetic: !!state.runtime.synthetic,
           syntheticSeed: state.runtime.syntheticSeed,
           syntheticText: state.runtime.syntheticText
@@ -2359,6 +2715,7 @@
       window.__KOEDEAM_TEST__.voiceEngineType = selected;
       window.__KOEDEAM_TEST__.replayMode = state.runtime.replayMode || "realtime";
       window.__KOEDEAM_TEST__.replayEventsUrl = state.runtime.replayEventsUrl || "";
+      window.__KOEDEAM_TEST__.replayId = state.runtime.replayId || "";
       window.__KOEDEAM_TEST__.synthetic = !!state.runtime.synthetic;
       window.__KOEDEAM_TEST__.syntheticSeed = state.runtime.syntheticSeed || "koedeam-seed";
       window.__KOEDEAM_TEST__.syntheticText = state.runtime.syntheticText || "";
@@ -2422,9 +2779,6 @@
       };
       const item = { ...base, ...payload };
       state.telemetry.events.push(item);
-      if (state.telemetry.events.length > 2000) {
-        state.telemetry.events.splice(0, state.telemetry.events.length - 2000);
-      }
       scheduleSessionJsonPersist();
     };
 
@@ -2456,7 +2810,9 @@
       state.voiceEvalActive = evalSpec.label ? { ...evalSpec } : null;
       state.telemetry.sessions.push(state.telemetry.activeSession);
       if (state.telemetry.sessions.length > state.telemetry.maxSessions) {
-        state.telemetry.sessions.splice(0, state.telemetry.sessions.length - state.telemetry.maxSessions);
+        state.telemetry.sessions
+          .splice(0, state.telemetry.sessions.length - state.telemetry.maxSessions)
+          .forEach((old) => countTelemetrySession(old, -1));
       }
       sessionRecord("voice.onstart");
       scheduleSessionJsonPersist();
@@ -2466,6 +2822,7 @@
       const session = state.telemetry.activeSession;
       if (!session) return;
       session.endedAt = Date.now();
+      countTelemetrySession(session, 1, true);
       if (reason === "auto-end") session.autoEndCount = Number(session.autoEndCount || 0) + 1;
       if (session.eval) {
         const expectedChars = Number(session.eval.expectedChars || 0);
@@ -2763,6 +3120,7 @@
           if (session) {
             const best = filtered[0].text || "";
             session.finalCharsTotal = Number(session.finalCharsTotal || 0) + best.length;
+            state.telemetry.totals.finalChars += best.length;
             session.finalResultCount = Number(session.finalResultCount || 0) + 1;
             session.finalText = `${session.finalText || ""}${best}`;
           }
@@ -2890,6 +3248,7 @@
     }
     triggerInput("voice-final");
     updateCaretUI();
+    emitTestSignal("voice-committed", { mode, length: cleaned.length });
   }
 
   function insertByVoiceMode(text) {
@@ -3270,6 +3629,7 @@
     enforceKeyboardPolicy();
     updateStatusIndicator();
     updateCaretUI();
+    emitTestSignal("voice-state", { input: next });
   }
 
   function applySystemState(next) {
@@ -3404,9 +3764,8 @@
     }
   }
 
-  function captureEditorState() {
+  function captureEditorView() {
     return {
-      value: el.editor.value,
       selectionStart: el.editor.selectionStart,
       selectionEnd: el.editor.selectionEnd,
       scrollTop: el.editor.scrollTop,
@@ -3414,32 +3773,107 @@
     };
   }
 
-  function statesEqual(a, b) {
-    if (!a || !b) return false;
-    return a.value === b.value
-      && a.selectionStart === b.selectionStart
-      && a.selectionEnd === b.selectionEnd;
+  function sameSelection(a, b) {
+    return !!a && !!b && a.selectionStart === b.selectionStart && a.selectionEnd === b.selectionEnd;
+  }
+
+  // Length of the common prefix (or suffix) of a and b, compared in native slices that
+  // double in size and are then bisected, so no per-character loop runs over unchanged text.
+  function commonRunLength(a, b, max, fromEnd) {
+    const part = (str, at, n) => (fromEnd ? str.slice(str.length - at - n, str.length - at) : str.slice(at, at + n));
+    let len = 0;
+    let step = 64;
+    while (len < max) {
+      let n = Math.min(step, max - len);
+      if (part(a, len, n) === part(b, len, n)) {
+        len += n;
+        step *= 2;
+        continue;
+      }
+      while (n > 1) {
+        const half = n >> 1;
+        if (part(a, len, half) === part(b, len, half)) {
+          len += half;
+          n -= half;
+        } else {
+          n = half;
+        }
+      }
+      return len;
+    }
+    return len;
+  }
+
+  function diffEditorText(prev, next) {
+    if (prev === next) return null;
+    const max = Math.min(prev.length, next.length);
+    const head = commonRunLength(prev, next, max, false);
+    const tail = commonRunLength(prev, next, max - head, true);
+    return {
+      pos: head,
+      removed: prev.slice(head, prev.length - tail),
+      inserted: next.slice(head, next.length - tail)
+    };
+  }
+
+  function historyEntryBytes(entry) {
+    return (entry.removed.length + entry.inserted.length + (entry.checkpoint?.length || 0)) * 2 + 64;
   }
 
   function trimUndoStack() {
-    const maxDepth = Math.max(1, Math.min(5, Number(state.settings.undoDepth || 3)));
-    state.history.maxDepth = maxDepth;
-    if (state.history.undoStack.length > maxDepth) {
-      state.history.undoStack.splice(0, state.history.undoStack.length - maxDepth);
+    const history = state.history;
+    const maxDepth = Math.max(1, Math.min(UNDO_DEPTH_MAX, Number(state.settings.undoDepth || DEFAULT_SETTINGS.undoDepth)));
+    history.maxDepth = maxDepth;
+    // The newest step always survives, even when it alone is over budget.
+    while (history.undoStack.length > 1
+      && (history.undoStack.length > maxDepth || history.bytes > UNDO_MEMORY_BUDGET_BYTES)) {
+      history.bytes -= historyEntryBytes(history.undoStack.shift());
     }
   }
 
-  function pushUndoSnapshot(reason) {
-    const next = captureEditorState();
-    const last = state.history.undoStack[state.history.undoStack.length - 1];
-    if (statesEqual(last, next)) return;
-    state.history.undoStack.push(next);
-    trimUndoStack();
+  function clearRedoStack() {
+    state.history.redoStack.forEach((entry) => {
+      state.history.bytes -= historyEntryBytes(entry);
+    });
     state.history.redoStack = [];
-    el.btnUndo?.toggleAttribute("disabled", state.history.undoStack.length <= 1);
+  }
+
+  function updateUndoButtons() {
+    el.btnUndo?.toggleAttribute("disabled", state.history.undoStack.length === 0);
     el.btnRedo?.toggleAttribute("disabled", state.history.redoStack.length === 0);
   }
 
+  // Undo history stores deltas against the last committed text ({pos, removed, inserted} plus
+  // the selection on both sides). A full-text checkpoint of the state before the step is kept
+  // once the deltas since the previous checkpoint add up to the document length, and is used
+  // only if a delta no longer matches the text it is applied to.
+  function pushUndoSnapshot(reason) {
+    const history = state.history;
+    const next = el.editor.value;
+    const view = captureEditorView();
+    const delta = diffEditorText(history.text, next);
+    if (!delta && sameSelection(history.view, view)) {
+      emitTestSignal("history-committed", { reason, changed: false });
+      return;
+    }
+    const entry = delta
+      ? { ...delta, before: history.view, after: view }
+      : { pos: 0, removed: "", inserted: "", before: history.view, after: view };
+    history.sinceCheckpoint += entry.removed.length + entry.inserted.length;
+    if (delta && history.sinceCheckpoint >= Math.max(UNDO_CHECKPOINT_MIN_CHARS, history.text.length)) {
+      entry.checkpoint = history.text;
+      history.sinceCheckpoint = 0;
+    }
+    history.undoStack.push(entry);
+    history.bytes += historyEntryBytes(entry);
+    history.text = next;
+    history.view = view;
+    clearRedoStack();
+    trimUndoStack();
+    updateUndoButtons();
+    emitTestSignal("history-committed", { reason, changed: true });
+  }
+
   function scheduleTypingHistoryCommit() {
     if (state.history.typingTimer) clearTimeout(state.history.typingTimer);
     state.history.typingTimer = setTimeout(() => {
@@ -3448,53 +3882,81 @@
     }, 450);
   }
 
-  function applyEditorState(snapshot) {
-    if (!snapshot) return;
-    state.history.applying = true;
-    el.editor.value = snapshot.value;
+  // Typing that has not been committed yet becomes its own step, so undo reverts it first.
+  function flushPendingHistory() {
+    if (state.history.typingTimer) {
+      clearTimeout(state.history.typingTimer);
+      state.history.typingTimer = null;
+    }
+    if (el.editor.value !== state.history.text) pushUndoSnapshot("typing");
+  }
+
+  function applyHistoryEntry(entry, undo) {
+    const history = state.history;
+    const from = undo ? entry.inserted : entry.removed;
+    const to = undo ? entry.removed : entry.inserted;
+    const view = undo ? entry.before : entry.after;
+    history.applying = true;
+    if (history.text.slice(entry.pos, entry.pos + from.length) === from) {
+      el.editor.setRangeText(to, entry.pos, entry.pos + from.length, "preserve");
+      history.text = `${history.text.slice(0, entry.pos)}${to}${history.text.slice(entry.pos + from.length)}`;
+    } else if (undo && typeof entry.checkpoint === "string") {
+      el.editor.value = entry.checkpoint;
+      history.text = entry.checkpoint;
+    } else {
+      // Delta does not fit the current text and there is nothing to restore from: keep the text.
+      history.applying = false;
+      seedUndoState();
+      return;
+    }
+    history.view = view;
     requestAnimationFrame(() => {
-      el.editor.setSelectionRange(snapshot.selectionStart, snapshot.selectionEnd);
-      el.editor.scrollTop = snapshot.scrollTop;
-      el.editor.scrollLeft = snapshot.scrollLeft;
+      if (view) {
+        el.editor.setSelectionRange(view.selectionStart, view.selectionEnd);
+        el.editor.scrollTop = view.scrollTop;
+        el.editor.scrollLeft = view.scrollLeft;
+      }
       triggerInput("undo");
-      state.history.applying = false;
+      history.applying = false;
       updateCaretUI();
     });
   }
 
   function seedUndoState() {
-    state.history.undoStack = [captureEditorState()];
+    state.history.undoStack = [];
     state.history.redoStack = [];
+    state.history.bytes = 0;
+    state.history.sinceCheckpoint = 0;
+    state.history.text = el.editor.value;
+    state.history.view = captureEditorView();
     trimUndoStack();
     el.btnUndo?.setAttribute("disabled", "true");
     el.btnRedo?.setAttribute("disabled", "true");
   }
 
   function undoEdit() {
-    if (state.history.undoStack.length <= 1) return;
-    const current = state.history.undoStack.pop();
-    if (current) state.history.redoStack.push(current);
-    const prev = state.history.undoStack[state.history.undoStack.length - 1];
-    applyEditorState(prev);
-    el.btnUndo?.toggleAttribute("disabled", state.history.undoStack.length <= 1);
-    el.btnRedo?.toggleAttribute("disabled", state.history.redoStack.length === 0);
+    flushPendingHistory();
+    const entry = state.history.undoStack.pop();
+    if (!entry) return;
+    state.history.redoStack.push(entry);
+    applyHistoryEntry(entry, true);
+    updateUndoButtons();
   }
 
   function redoEdit() {
-    if (!state.history.redoStack.length) return;
-    const next = state.history.redoStack.pop();
-    if (!next) return;
-    state.history.undoStack.push(next);
+    flushPendingHistory();
+    const entry = state.history.redoStack.pop();
+    if (!entry) return;
+    state.history.undoStack.push(entry);
+    applyHistoryEntry(entry, false);
     trimUndoStack();
-    applyEditorState(next);
-    el.btnUndo?.toggleAttribute("disabled", state.history.undoStack.length <= 1);
-    el.btnRedo?.toggleAttribute("disabled", state.history.redoStack.length === 0);
+    updateUndoButtons();
   }
 
   function applyUndoSettingsUI() {
     if (!el.undoDepth) return;
-    const depth = Number(state.settings.undoDepth || 3);
-    el.undoDepth.value = String(Math.max(1, Math.min(5, depth)));
+    const depth = Number(state.settings.undoDepth || DEFAULT_SETTINGS.undoDepth);
+    el.undoDepth.value = String(Math.max(1, Math.min(UNDO_DEPTH_MAX, depth)));
   }
 
   function triggerInput(reason = "toolbar") {
@@ -3591,11 +4053,7 @@
     if (next) {
       persistSessionJsonNow();
     } else {
-      try {
-        localStorage.removeItem(STORAGE_KEYS.fieldTestSession);
-      } catch {
-        // ignore
-      }
+      removeStoredSessionJson();
     }
   }
 
@@ -3686,6 +4144,7 @@
       radio.checked = radio.value === (state.settings.fontFace || "sans-jp");
     });
     el.editor.style.fontFamily = getFontFamily(state.settings.fontFace);
+    state.caretGeometry?.invalidate();
   }
 
   function applyInstallHints() {
@@ -4106,19 +4565,27 @@
     };
   }
 
-  function buildSessionMetricsV11(sessions, events) {
-    const completed = sessions.filter((s) => Number(s.startedAt || 0) > 0 && Number(s.endedAt || 0) >= Number(s.startedAt || 0));
-    const durations = completed
-      .map((s) => Number(s.endedAt || 0) - Number(s.startedAt || 0))
-      .filter((ms) => ms >= 0);
-    const totalDurationMs = durations.reduce((a, b) => a + b, 0);
-    const finalChars = sessions.reduce((acc, s) => acc + Number(s.finalCharsTotal || 0), 0);
+  // Running totals behind buildSessionMetricsV11(): added when a session closes (or, for
+  // characters, as finals arrive) and taken back out when the session is evicted.
+  function countTelemetrySession(session, sign, closing = false) {
+    const totals = state.telemetry.totals;
+    const start = Number(session.startedAt || 0);
+    const end = Number(session.endedAt || 0);
+    if (start > 0 && end >= start) {
+      totals.completed += sign;
+      totals.durationMs += sign * (end - start);
+    }
+    if (!closing) totals.finalChars += sign * Number(session.finalCharsTotal || 0);
+  }
+
+  function buildSessionMetricsV11() {
+    const totals = state.telemetry.totals;
     return {
-      session_count: sessions.length,
-      completed_session_count: completed.length,
-      event_count: events.length,
-      final_chars_total: finalChars,
-      avg_session_duration_ms: durations.length ? Math.round(totalDurationMs / durations.length) : null
+      session_count: state.telemetry.sessions.length,
+      completed_session_count: totals.completed,
+      event_count: state.telemetry.events.size(),
+      final_chars_total: totals.finalChars,
+      avg_session_duration_ms: totals.completed ? Math.round(totals.durationMs / totals.completed) : null
     };
   }
 
@@ -4146,15 +4613,14 @@
     };
   }
 
-  function buildSessionJsonV11() {
+  function storedTelemetrySession(session) {
+    return { ...session, finalText: undefined };
+  }
+
+  function buildSessionHeaderV11() {
     const ua = navigator.userAgent || "";
     const platform = navigator.platform || "";
     const browserName = normalizeBrowserName(ua);
-    const sessions = state.telemetry.sessions.map((s) => ({
-      ...s,
-      finalText: undefined
-    }));
-    const events = state.telemetry.events.slice();
     return {
       schema_version: "1.1",
       generated_at: new Date().toISOString(),
@@ -4174,16 +4640,163 @@
         version: normalizeBrowserVersion(ua, browserName)
       },
       capabilities: getRuntimeCapabilities(),
-      settings: buildSessionSettingsV11(),
-      sessions,
-      events,
-      metrics: buildSessionMetricsV11(sessions, events)
+      settings: buildSessionSettingsV11()
     };
   }
 
+  function buildSessionJsonV11(includeEvents = true) {
+    const session = {
+      ...buildSessionHeaderV11(),
+      sessions: state.telemetry.sessions.map(storedTelemetrySession),
+      metrics: buildSessionMetricsV11()
+    };
+    if (includeEvents) session.events = state.telemetry.events.toArray();
+    return session;
+  }
+
+  const telemetrySessionKey = (id) => `${STORAGE_KEYS.fieldTestSession}.session.${id}`;
+
+  // Sessions listed by the stored header, including ones written by an earlier page load.
+  function dropStoredTelemetrySessions() {
+    try {
+      const header = JSON.parse(localStorage.getItem(STORAGE_KEYS.fieldTestSession) || "null");
+      (Array.isArray(header?.session_ids) ? header.session_ids : []).forEach((id) => safeRemove(telemetrySessionKey(id)));
+    } catch {
+      // ignore
+    }
+  }
+
+  // Stored layout (storage_format 2): a header without sessions or events, one key per session
+  // (`<key>.session.<id>`) and the event segments (`<key>.<n>`). A persist writes only sessions that
+  // are new or were still open when last written, and only the segments that received new events.
+  // The header carries no schema_version, so a reader expecting the old single-object layout fails
+  // on it instead of reading an empty session; the export (buildSessionJsonV11) is unchanged.
   function persistSessionJsonNow() {
     if (!state.settings.fieldTest?.enabled) return;
-    safeSet(STORAGE_KEYS.fieldTestSession, buildSessionJsonV11());
+    const telemetry = state.telemetry;
+    if (!telemetry.persistedSessions) {
+      dropStoredTelemetrySessions();
+      telemetry.persistedSessions = new Map();
+    }
+    const persisted = telemetry.persistedSessions;
+    const ids = telemetry.sessions.map((session) => {
+      // true once the session was written after it ended; it does not change afterwards.
+      if (persisted.get(session.id) !== true) {
+        safeSet(telemetrySessionKey(session.id), storedTelemetrySession(session));
+        persisted.set(session.id, !!session.endedAt && session !== telemetry.activeSession);
+      }
+      return session.id;
+    });
+    if (persisted.size > ids.length) {
+      const live = new Set(ids);
+      persisted.forEach((_, id) => {
+        if (live.has(id)) return;
+        safeRemove(telemetrySessionKey(id));
+        persisted.delete(id);
+      });
+    }
+    const { schema_version: exportSchema, ...header } = buildSessionHeaderV11();
+    safeSet(STORAGE_KEYS.fieldTestSession, {
+      storage_format: FIELD_TEST_STORAGE_FORMAT,
+      export_schema_version: exportSchema,
+      ...header,
+      metrics: buildSessionMetricsV11(),
+      session_ids: ids,
+      event_segments: telemetry.events.persist(STORAGE_KEYS.fieldTestSession)
+    });
+  }
+
+  function removeStoredSessionJson() {
+    dropStoredTelemetrySessions();
+    state.telemetry.persistedSessions?.forEach((_, id) => safeRemove(telemetrySessionKey(id)));
+    state.telemetry.persistedSessions = new Map();
+    state.telemetry.events.dropPersisted(STORAGE_KEYS.fieldTestSession);
+    safeRemove(STORAGE_KEYS.fieldTestSession);
+  }
+
+  // Fixed-capacity ring of telemetry events. push() overwrites the oldest event once full, so
+  // appending never shifts the buffer. Events are numbered by a running sequence; segment n of
+  // the stored copy holds sequences [n * segmentSize, (n + 1) * segmentSize).
+  function createTelemetryLog(capacity, segmentSize) {
+    const buf = new Array(capacity);
+    let head = 0;
+    let size = 0;
+    let total = 0;
+    let persistedTotal = 0;
+    let firstSegment = 0;
+    let nextSegment = 0;
+    let staleChecked = false;
+
+    const oldestSeq = () => total - size;
+    const at = (seq) => buf[(head + seq - oldestSeq()) % capacity];
+    const segmentKey = (prefix, n) => `${prefix}.${n}`;
+
+    // Segments left behind by an earlier page load; this log starts empty like the in-memory state.
+    const dropStale = (prefix) => {
+      staleChecked = true;
+      try {
+        const previous = JSON.parse(localStorage.getItem(prefix) || "null");
+        const range = previous?.event_segments;
+        if (!range) return;
+        for (let n = Number(range.first) || 0; n < (Number(range.next) || 0); n += 1) safeRemove(segmentKey(prefix, n));
+      } catch {
+        // ignore
+      }
+    };
+
+    return {
+      size: () => size,
+      push(item) {
+        buf[(head + size) % capacity] = item;
+        if (size < capacity) size += 1;
+        else head = (head + 1) % capacity;
+        total += 1;
+      },
+      toArray() {
+        const out = new Array(size);
+        for (let i = 0; i < size; i += 1) out[i] = buf[(head + i) % capacity];
+        return out;
+      },
+      persist(prefix) {
+        if (!staleChecked) dropStale(prefix);
+        const from = Math.max(persistedTotal, oldestSeq());
+        const keepFrom = Math.floor(oldestSeq() / segmentSize);
+        for (; firstSegment < Math.min(keepFrom, nextSegment); firstSegment += 1) safeRemove(segmentKey(prefix, firstSegment));
+        if (firstSegment < keepFrom) firstSegment = keepFrom;
+        for (let n = Math.floor(from / segmentSize); from < total && n * segmentSize < total; n += 1) {
+          const start = Math.max(n * segmentSize, oldestSeq());
+          const end = Math.min((n + 1) * segmentSize, total);
+          const events = new Array(end - start);
+          for (let seq = start; seq < end; seq += 1) events[seq - start] = at(seq);
+          safeSet(segmentKey(prefix, n), { first_seq: start, events });
+          nextSegment = Math.max(nextSegment, n + 1);
+        }
+        persistedTotal = total;
+        return { first: firstSegment, next: nextSegment, size: segmentSize, first_seq: oldestSeq(), event_count: size };
+      },
+      // Read access to the events present now, by position; events evicted while reading are skipped.
+      cursor() {
+        const first = oldestSeq();
+        const length = size;
+        return {
+          length,
+          read(from, count) {
+            const out = [];
+            const end = first + Math.min(length, from + count);
+            for (let seq = Math.max(first + from, oldestSeq()); seq < end; seq += 1) out.push(at(seq));
+            return out;
+          }
+        };
+      },
+      dropPersisted(prefix) {
+        if (!staleChecked) dropStale(prefix);
+        for (let n = firstSegment; n < nextSegment; n += 1) safeRemove(segmentKey(prefix, n));
+        // Everything still in memory is written again the next time field test mode persists.
+        persistedTotal = oldestSeq();
+        firstSegment = Math.floor(oldestSeq() / segmentSize);
+        nextSegment = firstSegment;
+      }
+    };
   }
 
   function scheduleSessionJsonPersist() {
@@ -4214,7 +4827,7 @@
       version: 1,
       exportedAt: new Date().toISOString(),
       sessions,
-      events: state.telemetry.events.slice(),
+      events: state.telemetry.events.toArray(),
       metrics: sessions
     };
   }
@@ -4333,15 +4946,70 @@
     return new Blob([...localParts, ...centralParts, eocd], { type: "application/zip" });
   }
 
+  // commits.json keeps the full-state shape it had before undo history became deltas: undoStack is
+  // [state before the oldest step, ..., last committed state] and redoStack ends with the state the
+  // next redo restores. States are rebuilt from the deltas a slice at a time while the export is
+  // written; one that cannot be rebuilt (a delta that no longer fits, no checkpoint) is null.
+  function historyStatesReaders() {
+    const history = state.history;
+    const undo = history.undoStack.slice();
+    const redo = history.redoStack.slice();
+    const text = history.text;
+    const view = history.view;
+    const snapshot = (value, at) => (value === null ? null : {
+      value,
+      selectionStart: at?.selectionStart ?? 0,
+      selectionEnd: at?.selectionEnd ?? 0,
+      scrollTop: at?.scrollTop ?? 0,
+      scrollLeft: at?.scrollLeft ?? 0
+    });
+    const revert = (value, entry) => {
+      if (value === null) return null;
+      if (value.slice(entry.pos, entry.pos + entry.inserted.length) === entry.inserted) {
+        return `${value.slice(0, entry.pos)}${entry.removed}${value.slice(entry.pos + entry.inserted.length)}`;
+      }
+      return typeof entry.checkpoint === "string" ? entry.checkpoint : null;
+    };
+    const reapply = (value, entry) => {
+      if (value === null || value.slice(entry.pos, entry.pos + entry.removed.length) !== entry.removed) return null;
+      return `${value.slice(0, entry.pos)}${entry.inserted}${value.slice(entry.pos + entry.removed.length)}`;
+    };
+    return {
+      undoStack: {
+        length: undo.length + 1,
+        read(from, count) {
+          const out = [];
+          let value = text;
+          for (let i = undo.length; i >= from; i -= 1) {
+            if (i < from + count) out.unshift(snapshot(value, i === undo.length ? view : undo[i].before));
+            if (i > 0) value = revert(value, undo[i - 1]);
+          }
+          return out;
+        }
+      },
+      redoStack: {
+        length: redo.length,
+        read(from, count) {
+          const out = [];
+          let value = text;
+          for (let i = redo.length - 1; i >= from; i -= 1) {
+            value = reapply(value, redo[i]);
+            if (i < from + count) out.unshift(snapshot(value, redo[i].after));
+          }
+          return out;
+        }
+      }
+    };
+  }
+
+  // JSON entries are a small header object plus `arrays`, top-level array members appended after
+  // the header's own keys and read in slices, so the export never copies the event log or the
+  // undo history as a whole.
   function buildFieldTestExportFiles() {
-    const session = buildSessionJsonV11();
+    const session = buildSessionJsonV11(false);
     const nowIso = new Date().toISOString();
     const resultText = String(el.editor?.value || "");
-    const commits = {
-      exportedAt: nowIso,
-      undoStack: state.history.undoStack.slice(),
-      redoStack: state.history.redoStack.slice()
-    };
+    const commits = { exportedAt: nowIso };
     const meta = [
       "# Koedeam Field Test Export",
       "",
@@ -4358,21 +5026,106 @@
       "note=User consent is required before enabling Field Test Mode."
     ].join("\n");
     return [
-      { name: "session.json", bytes: toUtf8Bytes(JSON.stringify(session, null, 2)) },
-      { name: "result.txt", bytes: toUtf8Bytes(resultText) },
-      { name: "commits.json", bytes: toUtf8Bytes(JSON.stringify(commits, null, 2)) },
-      { name: "meta.md", bytes: toUtf8Bytes(meta) },
-      { name: "CONSENT.txt", bytes: toUtf8Bytes(consent) }
+      { name: "session.json", json: session, arrays: { events: state.telemetry.events.cursor() } },
+      { name: "result.txt", text: resultText },
+      {
+        name: "commits.json",
+        json: commits,
+        arrays: historyStatesReaders()
+      },
+      { name: "meta.md", text: meta },
+      { name: "CONSENT.txt", text: consent }
     ];
   }
 
-  function exportFieldTestZip() {
+  function materializeExportEntry(entry) {
+    if ("text" in entry) return entry.text;
+    const json = { ...entry.json };
+    Object.entries(entry.arrays || {}).forEach(([key, reader]) => {
+      json[key] = reader.read(0, reader.length);
+    });
+    return JSON.stringify(json, null, 2);
+  }
+
+  // The worker pulls array slices and long texts from `sources` as it writes each entry.
+  function buildZipInWorker(entries) {
+    return new Promise((resolve, reject) => {
+      const sources = [];
+      const addSource = (reader) => sources.push(reader) - 1;
+      const payload = entries.map((entry) => {
+        if ("text" in entry) {
+          const text = entry.text;
+          if (text.length <= ZIP_INLINE_TEXT_CHARS) return { name: entry.name, text };
+          return { name: entry.name, source: addSource({ length: text.length, read: (from, count) => text.slice(from, from + count) }), length: text.length };
+        }
+        const arrays = Object.entries(entry.arrays || {}).map(([key, reader]) => [key, addSource(reader), reader.length]);
+        return { name: entry.name, json: entry.json, arrays };
+      });
+      let worker = null;
+      try {
+        worker = new Worker(ZIP_WORKER_URL);
+      } catch (error) {
+        reject(error);
+        return;
+      }
+      const done = (fn, value) => {
+        worker.terminate();
+        fn(value);
+      };
+      const post = (message) => {
+        try {
+          worker.postMessage(message);
+        } catch (error) {
+          // DataCloneError and the like: nothing will answer, so stop the worker here.
+          done(reject, error);
+        }
+      };
+      worker.addEventListener("message", (event) => {
+        const data = event.data || {};
+        if (data.type === "pull") {
+          const source = sources[data.source];
+          post({ type: "slice", id: data.id, items: source ? source.read(data.from, data.count) : [] });
+        } else if (data.ok) {
+          done(resolve, data.blob);
+        } else {
+          done(reject, new Error(data.error || "zip worker failed"));
+        }
+      });
+      worker.addEventListener("error", (event) => {
+        event.preventDefault();
+        done(reject, new Error(event.message || "zip worker failed"));
+      });
+      post({ type: "build", entries: payload });
+    });
+  }
+
+  async function exportFieldTestZip() {
     if (!state.settings.fieldTest?.consentedAt) {
       toast("Field Test同意後にエクスポートできます");
       return;
     }
-    const files = buildFieldTestExportFiles();
-    const blob = buildZipBlob(files);
+    if (state.fieldTestExporting) return;
+    state.fieldTestExporting = true;
+    const entries = buildFieldTestExportFiles();
+    let blob = null;
+    try {
+      if (typeof Worker === "function") {
+        toast("Field Test ZIP を作成しています…", 60000);
+        try {
+          blob = await buildZipInWorker(entries);
+        } catch {
+          // Fall back to the stored (uncompressed) ZIP on the main thread.
+        }
+      }
+      if (!blob) {
+        blob = buildZipBlob(entries.map((entry) => ({
+          name: entry.name,
+          bytes: toUtf8Bytes(materializeExportEntry(entry))
+        })));
+      }
+    } finally {
+      state.fieldTestExporting = false;
+    }
     const url = URL.createObjectURL(blob);
     const a = document.createElement("a");
     a.href = url;
@@ -4572,20 +5325,17 @@
   function resetApp() {
     const ok = confirm("設定・下書き・履歴・テンプレを初期化します。よろしいですか？");
     if (!ok) return;
-    try {
-      localStorage.removeItem(STORAGE_KEYS.currentDraft);
-      localStorage.removeItem(STORAGE_KEYS.recentDrafts);
-      localStorage.removeItem(STORAGE_KEYS.templates);
-      localStorage.removeItem(STORAGE_KEYS.settings);
-      localStorage.removeItem(STORAGE_KEYS.fieldTestSession);
-      localStorage.setItem(STORAGE_KEYS.version, "1");
-    } catch {
-      // ignore
-    }
+    [STORAGE_KEYS.currentDraft, STORAGE_KEYS.draftShadow, STORAGE_KEYS.recentDrafts, STORAGE_KEYS.templates, STORAGE_KEYS.settings]
+      .forEach((key) => safeRemove(key));
+    removeStoredSessionJson();
+    safeSet(STORAGE_KEYS.version, "1");
+    state.docStore?.clear();
+    state.snapshotIds = new Set();
     state.draft = "";
     state.recentDrafts = [];
     state.templates = structuredClone(DEFAULT_TEMPLATES);
     state.settings = structuredClone(DEFAULT_SETTINGS);
+    if (state.docStore?.isOpen()) state.settings.storageBackend = "indexeddb";
     el.editor.value = "";
     ensureDocuments();
     applySidebar();
@@ -4630,16 +5380,282 @@
   }
 
   function saveSettings() {
-    safeSet(STORAGE_KEYS.settings, state.settings);
+    safeSet(STORAGE_KEYS.settings, settingsForStorage());
     scheduleSessionJsonPersist();
   }
 
+  function usesDocumentStore() {
+    return !!state.docStore && state.settings.storageBackend === "indexeddb";
+  }
+
+  // Document texts live in IndexedDB once migrated; the settings blob keeps only their metadata.
+  function settingsForStorage() {
+    if (!usesDocumentStore()) return state.settings;
+    return {
+      ...state.settings,
+      documents: (state.settings.documents || []).map(({ id, title, updatedAt }) => ({ id, title, updatedAt }))
+    };
+  }
+
+  function persistDocument(id) {
+    if (usesDocumentStore() && id) state.docStore.markDirty("documents", id);
+  }
+
+  // After migration the current document is also written synchronously to a localStorage
+  // shadow, so a tab closed before the IndexedDB flush loses nothing and a profile whose
+  // IndexedDB cannot be opened still has its current text.
+  function persistCurrentDraft() {
+    if (state.settings.storageBackend !== "indexeddb") {
+      safeSet(STORAGE_KEYS.currentDraft, state.draft);
+      return;
+    }
+    safeSet(STORAGE_KEYS.draftShadow, { id: state.settings.currentDocId, text: state.draft, updatedAt: Date.now() });
+    persistDocument(state.settings.currentDocId);
+  }
+
+  function readDraftShadow() {
+    try {
+      const shadow = JSON.parse(localStorage.getItem(STORAGE_KEYS.draftShadow) || "null");
+      return shadow && typeof shadow.id === "string" && typeof shadow.text === "string" ? shadow : null;
+    } catch {
+      return null;
+    }
+  }
+
+  // Puts the shadow text into the current document when it is at least as new as `storedAt`.
+  function restoreDraftShadow(storedAt) {
+    const current = getCurrentDocument();
+    const shadow = readDraftShadow();
+    if (!current || !shadow || shadow.id !== current.id || shadow.text === current.text) return false;
+    if (Number(shadow.updatedAt || 0) < Number(storedAt || 0)) return false;
+    current.text = shadow.text;
+    current.title = firstLine(current.text) || current.title;
+    current.updatedAt = Number(shadow.updatedAt || Date.now());
+    return true;
+  }
+
   function persistTemplates() {
     safeSet(STORAGE_KEYS.templates, state.templates);
   }
 
-  function persistRecentDrafts() {
-    safeSet(STORAGE_KEYS.recentDrafts, state.recentDrafts.slice(0, 5));
+  function persistRecentDrafts(changedId = "") {
+    if (!usesDocumentStore()) {
+      safeSet(STORAGE_KEYS.recentDrafts, state.recentDrafts.slice(0, 5));
+      return;
+    }
+    const live = new Set(state.recentDrafts.map((item) => item.id));
+    state.snapshotIds.forEach((id) => {
+      if (!live.has(id)) state.docStore.markDeleted("snapshots", id);
+    });
+    if (changedId && live.has(changedId)) state.docStore.markDirty("snapshots", changedId);
+    state.snapshotIds = live;
+  }
+
+  function documentRecord(kind, id) {
+    if (kind === "snapshots") return state.recentDrafts.find((item) => item.id === id) || null;
+    const doc = (state.settings.documents || []).find((item) => item.id === id);
+    return doc ? { id: doc.id, title: doc.title, text: doc.text, updatedAt: doc.updatedAt } : null;
+  }
+
+  // One IndexedDB record per document and per snapshot. Writes are queued by id and flushed
+  // in one transaction when the tab is idle, so the input path never serializes document text.
+  function createDocumentStore() {
+    if (typeof indexedDB === "undefined") return null;
+    const dirty = { documents: new Map(), snapshots: new Map() };
+    let db = null;
+    let ready = false;
+    let flushQueued = false;
+    let flushing = null;
+
+    const request = (req) => new Promise((resolve, reject) => {
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+    const complete = (tx) => new Promise((resolve, reject) => {
+      tx.oncomplete = () => resolve();
+      tx.onabort = () => reject(tx.error);
+      tx.onerror = () => reject(tx.error);
+    });
+
+    const open = () => new Promise((resolve, reject) => {
+      const req = indexedDB.open(DOCUMENT_DB_NAME, DOCUMENT_DB_VERSION);
+      req.onupgradeneeded = () => {
+        DOCUMENT_DB_STORES.forEach((name) => {
+          if (!req.result.objectStoreNames.contains(name)) req.result.createObjectStore(name, { keyPath: "id" });
+        });
+      };
+      req.onsuccess = () => {
+        db = req.result;
+        resolve();
+      };
+      req.onerror = () => reject(req.error);
+    });
+
+    const readAll = async () => {
+      const tx = db.transaction(DOCUMENT_DB_STORES, "readonly");
+      const [documents, snapshots] = await Promise.all(DOCUMENT_DB_STORES.map((name) => request(tx.objectStore(name).getAll())));
+      return { documents, snapshots };
+    };
+
+    const importAll = (documents, snapshots) => {
+      const tx = db.transaction(DOCUMENT_DB_STORES, "readwrite");
+      documents.forEach((doc) => tx.objectStore("documents").put(doc));
+      snapshots.forEach((item) => tx.objectStore("snapshots").put(item));
+      return complete(tx);
+    };
+
+    const flush = () => {
+      if (!db || !ready) return Promise.resolve();
+      if (flushing) {
+        schedule();
+        return flushing;
+      }
+      const batch = DOCUMENT_DB_STORES.map((name) => [name, [...dirty[name]]]);
+      DOCUMENT_DB_STORES.forEach((name) => dirty[name].clear());
+      if (!batch.some(([, items]) => items.length)) return Promise.resolve();
+      const tx = db.transaction(DOCUMENT_DB_STORES, "readwrite");
+      batch.forEach(([name, items]) => {
+        const store = tx.objectStore(name);
+        items.forEach(([id, op]) => {
+          const record = op === "put" ? documentRecord(name, id) : null;
+          if (record) store.put(record);
+          else store.delete(id);
+        });
+      });
+      flushing = complete(tx)
+        .then(() => {
+          getStorageUsage().refreshEstimate();
+          emitTestSignal("save-flushed", { key: "indexeddb" });
+        })
+        .catch(() => {
+          // Put the batch back so the next flush retries it.
+          batch.forEach(([name, items]) => items.forEach(([id, op]) => {
+            if (!dirty[name].has(id)) dirty[name].set(id, op);
+          }));
+          toast("保存に失敗しました");
+        })
+        .finally(() => {
+          flushing = null;
+        });
+      return flushing;
+    };
+
+    const schedule = () => {
+      if (flushQueued || !ready) return;
+      flushQueued = true;
+      const run = () => {
+        flushQueued = false;
+        flush();
+      };
+      if (typeof window.requestIdleCallback === "function") window.requestIdleCallback(run, { timeout: DOCUMENT_FLUSH_TIMEOUT_MS });
+      else setTimeout(run, 300);
+    };
+
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "hidden") flush();
+    });
+    window.addEventListener("pagehide", () => flush());
+
+    return {
+      open,
+      readAll,
+      importAll,
+      flush,
+      isOpen: () => !!db,
+      setReady() {
+        ready = true;
+        schedule();
+      },
+      markDirty(kind, id) {
+        dirty[kind].set(id, "put");
+        schedule();
+      },
+      markDeleted(kind, id) {
+        dirty[kind].set(id, "delete");
+        schedule();
+      },
+      clear() {
+        DOCUMENT_DB_STORES.forEach((name) => dirty[name].clear());
+        if (!db) return;
+        const tx = db.transaction(DOCUMENT_DB_STORES, "readwrite");
+        DOCUMENT_DB_STORES.forEach((name) => tx.objectStore(name).clear());
+      }
+    };
+  }
+
+  // Opens the document store after the synchronous boot. The first run copies documents and
+  // snapshots out of localStorage (one-time migration); later runs load the texts from IndexedDB.
+  async function hydrateDocumentStore() {
+    const store = state.docStore;
+    const migrated = state.settings.storageBackend === "indexeddb";
+    if (!store) {
+      if (migrated) continueFromDraftShadow();
+      return;
+    }
+    if (migrated) el.editor.readOnly = true;
+    try {
+      await store.open();
+      if (!migrated) {
+        await store.importAll(state.settings.documents.map((doc) => documentRecord("documents", doc.id)), state.recentDrafts);
+        state.settings.storageBackend = "indexeddb";
+        state.snapshotIds = new Set(state.recentDrafts.map((item) => item.id));
+        // Edits made while the import was running go out with the first flush.
+        persistCurrentDraft();
+        saveSettings();
+        safeRemove(STORAGE_KEYS.currentDraft);
+        safeRemove(STORAGE_KEYS.recentDrafts);
+      } else {
+        const stored = await store.readAll();
+        const byId = new Map(stored.documents.map((doc) => [doc.id, doc]));
+        state.settings.documents.forEach((doc) => {
+          const record = byId.get(doc.id);
+          if (!record) return;
+          doc.text = typeof record.text === "string" ? record.text : "";
+          doc.title = firstLine(doc.text) || doc.title;
+        });
+        // The last edit may not have reached IndexedDB before the previous tab closed.
+        if (restoreDraftShadow(byId.get(state.settings.currentDocId)?.updatedAt)) persistDocument(state.settings.currentDocId);
+        state.recentDrafts = stored.snapshots.sort((a, b) => Number(b.updatedAt || 0) - Number(a.updatedAt || 0));
+        state.snapshotIds = new Set(state.recentDrafts.map((item) => item.id));
+        state.draft = getCurrentDocument()?.text || "";
+        el.editor.value = state.draft;
+        seedUndoState();
+        updateCaretUI();
+      }
+      store.setReady();
+      renderDocumentLists();
+      renderHistory();
+      emitTestSignal("storage-ready", { backend: "indexeddb", migrated: !migrated });
+    } catch {
+      state.docStore = null;
+      if (!migrated) {
+        // Migration did not happen: keep using localStorage for this session.
+        emitTestSignal("storage-ready", { backend: "localStorage", migrated: false });
+        return;
+      }
+      continueFromDraftShadow();
+      return;
+    }
+    el.editor.readOnly = false;
+  }
+
+  // IndexedDB is unavailable on a migrated profile. Other documents stay in IndexedDB for the next
+  // load; the current one continues from its localStorage shadow, which keeps being written.
+  function continueFromDraftShadow() {
+    state.docStore = null;
+    restoreDraftShadow(0);
+    state.draft = getCurrentDocument()?.text || "";
+    el.editor.value = state.draft;
+    seedUndoState();
+    updateCaretUI();
+    el.editor.readOnly = false;
+    toast("文書の読み込みに失敗しました。現在の文書のみ編集できます。", 3600, "warning");
+    emitTestSignal("storage-ready", { backend: "localStorage", migrated: false });
+  }
+
+  // Texts of other documents were not loaded when IndexedDB could not be opened.
+  function documentTextsUnavailable() {
+    return state.settings.storageBackend === "indexeddb" && !state.docStore;
   }
 
   function migrateVersion() {
@@ -4707,38 +5723,150 @@
     try {
       const payload = typeof value === "string" ? value : JSON.stringify(value);
       localStorage.setItem(key, payload);
+      getStorageUsage().record(key, payload.length);
       updateStorageCapacityWarning();
+      emitTestSignal("save-flushed", { key });
     } catch {
+      // The write may have been partly applied or storage changed under us: recount.
+      getStorageUsage().resync();
       updateStorageCapacityWarning(true);
       toast("保存に失敗しました");
     }
   }
 
-  function estimateKoedeamStorageBytes() {
+  function safeRemove(key) {
     try {
-      let total = 0;
-      for (let i = 0; i < localStorage.length; i += 1) {
-        const k = localStorage.key(i) || "";
-        if (!k.startsWith("koedeam.")) continue;
-        const v = localStorage.getItem(k) || "";
-        total += (k.length + v.length) * 2;
-      }
-      return total;
+      localStorage.removeItem(key);
+      getStorageUsage().forget(key);
     } catch {
-      return 0;
+      // ignore
     }
   }
 
+  function estimateKoedeamStorageBytes() {
+    return getStorageUsage().bytes();
+  }
+
+  function getStorageUsage() {
+    if (!state.storageUsage) state.storageUsage = createStorageUsage();
+    return state.storageUsage;
+  }
+
+  // Byte accounting for the koedeam.* localStorage keys. safeSet/safeRemove keep per-key sizes
+  // current, so a capacity check never reads values back. A full recount happens once on first
+  // use, when the tab is idle after a change of visibility, and whenever localStorage.length
+  // shows a key that did not go through these helpers. navigator.storage.estimate() adds the
+  // origin-wide usage (IndexedDB documents included) where the browser provides it.
+  function createStorageUsage() {
+    const sizes = new Map();
+    let total = 0;
+    let keyCount = -1;
+    let origin = null;
+    let resyncQueued = false;
+
+    const entryBytes = (key, length) => (key.length + length) * 2;
+
+    const resync = () => {
+      sizes.clear();
+      total = 0;
+      try {
+        keyCount = localStorage.length;
+        for (let i = 0; i < keyCount; i += 1) {
+          const k = localStorage.key(i) || "";
+          if (!k.startsWith("koedeam.")) continue;
+          const bytes = entryBytes(k, (localStorage.getItem(k) || "").length);
+          sizes.set(k, bytes);
+          total += bytes;
+        }
+      } catch {
+        keyCount = -1;
+      }
+    };
+
+    const refreshEstimate = () => {
+      if (typeof navigator.storage?.estimate !== "function") return;
+      navigator.storage.estimate().then((info) => {
+        origin = Number(info?.quota) > 0 ? { usage: Number(info.usage) || 0, quota: Number(info.quota) } : null;
+        updateStorageCapacityWarning();
+      }).catch(() => {
+        origin = null;
+      });
+    };
+
+    const scheduleResync = () => {
+      if (resyncQueued) return;
+      resyncQueued = true;
+      const run = () => {
+        resyncQueued = false;
+        resync();
+        refreshEstimate();
+        updateStorageCapacityWarning();
+      };
+      if (typeof window.requestIdleCallback === "function") window.requestIdleCallback(run, { timeout: STORAGE_RESYNC_TIMEOUT_MS });
+      else setTimeout(run, 1000);
+    };
+
+    // Other tabs of the app write the same keys.
+    window.addEventListener("storage", () => {
+      keyCount = -1;
+    });
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "visible") scheduleResync();
+    });
+
+    resync();
+    refreshEstimate();
+
+    return {
+      resync,
+      scheduleResync,
+      refreshEstimate,
+      record(key, length) {
+        const previous = sizes.get(key);
+        if (previous === undefined && keyCount >= 0) keyCount += 1;
+        const bytes = entryBytes(key, length);
+        sizes.set(key, bytes);
+        total += bytes - (previous || 0);
+      },
+      forget(key) {
+        const previous = sizes.get(key);
+        if (previous === undefined) return;
+        if (keyCount >= 0) keyCount -= 1;
+        sizes.delete(key);
+        total -= previous;
+      },
+      bytes() {
+        let length = -1;
+        try {
+          length = localStorage.length;
+        } catch {
+          // ignore
+        }
+        if (keyCount < 0 || length !== keyCount) resync();
+        return total;
+      },
+      origin: () => origin
+    };
+  }
+
   function updateStorageCapacityWarning(forceToast = false) {
-    const used = estimateKoedeamStorageBytes();
-    const ratio = STORAGE_QUOTA_ESTIMATE_BYTES > 0 ? (used / STORAGE_QUOTA_ESTIMATE_BYTES) : 0;
+    const usage = getStorageUsage();
+    let used = usage.bytes();
+    let limit = STORAGE_QUOTA_ESTIMATE_BYTES;
+    let ratio = limit > 0 ? (used / limit) : 0;
+    const origin = usage.origin();
+    if (origin && origin.usage / origin.quota > ratio) {
+      used = origin.usage;
+      limit = origin.quota;
+      ratio = used / limit;
+    }
     const nextBand = ratio >= STORAGE_WARN_HARD_RATIO ? "hard" : (ratio >= STORAGE_WARN_SOFT_RATIO ? "soft" : "ok");
     const bandChanged = nextBand !== state.storageWarnBand;
     state.storageWarnBand = nextBand;
     if (nextBand === "ok") return;
     if (!bandChanged && !forceToast) return;
     const usedMb = (used / (1024 * 1024)).toFixed(2);
-    const limitMb = (STORAGE_QUOTA_ESTIMATE_BYTES / (1024 * 1024)).toFixed(0);
+    const limitMb = (limit / (1024 * 1024)).toFixed(0);
     toast(`保存領域が逼迫しています (${usedMb}MB / ${limitMb}MB)。不要な履歴や文書の整理を検討してください。`, 3600, "warning");
   }
 
@@ -5065,34 +6193,13 @@
 
   function ensureCaretVisible() {
     const ta = el.editor;
-    const pos = ta.selectionStart;
-    const text = ta.value.slice(0, pos);
-    const cs = window.getComputedStyle(ta);
-    const mirror = document.createElement("div");
-    mirror.style.position = "absolute";
-    mirror.style.visibility = "hidden";
-    mirror.style.whiteSpace = "pre-wrap";
-    mirror.style.wordWrap = "break-word";
-    mirror.style.fontFamily = cs.fontFamily;
-    mirror.style.fontSize = cs.fontSize;
-    mirror.style.lineHeight = cs.lineHeight;
-    mirror.style.padding = cs.padding;
-    mirror.style.border = cs.border;
-    mirror.style.width = `${ta.clientWidth}px`;
-    mirror.textContent = text;
-    const marker = document.createElement("span");
-    marker.textContent = "▮";
-    mirror.append(marker);
-    document.body.append(mirror);
-    const markerTop = marker.offsetTop;
-    const padTop = parseFloat(cs.paddingTop) || 0;
+    const geometry = getCaretGeometry().measure(ta.selectionStart);
+    const caretTop = geometry.offsetTop + geometry.padTop;
     const viewTop = ta.scrollTop;
     const viewBottom = viewTop + ta.clientHeight;
-    const caretTop = markerTop + padTop;
     if (caretTop < viewTop || caretTop > viewBottom - 24) {
       ta.scrollTop = Math.max(0, caretTop - ta.clientHeight / 2);
     }
-    mirror.remove();
   }
 
   function ensureSelectionVisible(dir = 1) {
@@ -5132,32 +6239,202 @@
   function getCaretCoordinates(posOverride) {
     const ta = el.editor;
     if (!ta) return null;
-    const pos = Number.isFinite(Number(posOverride))
-      ? Math.max(0, Math.min(ta.value.length, Number(posOverride)))
-      : ta.selectionStart;
-    const text = ta.value.slice(0, pos);
-    const cs = window.getComputedStyle(ta);
+    const pos = Number.isFinite(Number(posOverride)) ? Number(posOverride) : ta.selectionStart;
+    const geometry = getCaretGeometry().measure(pos);
+    return {
+      top: geometry.offsetTop - ta.scrollTop,
+      left: geometry.offsetLeft - ta.scrollLeft,
+      lineHeight: geometry.lineHeight
+    };
+  }
+
+  function getCaretGeometry() {
+    if (!state.caretGeometry) state.caretGeometry = createCaretGeometry(el.editor);
+    return state.caretGeometry;
+  }
+
+  // Caret position inside the editor, measured with one persistent hidden mirror.
+  // Paragraph lengths and rendered heights are cached; an edit only drops the paragraphs it
+  // touched, and the caret itself is measured within its own paragraph. The cache is rebuilt
+  // after invalidate() (typography change, editor resize, web font load).
+  function createCaretGeometry(ta) {
+    const cache = {
+      ready: false,
+      text: "",
+      lens: [],
+      heights: [],
+      starts: [0],
+      tops: [0],
+      validStart: 0,
+      validTop: 0,
+      padTop: 0,
+      lineHeight: 24
+    };
     const mirror = document.createElement("div");
+    mirror.setAttribute("aria-hidden", "true");
     mirror.style.position = "absolute";
     mirror.style.visibility = "hidden";
     mirror.style.whiteSpace = "pre-wrap";
     mirror.style.wordWrap = "break-word";
-    mirror.style.fontFamily = cs.fontFamily;
-    mirror.style.fontSize = cs.fontSize;
-    mirror.style.lineHeight = cs.lineHeight;
-    mirror.style.padding = cs.padding;
-    mirror.style.border = cs.border;
-    mirror.style.width = `${ta.clientWidth}px`;
-    mirror.textContent = text;
-    const marker = document.createElement("span");
-    marker.textContent = "▮";
-    mirror.append(marker);
-    document.body.append(mirror);
-    const markerTop = marker.offsetTop - ta.scrollTop;
-    const markerLeft = marker.offsetLeft - ta.scrollLeft;
-    const lineHeight = parseFloat(cs.lineHeight) || parseFloat(cs.fontSize) * 1.6 || 24;
-    mirror.remove();
-    return { top: markerTop, left: markerLeft, lineHeight };
+    mirror.style.top = "0";
+    mirror.style.left = "0";
+    // Zero-height and contained so the measuring content never adds to the page's layout or scroll size.
+    mirror.style.height = "0";
+    mirror.style.overflow = "hidden";
+    mirror.style.contain = "strict";
+
+    const invalidate = () => {
+      cache.ready = false;
+    };
+
+    const paragraphLengths = (text, from, to, keepLast) => {
+      const lens = [];
+      let at = from;
+      for (;;) {
+        const nl = text.indexOf("\n", at);
+        if (nl === -1 || nl >= to) break;
+        lens.push(nl + 1 - at);
+        at = nl + 1;
+      }
+      if (keepLast) lens.push(to - at);
+      return lens;
+    };
+
+    const rebuild = (text) => {
+      const cs = window.getComputedStyle(ta);
+      mirror.style.fontFamily = cs.fontFamily;
+      mirror.style.fontSize = cs.fontSize;
+      mirror.style.lineHeight = cs.lineHeight;
+      mirror.style.padding = cs.padding;
+      mirror.style.border = cs.border;
+      mirror.style.width = `${ta.clientWidth}px`;
+      if (!mirror.isConnected) document.body.append(mirror);
+      cache.padTop = parseFloat(cs.paddingTop) || 0;
+      cache.lineHeight = parseFloat(cs.lineHeight) || parseFloat(cs.fontSize) * 1.6 || 24;
+      cache.text = text;
+      cache.lens = paragraphLengths(text, 0, text.length, true);
+      cache.heights = new Array(cache.lens.length).fill(-1);
+      cache.validStart = 0;
+      cache.validTop = 0;
+      cache.ready = true;
+    };
+
+    // Paragraph index for a text offset, extending the cumulative starts as needed.
+    const paragraphAt = (pos) => {
+      const { lens, starts } = cache;
+      const last = lens.length - 1;
+      if (cache.validStart < last && starts[cache.validStart] + lens[cache.validStart] <= pos) {
+        while (cache.validStart < last && starts[cache.validStart] + lens[cache.validStart] <= pos) {
+          starts[cache.validStart + 1] = starts[cache.validStart] + lens[cache.validStart];
+          cache.validStart += 1;
+        }
+        return cache.validStart;
+      }
+      let lo = 0;
+      let hi = cache.validStart;
+      while (lo < hi) {
+        const mid = (lo + hi + 1) >> 1;
+        if (starts[mid] <= pos) lo = mid;
+        else hi = mid - 1;
+      }
+      return lo;
+    };
+
+    const applyEdit = (text) => {
+      const prev = cache.text;
+      const max = Math.min(prev.length, text.length);
+      const head = commonRunLength(prev, text, max, false);
+      const tail = commonRunLength(prev, text, max - head, true);
+      const first = paragraphAt(head);
+      const lastOld = paragraphAt(prev.length - tail);
+      const blockStart = cache.starts[first];
+      const isLast = lastOld === cache.lens.length - 1;
+      const blockEnd = cache.starts[lastOld] + cache.lens[lastOld] + text.length - prev.length;
+      const lens = paragraphLengths(text, blockStart, blockEnd, isLast);
+      const count = lastOld - first + 1;
+      if (lens.length > 4096) {
+        // Large replacements (document switch, replace-all) would overflow splice's argument list.
+        cache.lens = cache.lens.slice(0, first).concat(lens, cache.lens.slice(first + count));
+        cache.heights = cache.heights.slice(0, first).concat(new Array(lens.length).fill(-1), cache.heights.slice(first + count));
+      } else {
+        cache.lens.splice(first, count, ...lens);
+        cache.heights.splice(first, count, ...lens.map(() => -1));
+      }
+      cache.validStart = Math.min(cache.validStart, first);
+      cache.validTop = Math.min(cache.validTop, first);
+      cache.text = text;
+    };
+
+    const paragraphText = (index) => {
+      const start = cache.starts[index];
+      const len = cache.lens[index];
+      const hasBreak = cache.text.charCodeAt(start + len - 1) === 10;
+      return cache.text.slice(start, start + len - (hasBreak ? 1 : 0));
+    };
+
+    // Height above paragraph `index`; unmeasured paragraphs on the way are laid out in one pass.
+    const topOf = (index) => {
+      const { heights, tops } = cache;
+      const pending = [];
+      for (let i = cache.validTop; i < index; i += 1) {
+        if (heights[i] < 0) pending.push(i);
+      }
+      if (pending.length) {
+        const blocks = pending.map((i) => {
+          const block = document.createElement("div");
+          block.textContent = paragraphText(i) || "\u200b";
+          return block;
+        });
+        mirror.replaceChildren(...blocks);
+        blocks.forEach((block, n) => {
+          heights[pending[n]] = block.offsetHeight;
+        });
+        mirror.replaceChildren();
+      }
+      for (; cache.validTop < index; cache.validTop += 1) {
+        tops[cache.validTop + 1] = tops[cache.validTop] + heights[cache.validTop];
+      }
+      return tops[index];
+    };
+
+    const measure = (posRaw) => {
+      const text = ta.value;
+      if (!cache.ready) rebuild(text);
+      else if (text !== cache.text) applyEdit(text);
+      const pos = Math.max(0, Math.min(text.length, Number(posRaw) || 0));
+      const index = paragraphAt(pos);
+      const above = topOf(index);
+      const line = document.createElement("div");
+      line.textContent = text.slice(cache.starts[index], pos);
+      const marker = document.createElement("span");
+      marker.textContent = "▮";
+      line.append(marker);
+      mirror.replaceChildren(line);
+      const offsetTop = above + marker.offsetTop;
+      const offsetLeft = marker.offsetLeft;
+      // Do not keep transcript text in the DOM between measurements.
+      mirror.replaceChildren();
+      return {
+        offsetTop,
+        offsetLeft,
+        lineHeight: cache.lineHeight,
+        padTop: cache.padTop
+      };
+    };
+
+    if (typeof ResizeObserver === "function") {
+      // Only width changes re-wrap text; the first callback just records the initial width.
+      let observedWidth = -1;
+      new ResizeObserver((entries) => {
+        const width = entries[entries.length - 1].contentRect.width;
+        if (observedWidth >= 0 && width !== observedWidth) invalidate();
+        observedWidth = width;
+      }).observe(ta);
+    } else {
+      window.addEventListener("resize", invalidate);
+    }
+    document.fonts?.addEventListener?.("loadingdone", invalidate);
+    return { measure, invalidate };
   }
 
   function getLineBounds(text, pos) {
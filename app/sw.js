@@ -1,9 +1,10 @@
-const CACHE_NAME = "koedeam-app-v115";
+const CACHE_NAME = "koedeam-app-v116";
 const ASSETS = [
   "./",
   "./index.html",
   "./style.css",
   "./app.js",
+  "./zip_worker.js",
   "./version.json",
   "./manifest.webmanifest",
   "../assets/icon.svg"
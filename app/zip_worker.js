@@ -0,0 +1,302 @@
+// Builds the field-test ZIP off the main thread (exportFieldTestZip in app.js).
+// Entries are produced as a sequence of text chunks, encoded, CRC'd and (where
+// CompressionStream exists) deflated one chunk at a time, so working memory is
+// bounded by CHUNK_CHARS rather than by the size of the export. Large arrays and
+// long texts stay on the main thread and are pulled a slice at a time. Sizes and
+// CRC follow each entry in a data descriptor because they are only known at the end.
+//
+// Entries: { name, text } | { name, source, length } (text pulled by characters)
+//        | { name, json, arrays: [[key, source, length], ...] } (arrays appended after json's keys)
+const CHUNK_CHARS = 64 * 1024;
+const PULL_ITEMS = 256;
+const BLOB_FOLD_BYTES = 1024 * 1024;
+const ZIP_FLAG_DESCRIPTOR = 0x0008;
+const ZIP_FLAG_UTF8 = 0x0800;
+
+const CRC32_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let i = 0; i < 256; i += 1) {
+    let c = i;
+    for (let j = 0; j < 8; j += 1) {
+      c = (c & 1) ? (0xEDB88320 ^ (c >>> 1)) : (c >>> 1);
+    }
+    table[i] = c >>> 0;
+  }
+  return table;
+})();
+
+function crc32Update(crc, bytes) {
+  let c = crc ^ 0xFFFFFFFF;
+  for (let i = 0; i < bytes.length; i += 1) {
+    c = CRC32_TABLE[(c ^ bytes[i]) & 0xFF] ^ (c >>> 8);
+  }
+  return (c ^ 0xFFFFFFFF) >>> 0;
+}
+
+// Same output as JSON.stringify(value, null, 2), yielded piece by piece.
+function* jsonPieces(value, key, indent) {
+  if (value && typeof value.toJSON === "function") value = value.toJSON(key);
+  if (value === null || typeof value !== "object") {
+    yield JSON.stringify(value) ?? "null";
+    return;
+  }
+  const inner = `${indent}  `;
+  if (Array.isArray(value)) {
+    if (!value.length) {
+      yield "[]";
+      return;
+    }
+    yield "[";
+    for (let i = 0; i < value.length; i += 1) {
+      yield i ? `,\n${inner}` : `\n${inner}`;
+      const item = value[i];
+      if (isUnserializable(item)) yield "null";
+      else yield* jsonPieces(item, String(i), inner);
+    }
+    yield `\n${indent}]`;
+    return;
+  }
+  let first = true;
+  for (const k of Object.keys(value)) {
+    let item = value[k];
+    if (item && typeof item.toJSON === "function") item = item.toJSON(k);
+    if (isUnserializable(item)) continue;
+    yield `${first ? "{\n" : ",\n"}${inner}${JSON.stringify(k)}: `;
+    first = false;
+    yield* jsonPieces(item, k, inner);
+  }
+  yield first ? "{}" : `\n${indent}}`;
+}
+
+const pending = new Map();
+let pullSeq = 0;
+
+function pull(source, from, count) {
+  return new Promise((resolve) => {
+    pullSeq += 1;
+    pending.set(pullSeq, resolve);
+    self.postMessage({ type: "pull", id: pullSeq, source, from, count });
+  });
+}
+
+function isUnserializable(value) {
+  return typeof value === "undefined" || typeof value === "function" || typeof value === "symbol";
+}
+
+// JSON.stringify(value, null, 2) for the header object with each streamed array appended as a member.
+async function* jsonEntryPieces(entry) {
+  const arrays = entry.arrays || [];
+  if (!arrays.length) {
+    yield* jsonPieces(entry.json, "", "");
+    return;
+  }
+  let header = "";
+  for (const piece of jsonPieces(entry.json, "", "")) header += piece;
+  yield header === "{}" ? "{\n" : `${header.slice(0, -2)},\n`;
+  for (let a = 0; a < arrays.length; a += 1) {
+    const [key, source, length] = arrays[a];
+    yield `${a ? ",\n" : ""}  ${JSON.stringify(key)}: `;
+    let index = 0;
+    for (let from = 0; from < length; from += PULL_ITEMS) {
+      const items = await pull(source, from, PULL_ITEMS);
+      for (const item of items) {
+        yield index ? ",\n    " : "[\n    ";
+        if (isUnserializable(item)) yield "null";
+        else yield* jsonPieces(item, String(index), "    ");
+        index += 1;
+      }
+    }
+    yield index ? "\n  ]" : "[]";
+  }
+  yield "\n}";
+}
+
+async function* textChunks(entry) {
+  if ("source" in entry) {
+    let carry = "";
+    for (let from = 0; from < entry.length; from += CHUNK_CHARS) {
+      let text = carry + await pull(entry.source, from, CHUNK_CHARS);
+      carry = "";
+      // Hold back a trailing high surrogate; TextEncoder would emit U+FFFD for a split pair.
+      const code = text.charCodeAt(text.length - 1);
+      if (from + CHUNK_CHARS < entry.length && code >= 0xD800 && code <= 0xDBFF) {
+        carry = text.slice(-1);
+        text = text.slice(0, -1);
+      }
+      if (text) yield text;
+    }
+    if (carry) yield carry;
+    return;
+  }
+  if ("text" in entry) {
+    const text = String(entry.text || "");
+    let start = 0;
+    while (start < text.length) {
+      let end = Math.min(text.length, start + CHUNK_CHARS);
+      // Do not split a surrogate pair across chunks; TextEncoder would emit U+FFFD for each half.
+      const code = text.charCodeAt(end - 1);
+      if (end < text.length && code >= 0xD800 && code <= 0xDBFF) end += 1;
+      yield text.slice(start, end);
+      start = end;
+    }
+    return;
+  }
+  let buffered = "";
+  for await (const piece of jsonEntryPieces(entry)) {
+    buffered += piece;
+    if (buffered.length >= CHUNK_CHARS) {
+      yield buffered;
+      buffered = "";
+    }
+  }
+  if (buffered) yield buffered;
+}
+
+function toDosDateTime(date) {
+  const year = Math.max(1980, date.getFullYear());
+  const dosTime = (date.getHours() << 11) | (date.getMinutes() << 5) | Math.floor(date.getSeconds() / 2);
+  const dosDate = ((year - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate();
+  return { dosDate, dosTime };
+}
+
+// Blob parts are folded into one Blob every BLOB_FOLD_BYTES so the browser can move them out of the heap.
+function createBlobSink() {
+  let blob = new Blob([]);
+  let parts = [];
+  let partBytes = 0;
+  let offset = 0;
+  return {
+    get offset() {
+      return offset;
+    },
+    push(bytes) {
+      parts.push(bytes);
+      partBytes += bytes.length;
+      offset += bytes.length;
+      if (partBytes < BLOB_FOLD_BYTES) return;
+      blob = new Blob([blob, ...parts]);
+      parts = [];
+      partBytes = 0;
+    },
+    finish(type) {
+      return new Blob([blob, ...parts], { type });
+    }
+  };
+}
+
+async function writeEntry(sink, entry, deflate, stamp) {
+  const encoder = new TextEncoder();
+  const nameBytes = encoder.encode(entry.name);
+  const offset = sink.offset;
+  const method = deflate ? 8 : 0;
+  const flags = ZIP_FLAG_DESCRIPTOR | ZIP_FLAG_UTF8;
+
+  const local = new Uint8Array(30 + nameBytes.length);
+  const lview = new DataView(local.buffer);
+  lview.setUint32(0, 0x04034B50, true);
+  lview.setUint16(4, 20, true);
+  lview.setUint16(6, flags, true);
+  lview.setUint16(8, method, true);
+  lview.setUint16(10, stamp.dosTime, true);
+  lview.setUint16(12, stamp.dosDate, true);
+  // CRC and sizes (14..25) stay zero; they follow in the data descriptor.
+  lview.setUint16(26, nameBytes.length, true);
+  local.set(nameBytes, 30);
+  sink.push(local);
+
+  let crc = 0;
+  let size = 0;
+  let compressedSize = 0;
+  if (deflate) {
+    const stream = new CompressionStream("deflate-raw");
+    const writer = stream.writable.getWriter();
+    const reader = stream.readable.getReader();
+    const draining = (async () => {
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) return;
+        compressedSize += value.length;
+        sink.push(value);
+      }
+    })();
+    for await (const chunk of textChunks(entry)) {
+      const bytes = encoder.encode(chunk);
+      crc = crc32Update(crc, bytes);
+      size += bytes.length;
+      await writer.write(bytes);
+    }
+    await writer.close();
+    await draining;
+  } else {
+    for await (const chunk of textChunks(entry)) {
+      const bytes = encoder.encode(chunk);
+      crc = crc32Update(crc, bytes);
+      size += bytes.length;
+      sink.push(bytes);
+    }
+    compressedSize = size;
+  }
+
+  const descriptor = new Uint8Array(16);
+  const dview = new DataView(descriptor.buffer);
+  dview.setUint32(0, 0x08074B50, true);
+  dview.setUint32(4, crc, true);
+  dview.setUint32(8, compressedSize, true);
+  dview.setUint32(12, size, true);
+  sink.push(descriptor);
+
+  const central = new Uint8Array(46 + nameBytes.length);
+  const cview = new DataView(central.buffer);
+  cview.setUint32(0, 0x02014B50, true);
+  cview.setUint16(4, 20, true);
+  cview.setUint16(6, 20, true);
+  cview.setUint16(8, flags, true);
+  cview.setUint16(10, method, true);
+  cview.setUint16(12, stamp.dosTime, true);
+  cview.setUint16(14, stamp.dosDate, true);
+  cview.setUint32(16, crc, true);
+  cview.setUint32(20, compressedSize, true);
+  cview.setUint32(24, size, true);
+  cview.setUint16(28, nameBytes.length, true);
+  cview.setUint32(42, offset, true);
+  central.set(nameBytes, 46);
+  return central;
+}
+
+async function buildZip(entries) {
+  const sink = createBlobSink();
+  const deflate = typeof CompressionStream === "function";
+  const stamp = toDosDateTime(new Date());
+  const centrals = [];
+  for (const entry of entries) {
+    centrals.push(await writeEntry(sink, entry, deflate, stamp));
+  }
+  const centralOffset = sink.offset;
+  centrals.forEach((central) => sink.push(central));
+  const eocd = new Uint8Array(22);
+  const eview = new DataView(eocd.buffer);
+  eview.setUint32(0, 0x06054B50, true);
+  eview.setUint16(8, entries.length, true);
+  eview.setUint16(10, entries.length, true);
+  eview.setUint32(12, sink.offset - centralOffset, true);
+  eview.setUint32(16, centralOffset, true);
+  sink.push(eocd);
+  return { blob: sink.finish("application/zip"), deflate };
+}
+
+self.addEventListener("message", async (event) => {
+  const data = event.data || {};
+  if (data.type === "slice") {
+    const resolve = pending.get(data.id);
+    pending.delete(data.id);
+    resolve?.(data.items);
+    return;
+  }
+  if (data.type !== "build") return;
+  try {
+    const { blob, deflate } = await buildZip(data.entries || []);
+    self.postMessage({ ok: true, blob, deflate });
+  } catch (error) {
+    self.postMessage({ ok: false, error: String(error?.message || error) });
+  }
+});
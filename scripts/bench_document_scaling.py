@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from playwright.sync_api import Browser, Error as PlaywrightError, sync_playwright
+
+VIEWPORT = {"width": 1100, "height": 700}
+OPERATIONS = ("pushUndoSnapshot", "getCaretCoordinates", "refreshMatches", "replaceAll")
+DEFAULT_SIZES = "10K,100K,1M,10M"
+
+# Builds a meeting-transcript-like document of ~targetBytes (UTF-8) in the page and
+# times each hot path on its own through __KOEDEAM_TEST__.hotPaths. Setup work
+# (resetting the editor value, search fields, caret, caret geometry cache) is outside
+# the timed region. refreshMatches scans in time-sliced steps, so it is timed until
+# the find-complete signal rather than until the call returns.
+MEASURE_JS = r"""
+async ({ targetBytes, reps, budgetMs, query, replacement, ops }) => {
+  const bridge = window.__KOEDEAM_TEST__;
+  const hot = bridge?.hotPaths;
+  if (!hot) throw new Error('hotPaths missing: open the app with ?testMode=1');
+  const ta = document.getElementById('editor');
+  const findQuery = document.getElementById('findQuery');
+  const replaceQuery = document.getElementById('replaceQuery');
+  const enc = new TextEncoder();
+  const units = [
+    '本日の議題は予算の見直しと来期の採用計画です。担当者から現状の説明がありました。\n',
+    '議題1について、広告費を一割削減し、その分を検証環境の整備に回す案が出ました。\n',
+    'memo: action item #12 -> follow up by Friday (owner: sato)\n\n',
+    'これは長い会議の文字起こしを想定した段落です。音声入力で追記された文章が続きます。\n',
+    '――\n',
+    '次の議題に移ります。質疑応答では、スケジュールの前倒しが可能かどうかが論点になりました。\n\n'
+  ];
+  const unitBytes = units.map((u) => enc.encode(u).length);
+  const parts = [];
+  let bytes = 0;
+  for (let i = 0; bytes < targetBytes; i += 1) {
+    parts.push(units[i % units.length]);
+    bytes += unitBytes[i % units.length];
+  }
+  const doc = parts.join('');
+  const tick = () => new Promise((resolve) => setTimeout(resolve, 0));
+  const setups = {
+    pushUndoSnapshot: (r) => {
+      // Same length, different tail: the snapshot equality check has to scan the whole value.
+      ta.value = `${doc.slice(0, -1)}${r % 2 ? 'あ' : 'い'}`;
+    },
+    getCaretCoordinates: () => {
+      if (ta.value !== doc) ta.value = doc;
+      ta.setSelectionRange(doc.length, doc.length);
+      // Every rep measures from a cold paragraph cache, like the first caret move after a document load.
+      hot.invalidateCaretGeometry();
+    },
+    refreshMatches: () => {
+      if (ta.value !== doc) ta.value = doc;
+      findQuery.value = query;
+    },
+    replaceAll: () => {
+      ta.value = doc;
+      findQuery.value = query;
+      replaceQuery.value = replacement;
+    }
+  };
+  const runs = {
+    pushUndoSnapshot: () => hot.pushUndoSnapshot('bench'),
+    getCaretCoordinates: () => hot.getCaretCoordinates(doc.length),
+    refreshMatches: async (t0) => {
+      const since = bridge.signalSeq;
+      hot.refreshMatches();
+      const done = await bridge.waitForSignal('find-complete', { since, timeoutMs: 120000 });
+      return done.at - t0;
+    },
+    replaceAll: () => hot.replaceAll(false)
+  };
+  const out = { bytes, chars: doc.length, ops: {} };
+  for (const name of ops) {
+    const samples = [];
+    let spent = 0;
+    for (let r = 0; r < reps; r += 1) {
+      setups[name](r);
+      await tick();
+      const t0 = performance.now();
+      const result = runs[name](t0);
+      const dt = result instanceof Promise ? await result : performance.now() - t0;
+      samples.push(dt);
+      spent += dt;
+      if (spent > budgetMs) break;
+    }
+    out.ops[name] = samples;
+  }
+  out.matches = (document.getElementById('findStatus')?.textContent || '').trim();
+  return out;
+}
+"""
+
+
+def parse_size(value: str) -> int:
+    text = value.strip().upper().rstrip("B")
+    scale = {"K": 1024, "M": 1024 * 1024}.get(text[-1:], 1)
+    number = text[:-1] if scale > 1 else text
+    return int(float(number) * scale)
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def fit_exponent(points: List[Tuple[float, float]]) -> Optional[float]:
+    """Least-squares slope of log(time) over log(size): ~1 linear, >1 super-linear."""
+    usable = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(usable) < 2:
+        return None
+    mean_x = sum(x for x, _ in usable) / len(usable)
+    mean_y = sum(y for _, y in usable) / len(usable)
+    var_x = sum((x - mean_x) ** 2 for x, _ in usable)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in usable) / var_x
+
+
+def measure_size(
+    browser: Browser, base_url: str, target_bytes: int, reps: int, budget_ms: float, ops: List[str]
+) -> Dict[str, object]:
+    # Fresh context per size so earlier documents, undo stacks and storage writes do not carry over.
+    context = browser.new_context(viewport=VIEWPORT)
+    try:
+        page = context.new_page()
+        page.goto(f"{base_url}?testMode=1", wait_until="networkidle")
+        return page.evaluate(
+            MEASURE_JS,
+            {
+                "targetBytes": target_bytes,
+                "reps": reps,
+                "budgetMs": budget_ms,
+                "query": "議題",
+                "replacement": "論点",
+                "ops": ops,
+            },
+        )
+    finally:
+        context.close()
+
+
+def run(
+    base_url: str,
+    sizes: List[int],
+    ops: List[str],
+    reps: int,
+    budget_ms: float,
+    max_exponent: float,
+    output_path: Optional[Path],
+) -> int:
+    started = time.perf_counter()
+    rows: List[Dict[str, object]] = []
+    failures: List[str] = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for size in sizes:
+                try:
+                    rows.append(measure_size(browser, base_url, size, reps, budget_ms, ops))
+                except PlaywrightError as exc:
+                    failures.append(f"{size} bytes: {str(exc).splitlines()[0]}")
+        finally:
+            browser.close()
+
+    curves: Dict[str, Dict[str, object]] = {}
+    for name in ops:
+        points = [
+            (float(row["bytes"]), median(row["ops"][name]))  # type: ignore[index]
+            for row in rows
+            if row["ops"].get(name)  # type: ignore[union-attr]
+        ]
+        exponent = fit_exponent(points)
+        curves[name] = {
+            "points": [{"bytes": int(x), "median_ms": round(y, 3)} for x, y in points],
+            "exponent": round(exponent, 3) if exponent is not None else None,
+        }
+        if exponent is not None and exponent > max_exponent:
+            failures.append(f"{name}: time grows as size^{exponent:.2f} (limit {max_exponent:.2f})")
+
+    print("== Document Scaling Benchmark ==")
+    print(f"Base URL: {base_url}")
+    print(f"Sizes: {', '.join(str(int(row['bytes'])) for row in rows)} bytes ({reps} reps, {budget_ms:.0f}ms budget per op)")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    for name, curve in curves.items():
+        series = "  ".join(f"{point['bytes'] // 1024}K:{point['median_ms']:.2f}" for point in curve["points"])  # type: ignore[union-attr]
+        exponent = curve["exponent"]
+        shape = "n/a" if exponent is None else f"~size^{exponent:.2f}"
+        print(f"{name:<20} {shape:<12} {series} (ms)")
+    report = {
+        "url": base_url,
+        "sizes": [{"bytes": row["bytes"], "chars": row["chars"], "matches": row["matches"]} for row in rows],
+        "curves": curves,
+        "samples": {str(row["bytes"]): row["ops"] for row in rows},
+    }
+    if output_path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report: {output_path}")
+    if failures:
+        print("")
+        print("Failures:")
+        for item in failures:
+            print(f"- {item}")
+        return 1
+    print("PASS: all hot paths within the scaling limit")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time search/replace/undo/caret hot paths against document size")
+    parser.add_argument("--url", default="http://localhost:8000/app/", help="App URL to test")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Document sizes in UTF-8 bytes (K/M suffixes)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help=f"Operations to time ({','.join(OPERATIONS)})")
+    parser.add_argument("--reps", type=int, default=5, help="Timed repetitions per operation and size")
+    parser.add_argument("--budget-ms", type=float, default=10000, help="Stop repeating an operation after this much time")
+    parser.add_argument(
+        "--max-exponent",
+        type=float,
+        default=1.3,
+        help="Fail when a fitted exponent exceeds this (1.0 = linear)",
+    )
+    parser.add_argument("--output", default="artifacts/bench/document_scaling.json", help="Where to write the report")
+    args = parser.parse_args()
+
+    ops = [item.strip() for item in args.ops.split(",") if item.strip()]
+    unknown = [item for item in ops if item not in OPERATIONS]
+    if unknown:
+        print(f"ERROR: unknown operation: {', '.join(unknown)}")
+        return 2
+    try:
+        sizes = sorted(parse_size(item) for item in args.sizes.split(",") if item.strip())
+    except ValueError:
+        print(f"ERROR: --sizes must look like 10K,1M: {args.sizes}")
+        return 2
+    return run(
+        args.url,
+        sizes,
+        ops,
+        max(1, args.reps),
+        max(1.0, args.budget_ms),
+        args.max_exponent,
+        Path(args.output) if args.output else None,
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
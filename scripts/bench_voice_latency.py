@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.sync_api import Browser, Error as PlaywrightError, Page, sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+VIEWPORT = {"width": 1100, "height": 700}
+INSERT_MODES = ("cursor", "append")
+PERCENTILES = ("p50", "p95", "p99")
+FILLER = "今日は会議の議事録を音声で入力しています。次の議題は予算の見直しです。\n"
+PHRASES = ("了解しました", "次の項目に進みます", "担当者は来週までに確認します", "以上です")
+
+# Candidate profiles that reach the editor without waiting for a user choice.
+# A queued candidate panel waits idleMs or a tap, so it is not an emit->commit path.
+CANDIDATE_PROFILES: Dict[str, Dict[str, object]] = {
+    "single": {"settings": {}, "confidences": [0.9]},
+    "ranked": {"settings": {}, "confidences": [0.9, 0.6, 0.4]},
+    "tools-off": {"settings": {"advancedTools": {"candidate": False}}, "confidences": [0.3, 0.2, 0.1]},
+}
+
+COLLECT_COMMITS_JS = """() => {
+  window.__benchCommits = [];
+  window.__KOEDEAM_TEST__.onSignal((entry) => {
+    if (entry.name === 'voice-committed') window.__benchCommits.push(entry.at);
+  });
+}"""
+
+
+def signal_mark(page: Page) -> int:
+    return int(page.evaluate("() => window.__KOEDEAM_TEST__?.signalSeq || 0"))
+
+
+def wait_voice_off(page: Page, since: int, timeout_ms: int = 15000) -> None:
+    try:
+        page.evaluate(
+            "([since, timeoutMs]) => window.__KOEDEAM_TEST__.waitForSignal('voice-state', { since, detail: { input: 'VOICE_OFF' }, timeoutMs })",
+            [since, timeout_ms],
+        )
+    except PlaywrightError as exc:
+        if "signal timeout" in str(exc):
+            raise PlaywrightTimeoutError(f"VOICE_OFF not seen within {timeout_ms}ms") from exc
+        raise
+
+
+def filler_text(size: int) -> str:
+    return (FILLER * (size // len(FILLER) + 1))[:size]
+
+
+def session_events(results: int, confidences: List[float]) -> List[Dict[str, object]]:
+    events: List[Dict[str, object]] = [{"type": "start", "atMs": 0}]
+    for i in range(results):
+        phrase = PHRASES[i % len(PHRASES)]
+        alternatives = [{"transcript": f"{phrase}{i}-{rank}", "confidence": c} for rank, c in enumerate(confidences)]
+        events.append({"type": "result", "atMs": 100 + i * 50, "results": [{"isFinal": True, "alternatives": alternatives}]})
+    events.append({"type": "end", "atMs": 100 + results * 50 + 100})
+    return events
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (same definition as numpy's default)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100.0
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(samples),
+        **{name: round(percentile(samples, float(name[1:])), 3) for name in PERCENTILES},
+        "max": round(max(samples), 3) if samples else 0.0,
+    }
+
+
+def run_config(
+    browser: Browser,
+    base_url: str,
+    mode: str,
+    size: int,
+    profile: str,
+    sessions: int,
+    results: int,
+    warmup: int,
+) -> Dict[str, object]:
+    spec = CANDIDATE_PROFILES[profile]
+    settings = {"voiceInsertMode": mode, "voiceStartTone": False, **spec["settings"]}  # type: ignore[dict-item]
+    events = session_events(results, spec["confidences"])  # type: ignore[arg-type]
+    seed = json.dumps(
+        {"bridge": {"replayEvents": events}, "settings": settings, "draft": filler_text(size)},
+        ensure_ascii=False,
+    )
+    context = browser.new_context(viewport=VIEWPORT)
+    context.add_init_script(
+        f"""(() => {{
+          const seed = {seed};
+          window.__KOEDEAM_TEST__ = seed.bridge;
+          localStorage.setItem('koedeam.settings', JSON.stringify(seed.settings));
+          localStorage.setItem('koedeam.currentDraft', seed.draft);
+        }})();"""
+    )
+    samples: List[float] = []
+    failures: List[str] = []
+    try:
+        page = context.new_page()
+        page.goto(f"{base_url}?testMode=1&voiceEngine=replay&replayMode=fast", wait_until="networkidle")
+        loaded = int(page.evaluate("() => document.getElementById('editor').value.length"))
+        if loaded != size:
+            failures.append(f"document size {loaded} != {size} after load")
+        page.evaluate(
+            """() => {
+              const ta = document.getElementById('editor');
+              ta.focus();
+              ta.setSelectionRange(ta.value.length, ta.value.length);
+            }"""
+        )
+        page.evaluate(COLLECT_COMMITS_JS)
+        for index in range(warmup + sessions):
+            page.evaluate("() => { window.__benchCommits.length = 0; }")
+            mark = signal_mark(page)
+            page.click("#btnMic")
+            wait_voice_off(page, mark)
+            pairs = page.evaluate(
+                """() => ({
+                  emits: (window.__KOEDEAM_TEST__.replayEmitLog || []).filter((e) => e.type === 'result').map((e) => e.at),
+                  commits: window.__benchCommits.slice()
+                })"""
+            )
+            if len(pairs["emits"]) != len(pairs["commits"]):
+                failures.append(f"session {index}: {len(pairs['emits'])} result emits but {len(pairs['commits'])} commits")
+                continue
+            if index >= warmup:
+                samples.extend(float(c) - float(e) for e, c in zip(pairs["emits"], pairs["commits"]))
+    except PlaywrightError as exc:
+        failures.append(str(exc).splitlines()[0])
+    finally:
+        context.close()
+    return {"mode": mode, "size": size, "candidates": profile, **summarize(samples), "failures": failures}
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("results", {}) if isinstance(data, dict) else {}
+
+
+def compare(
+    results: Dict[str, Dict[str, object]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_delta_ms: float,
+) -> List[str]:
+    """A percentile regresses when it exceeds baseline * (1 + threshold) by at least min_delta_ms."""
+    regressions: List[str] = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for name in PERCENTILES:
+            before = float(base.get(name, 0.0))
+            after = float(current[name])  # type: ignore[arg-type]
+            if after > before * (1.0 + threshold) and after - before >= min_delta_ms:
+                regressions.append(f"{key}: {name} {before:.2f}ms -> {after:.2f}ms (+{(after / before - 1) * 100 if before else 0:.0f}%)")
+    return regressions
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def run(
+    base_url: str,
+    modes: List[str],
+    sizes: List[int],
+    profiles: List[str],
+    sessions: int,
+    results_per_session: int,
+    warmup: int,
+    baseline_path: Path,
+    output_path: Optional[Path],
+    threshold: float,
+    min_delta_ms: float,
+    update_baseline: bool,
+) -> int:
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, object]] = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for mode in modes:
+                for size in sizes:
+                    for profile in profiles:
+                        key = f"{mode}/{size}/{profile}"
+                        results[key] = run_config(browser, base_url, mode, size, profile, sessions, results_per_session, warmup)
+        finally:
+            browser.close()
+
+    failures = [f"{key}: {item}" for key, entry in results.items() for item in entry["failures"]]  # type: ignore[union-attr]
+    baseline = load_baseline(baseline_path)
+    regressions = compare(results, baseline, threshold, min_delta_ms) if baseline and not update_baseline else []
+
+    print("== Voice-to-Editor Latency Benchmark ==")
+    print(f"Base URL: {base_url}")
+    print(f"Configs: {len(results)} ({sessions} sessions x {results_per_session} finals, {warmup} warmup)")
+    print(f"Baseline: {baseline_path} ({'loaded' if baseline else 'missing'}, threshold +{threshold * 100:.0f}% / {min_delta_ms}ms)")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    for key, entry in results.items():
+        base = baseline.get(key, {})
+        delta = f"  (baseline p95 {float(base['p95']):.2f})" if "p95" in base else ""
+        print(
+            f"{key:<28} n={entry['n']:<4} p50={entry['p50']:>8.2f}  p95={entry['p95']:>8.2f}  "
+            f"p99={entry['p99']:>8.2f} ms{delta}"
+        )
+    report = {
+        "url": base_url,
+        "sessions": sessions,
+        "results_per_session": results_per_session,
+        "results": {key: {k: v for k, v in entry.items() if k != "failures"} for key, entry in results.items()},
+    }
+    if output_path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report: {output_path}")
+    if update_baseline and not failures:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline updated: {baseline_path}")
+    if failures or regressions:
+        print("")
+        print("Failures:")
+        for item in failures + regressions:
+            print(f"- {item}")
+        return 1
+    print("PASS: no latency regressions")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay-driven voice result -> editor commit latency benchmark")
+    parser.add_argument("--url", default="http://localhost:8000/app/", help="App URL to test")
+    parser.add_argument("--modes", default=",".join(INSERT_MODES), help="Voice insert modes (cursor,append)")
+    parser.add_argument("--sizes", default="0,10000,100000", help="Document sizes in characters")
+    parser.add_argument(
+        "--candidates",
+        default=",".join(CANDIDATE_PROFILES),
+        help=f"Candidate profiles ({','.join(CANDIDATE_PROFILES)})",
+    )
+    parser.add_argument("--sessions", type=int, default=5, help="Measured replay sessions per config")
+    parser.add_argument("--results", type=int, default=40, help="Final results per session")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured sessions per config")
+    parser.add_argument(
+        "--baseline",
+        default="artifacts/bench/voice_latency_baseline.json",
+        help="Baseline JSON to compare with (written by --update-baseline)",
+    )
+    parser.add_argument("--output", default="artifacts/bench/voice_latency.json", help="Where to write this run's report")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative increase per percentile")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore increases smaller than this")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    modes = parse_list(args.modes)
+    profiles = parse_list(args.candidates)
+    unknown = [m for m in modes if m not in INSERT_MODES] + [c for c in profiles if c not in CANDIDATE_PROFILES]
+    if unknown:
+        print(f"ERROR: unknown mode/candidate profile: {', '.join(unknown)}")
+        return 2
+    try:
+        sizes = [max(0, int(v)) for v in parse_list(args.sizes)]
+    except ValueError:
+        print(f"ERROR: --sizes must be integers: {args.sizes}")
+        return 2
+    return run(
+        args.url,
+        modes,
+        sizes,
+        profiles,
+        max(1, args.sessions),
+        max(1, args.results),
+        max(0, args.warmup),
+        Path(args.baseline),
+        Path(args.output) if args.output else None,
+        max(0.0, args.threshold),
+        max(0.0, args.min_delta_ms),
+        args.update_baseline,
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
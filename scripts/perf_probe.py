@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from playwright.sync_api import CDPSession, Error as PlaywrightError, Page
+
+# Per-check browser performance probe shared by local_ui_checks.py and
+# playwright_replay_checks.py: CDP Performance.getMetrics deltas, long tasks
+# (>50ms, PerformanceObserver) and forced layouts.
+#
+# A forced layout is counted when a geometry read (offsetTop, clientWidth,
+# getBoundingClientRect, ...) happens while DOM mutations are still pending in
+# the same frame, i.e. the read has to flush style/layout synchronously. Value
+# changes of form controls are not DOM mutations, so this is a lower bound.
+
+CDP_METRICS = (
+    "ScriptDuration",
+    "TaskDuration",
+    "LayoutCount",
+    "LayoutDuration",
+    "RecalcStyleCount",
+    "RecalcStyleDuration",
+    "JSHeapUsedSize",
+)
+
+PERF_INIT = r"""
+(() => {
+  if (window.__koedeamPerf) return;
+  const perf = { longTasks: 0, longTaskMs: 0, longTaskMaxMs: 0, layoutReads: 0, forcedLayouts: 0 };
+  window.__koedeamPerf = perf;
+  try {
+    new PerformanceObserver((list) => {
+      list.getEntries().forEach((entry) => {
+        perf.longTasks += 1;
+        perf.longTaskMs += entry.duration;
+        perf.longTaskMaxMs = Math.max(perf.longTaskMaxMs, entry.duration);
+      });
+    }).observe({ type: 'longtask', buffered: true });
+  } catch {}
+  let dirty = false;
+  const observer = new MutationObserver(() => { dirty = true; });
+  const startObserving = () => observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+  if (document.documentElement) startObserving();
+  else document.addEventListener('readystatechange', startObserving, { once: true });
+  const frame = () => {
+    observer.takeRecords();
+    dirty = false;
+    requestAnimationFrame(frame);
+  };
+  requestAnimationFrame(frame);
+  const onRead = () => {
+    perf.layoutReads += 1;
+    if (dirty || observer.takeRecords().length) {
+      perf.forcedLayouts += 1;
+      dirty = false;
+    }
+  };
+  const wrapGetter = (proto, name) => {
+    const desc = Object.getOwnPropertyDescriptor(proto, name);
+    if (!desc?.get) return;
+    Object.defineProperty(proto, name, {
+      ...desc,
+      get() {
+        onRead();
+        return desc.get.call(this);
+      }
+    });
+  };
+  const wrapMethod = (proto, name) => {
+    const original = proto[name];
+    if (typeof original !== 'function') return;
+    proto[name] = function (...args) {
+      onRead();
+      return original.apply(this, args);
+    };
+  };
+  ['offsetTop', 'offsetLeft', 'offsetWidth', 'offsetHeight', 'offsetParent'].forEach((n) => wrapGetter(HTMLElement.prototype, n));
+  ['clientTop', 'clientLeft', 'clientWidth', 'clientHeight', 'scrollWidth', 'scrollHeight', 'scrollTop', 'scrollLeft']
+    .forEach((n) => wrapGetter(Element.prototype, n));
+  ['getBoundingClientRect', 'getClientRects'].forEach((n) => wrapMethod(Element.prototype, n));
+})();
+"""
+
+READ_PAGE_PERF_JS = """() => ({
+  timeOrigin: performance.timeOrigin,
+  ...(window.__koedeamPerf || {})
+})"""
+
+
+def read_cdp(session: CDPSession) -> Dict[str, float]:
+    metrics = session.send("Performance.getMetrics").get("metrics", [])
+    return {item["name"]: float(item["value"]) for item in metrics if item["name"] in CDP_METRICS}
+
+
+def start_probe(page: Page) -> Optional[Dict[str, object]]:
+    """Baseline taken after page load; PERF_INIT must already be an init script of the page."""
+    try:
+        session = page.context.new_cdp_session(page)
+        session.send("Performance.enable")
+        return {"session": session, "cdp": read_cdp(session), "page": page.evaluate(READ_PAGE_PERF_JS)}
+    except PlaywrightError:
+        return None
+
+
+def finish_probe(page: Page, probe: Optional[Dict[str, object]]) -> Dict[str, object]:
+    """Deltas since start_probe(); ``navigated`` means in-page counters restarted mid-check."""
+    if probe is None:
+        return {"available": False}
+    try:
+        cdp_after = read_cdp(probe["session"])  # type: ignore[arg-type]
+        page_after = page.evaluate(READ_PAGE_PERF_JS)
+    except PlaywrightError:
+        return {"available": False}
+    cdp_before: Dict[str, float] = probe["cdp"]  # type: ignore[assignment]
+    page_before: Dict[str, float] = probe["page"]  # type: ignore[assignment]
+    navigated = page_after.get("timeOrigin") != page_before.get("timeOrigin")
+    delta: Dict[str, object] = {"available": True, "navigated": navigated}
+    for name in CDP_METRICS:
+        value = cdp_after.get(name, 0.0) - cdp_before.get(name, 0.0)
+        # Durations come back in seconds; report milliseconds like the rest of the harness.
+        delta[name] = round(value * 1000, 2) if name.endswith("Duration") else int(value)
+    delta["JSHeapUsedSizeEnd"] = int(cdp_after.get("JSHeapUsedSize", 0.0))
+    for name in ("longTasks", "longTaskMs", "layoutReads", "forcedLayouts"):
+        before = 0.0 if navigated else float(page_before.get(name, 0) or 0)
+        value = float(page_after.get(name, 0) or 0) - before
+        delta[name] = round(value, 1) if name.endswith("Ms") else int(value)
+    delta["longTaskMaxMs"] = round(float(page_after.get("longTaskMaxMs", 0) or 0), 1)
+    return delta
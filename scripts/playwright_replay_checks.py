@@ -1,24 +1,156 @@
 from __future__ import annotations
 
 import argparse
+import glob
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import Browser, Error as PlaywrightError, Page, sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+from perf_probe import PERF_INIT, finish_probe, read_cdp, start_probe
+from replay_corpus import ReplayCorpus
+
+VIEWPORT = {"width": 1100, "height": 700}
+TRACE_POLICIES = ("off", "on", "retain-on-failure")
+# instant dispatches the whole event list without timers; use it for correctness-only runs.
+REPLAY_MODES = ("realtime", "fast", "instant")
+
+# Errors that fail one fixture (or one command suite) without taking down the worker.
+CASE_ERRORS = (RuntimeError, PlaywrightError, OSError, ValueError, KeyError)
+
+# Per-process tracing cost; run_fixture reports the delta for each fixture.
+TRACE_STATS: Dict[str, float] = {"seconds": 0.0, "files": 0, "bytes": 0, "discarded_files": 0, "discarded_bytes": 0}
+
+
+@contextmanager
+def case_page(
+    browser: Browser, trace_path: Optional[Path], bridge: Optional[Dict[str, object]] = None, perf: bool = False
+) -> Iterator[Page]:
+    """Open an isolated context on a shared browser for one replay case.
+
+    Every context starts with empty storage and no service worker registration,
+    so cases stay as deterministic as a fresh browser launch. Tracing is skipped
+    when ``trace_path`` is None; ``perf`` installs the perf_probe page hooks.
+    """
+    context = browser.new_context(viewport=VIEWPORT)
+    if perf:
+        context.add_init_script(PERF_INIT)
+    if bridge is not None:
+        bridge_json = json.dumps(bridge, ensure_ascii=False)
+        context.add_init_script(f"window.__KOEDEAM_TEST__ = {bridge_json};")
+    if trace_path is not None:
+        started = time.perf_counter()
+        context.tracing.start(screenshots=True, snapshots=True, sources=True)
+        TRACE_STATS["seconds"] += time.perf_counter() - started
+    try:
+        yield context.new_page()
+    finally:
+        if trace_path is not None:
+            started = time.perf_counter()
+            context.tracing.stop(path=str(trace_path))
+            TRACE_STATS["seconds"] += time.perf_counter() - started
+            TRACE_STATS["files"] += 1
+            TRACE_STATS["bytes"] += trace_path.stat().st_size if trace_path.exists() else 0
+        context.close()
+
+
+def discard_traces(paths: List[Path]) -> None:
+    for path in paths:
+        if not path.exists():
+            continue
+        TRACE_STATS["discarded_files"] += 1
+        TRACE_STATS["discarded_bytes"] += path.stat().st_size
+        path.unlink()
+
+
+def trace_totals(items: List[Dict[str, float]]) -> Dict[str, object]:
+    totals = {key: sum(float(item.get(key, 0)) for item in items) for key in TRACE_STATS}
+    return {
+        "seconds": round(totals["seconds"], 3),
+        "files": int(totals["files"]),
+        "bytes": int(totals["bytes"]),
+        "kept_files": int(totals["files"] - totals["discarded_files"]),
+        "kept_bytes": int(totals["bytes"] - totals["discarded_bytes"]),
+    }
+
+
+VOICE_OFF_JS = "() => (document.getElementById('statusInput')?.textContent || '').includes('VOICE:OFF')"
+
+
+def signal_mark(page) -> int:
+    """Current signal sequence number; pass it to wait_signal to only accept later signals."""
+    return int(page.evaluate("() => window.__KOEDEAM_TEST__?.signalSeq || 0"))
 
-def wait_voice_off(page, timeout_ms: int = 8000) -> None:
-    page.wait_for_function(
-        "() => (document.getElementById('statusInput')?.textContent || '').includes('VOICE:OFF')",
-        timeout=timeout_ms,
-    )
+
+def wait_signal(page, name: str, since: int, detail: Optional[Dict[str, object]] = None, timeout_ms: int = 5000) -> None:
+    try:
+        page.evaluate(
+            "([name, since, detail, timeoutMs]) => window.__KOEDEAM_TEST__.waitForSignal(name, { since, detail, timeoutMs })",
+            [name, since, detail or {}, timeout_ms],
+        )
+    except PlaywrightError as exc:
+        if "signal timeout" in str(exc):
+            raise PlaywrightTimeoutError(f"signal '{name}' {detail or {}} not seen within {timeout_ms}ms") from exc
+        raise
+
+
+def wait_voice_off(page, since: Optional[int] = None, timeout_ms: int = 8000) -> None:
+    if since is None:
+        page.wait_for_function(VOICE_OFF_JS, timeout=timeout_ms)
+        return
+    wait_signal(page, "voice-state", since, {"input": "VOICE_OFF"}, timeout_ms)
+
+
+def click_mic(page) -> int:
+    """Toggle the mic and return the signal mark taken just before the click."""
+    mark = signal_mark(page)
+    page.click("#btnMic")
+    return mark
+
+
+# Where the replay session stands after signal ``since``: "idle" until a voice-state other than VOICE_OFF,
+# then "running" until a later VOICE_OFF.
+VOICE_PHASE_JS = """(since) => {
+  let phase = 'idle';
+  for (const entry of window.__KOEDEAM_TEST__?.signalLog || []) {
+    if (entry.seq <= since || entry.name !== 'voice-state') continue;
+    if (entry.detail?.input !== 'VOICE_OFF') phase = 'running';
+    else if (phase === 'running') return 'done';
+  }
+  return phase;
+}"""
+
+
+def advance_until_voice_off(page, since: int, budget_ms: int, step_ms: int = 250) -> None:
+    """Drive the installed page clock until the replay started after ``since`` has started and stopped again.
+
+    The mic click leaves input at VOICE_OFF until the replay ``start`` event fires on the fake clock,
+    so VOICE_OFF alone says nothing about whether the replay ran.
+    """
+    elapsed = 0
+    while page.evaluate(VOICE_PHASE_JS, since) != "done":
+        if elapsed >= budget_ms:
+            raise PlaywrightTimeoutError(f"voice did not start and stop within {budget_ms}ms of virtual time")
+        page.clock.run_for(step_ms)
+        elapsed += step_ms
+
+
+def replay_span_ms(events: List[Dict[str, object]]) -> int:
+    marks = [int(item.get("atMs", 0) or 0) for item in events if isinstance(item, dict)]
+    return max(marks) - min(marks) if marks else 0
 
 
 def set_voice_mode(page, value: str) -> None:
+    mark = signal_mark(page)
     page.click("#btnMenu")
     page.click("button[data-menu='settings']")
-    page.wait_for_timeout(80)
+    wait_signal(page, "dialog", mark, {"id": "dlgSettings", "open": True})
+    mark = signal_mark(page)
     page.evaluate(
         """(mode) => {
           document.querySelector("#dlgSettings .tab-btn[data-tab='voice']")?.click();
@@ -27,7 +159,7 @@ def set_voice_mode(page, value: str) -> None:
         }""",
         value,
     )
-    page.wait_for_timeout(80)
+    wait_signal(page, "dialog", mark, {"id": "dlgSettings", "open": False})
 
 
 def set_replay_events(page, events: List[Dict[str, object]]) -> None:
@@ -39,16 +171,15 @@ def set_replay_events(page, events: List[Dict[str, object]]) -> None:
     )
 
 
-def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[str, object], List[str]]:
+def run_command_suite(
+    browser: Browser, base_url: str, mode: str, trace_path: Optional[Path], perf: bool = False
+) -> Tuple[Dict[str, object], List[str]]:
     report: Dict[str, object] = {}
     failures: List[str] = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1100, "height": 700})
-        context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        page = context.new_page()
+    with case_page(browser, trace_path, perf=perf) as page:
         url = f"{base_url}?testMode=1&voiceEngine=replay&replayMode={mode}"
         page.goto(url, wait_until="networkidle")
+        probe = start_probe(page) if perf else None
 
         set_voice_mode(page, "command")
 
@@ -69,9 +200,9 @@ def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[
                 {"type": "end", "atMs": 220},
             ],
         )
-        page.click("#btnMic")
+        mark = click_mic(page)
         try:
-            wait_voice_off(page)
+            wait_voice_off(page, mark)
         except PlaywrightTimeoutError as exc:
             failures.append(f"{mode}: command line delete replay did not complete: {exc}")
         command_delete_value = page.evaluate("() => document.getElementById('editor')?.value || ''")
@@ -96,8 +227,12 @@ def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[
                 {"type": "end", "atMs": 260},
             ],
         )
-        page.click("#btnMic")
-        page.wait_for_timeout(500)
+        mark = click_mic(page)
+        try:
+            wait_voice_off(page, mark)
+            wait_signal(page, "dialog", mark, {"id": "dlgSearch", "open": True})
+        except PlaywrightTimeoutError as exc:
+            failures.append(f"{mode}: command search replay did not complete: {exc}")
         command_search_state = page.evaluate(
             """() => ({
               searchOpen: !!document.getElementById('dlgSearch')?.open,
@@ -113,8 +248,9 @@ def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[
         if "VOICE:OFF" not in command_search_state["statusInput"]:
             failures.append(f"{mode}: command search did not end with VOICE:OFF")
         if command_search_state["searchOpen"]:
+            mark = signal_mark(page)
             page.click("#btnCloseSearch")
-            page.wait_for_timeout(80)
+            wait_signal(page, "dialog", mark, {"id": "dlgSearch", "open": False})
 
         # 3) mode-exit command
         set_voice_mode(page, "command")
@@ -126,8 +262,11 @@ def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[
                 {"type": "end", "atMs": 260},
             ],
         )
-        page.click("#btnMic")
-        page.wait_for_timeout(500)
+        mark = click_mic(page)
+        try:
+            wait_voice_off(page, mark)
+        except PlaywrightTimeoutError as exc:
+            failures.append(f"{mode}: command stop replay did not complete: {exc}")
         command_stop_state = page.evaluate(
             """() => ({
               cursorChecked: !!document.querySelector("input[name='voiceMode'][value='cursor']")?.checked,
@@ -137,22 +276,30 @@ def run_command_suite(base_url: str, mode: str, trace_path: Path) -> Tuple[Dict[
         report["command_stop_mode"] = command_stop_state
         if not command_stop_state["cursorChecked"] and "カーソル" not in command_stop_state["buttonLabel"]:
             failures.append(f"{mode}: command stop did not leave command mode")
-
-        context.tracing.stop(path=str(trace_path))
-        browser.close()
+        if perf:
+            report["perf"] = finish_probe(page, probe)
     return report, failures
 
 
-def run_case(base_url: str, fixture: Dict[str, object], mode: str, trace_path: Path) -> str:
-    bridge_json = json.dumps({"replayEvents": fixture.get("events", [])}, ensure_ascii=False)
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1100, "height": 700})
-        context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        page = context.new_page()
-        page.add_init_script(f"window.__KOEDEAM_TEST__ = {bridge_json};")
+def run_case(
+    browser: Browser,
+    base_url: str,
+    fixture: Dict[str, object],
+    mode: str,
+    trace_path: Optional[Path],
+    clock: str = "virtual",
+    perf: bool = False,
+) -> Tuple[str, Dict[str, object]]:
+    events = fixture.get("events", [])
+    bridge = {"replayEvents": events}
+    virtual = clock == "virtual" and mode == "realtime"
+    with case_page(browser, trace_path, bridge, perf) as page:
+        if virtual:
+            # Realtime keeps its setTimeout(atMs) schedule; the fake clock just skips the idle gaps.
+            page.clock.install()
         url = f"{base_url}?testMode=1&voiceEngine=replay&replayMode={mode}"
         page.goto(url, wait_until="networkidle")
+        probe = start_probe(page) if perf else None
         # Keep replay result deterministic by resetting editor content before playback.
         page.evaluate(
             """() => {
@@ -163,53 +310,347 @@ def run_case(base_url: str, fixture: Dict[str, object], mode: str, trace_path: P
               ta.dispatchEvent(new Event('input', { bubbles: true }));
             }"""
         )
-        page.click("#btnMic")
+        started = time.perf_counter()
+        mark = click_mic(page)
         try:
-            wait_voice_off(page)
+            if virtual:
+                advance_until_voice_off(page, mark, replay_span_ms(events) + 2000)
+            else:
+                wait_voice_off(page, mark)
         except PlaywrightTimeoutError as exc:
-            context.tracing.stop(path=str(trace_path))
-            browser.close()
             raise RuntimeError(f"{mode}: replay did not complete: {exc}") from exc
+        wall_ms = (time.perf_counter() - started) * 1000
         result = page.evaluate("() => document.getElementById('editor')?.value || ''")
-        context.tracing.stop(path=str(trace_path))
-        browser.close()
-        return str(result)
+        if virtual and not result and any(
+            isinstance(item, dict) and item.get("type") == "result" and item.get("isFinal") and item.get("text")
+            for item in events
+        ):
+            raise RuntimeError(f"{mode}: virtual clock run left the editor empty; replay events were not played")
+        emits = page.evaluate("() => window.__KOEDEAM_TEST__?.replayEmitLog || []")
+        drifts = [abs(float(item["observedMs"]) - float(item["scheduledMs"])) for item in emits]
+        timing = {
+            "clock": "virtual" if virtual else "real",
+            "wall_ms": round(wall_ms, 1),
+            "max_drift_ms": round(max(drifts), 3) if drifts else 0.0,
+            "emits": emits,
+        }
+        if perf:
+            timing["perf"] = finish_probe(page, probe)
+        return str(result), timing
 
 
-def run(base_url: str, fixture_path: Path, trace_dir: Path) -> int:
-    fixture = json.loads(fixture_path.read_text(encoding="utf-8"))
+def run_fixture(
+    browser: Browser,
+    base_url: str,
+    fixture_path: Path,
+    trace_dir: Path,
+    clock: str = "virtual",
+    trace: str = "on",
+    perf: bool = False,
+    modes: Tuple[str, ...] = ("realtime", "fast"),
+) -> Dict[str, object]:
+    started = time.perf_counter()
+    stats_before = dict(TRACE_STATS)
+    outputs: Dict[str, object] = {}
+    failures: List[str] = []
+    trace_paths: List[Path] = []
+    fixture_id = fixture_path.name.replace(".events.json", "")
+    fixture: Dict[str, object] = {}
+    try:
+        fixture = load_fixture(fixture_path)
+        loaded = True
+    except CASE_ERRORS as exc:
+        loaded = False
+        failures.append(f"{fixture_id}: could not load fixture: {type(exc).__name__}: {exc}")
+    fixture_id = str(fixture.get("id") or fixture_id)
+    fixture["id"] = fixture_id
     expected = str(fixture.get("expectedText", ""))
-    if not expected:
-        print("FAIL: fixture expectedText is missing")
+
+    def trace_file(name: str) -> Optional[Path]:
+        if trace == "off":
+            return None
+        path = trace_dir / f"{fixture_id}_{name}_trace.zip"
+        trace_paths.append(path)
+        return path
+
+    if loaded and not expected:
+        failures.append(f"{fixture_id}: fixture expectedText is missing")
+    elif loaded:
+        for mode in modes:
+            try:
+                first, timing = run_case(browser, base_url, fixture, mode, trace_file(f"{mode}_run1"), clock, perf)
+                second, _ = run_case(browser, base_url, fixture, mode, trace_file(f"{mode}_run2"), clock, perf)
+            except RuntimeError as exc:
+                failures.append(f"{fixture_id}: {exc}")
+                continue
+            except CASE_ERRORS as exc:
+                failures.append(f"{fixture_id}: {mode}: {type(exc).__name__}: {exc}")
+                continue
+            outputs[mode] = {
+                "run1": first,
+                "run2": second,
+                "timing": timing,
+            }
+            if first != second:
+                failures.append(f"{fixture_id}: {mode}: non-deterministic output run1 != run2")
+            if first != expected:
+                failures.append(f"{fixture_id}: {mode}: output mismatch expected='{expected}' actual='{first}'")
+    if trace == "retain-on-failure" and not failures:
+        discard_traces(trace_paths)
+    return {
+        "id": fixture_id,
+        "path": str(fixture_path),
+        "outputs": outputs,
+        "failures": failures,
+        "duration_sec": round(time.perf_counter() - started, 3),
+        "trace": {key: TRACE_STATS[key] - stats_before[key] for key in TRACE_STATS},
+    }
+
+
+def run_commands(
+    browser: Browser,
+    base_url: str,
+    trace_dir: Path,
+    worker: int,
+    trace: str = "on",
+    perf: bool = False,
+    modes: Tuple[str, ...] = ("realtime", "fast"),
+) -> Dict[str, object]:
+    """Voice command suite once per mode; it does not depend on the fixture being replayed."""
+    stats_before = dict(TRACE_STATS)
+    reports: Dict[str, object] = {}
+    failures: List[str] = []
+    trace_paths: List[Path] = []
+    for mode in modes:
+        trace_path = None if trace == "off" else trace_dir / f"command_w{worker}_{mode}_trace.zip"
+        if trace_path is not None:
+            trace_paths.append(trace_path)
+        try:
+            reports[mode], mode_failures = run_command_suite(browser, base_url, mode, trace_path, perf)
+        except CASE_ERRORS as exc:
+            mode_failures = [f"{mode}: {type(exc).__name__}: {exc}"]
+        failures.extend(f"command suite (worker {worker}): {item}" for item in mode_failures)
+    if trace == "retain-on-failure" and not failures:
+        discard_traces(trace_paths)
+    return {
+        "worker": worker,
+        "outputs": reports,
+        "failures": failures,
+        "trace": {key: TRACE_STATS[key] - stats_before[key] for key in TRACE_STATS},
+    }
+
+
+def run_worker(
+    base_url: str,
+    fixture_paths: List[str],
+    trace_dir: str,
+    clock: str = "virtual",
+    trace: str = "on",
+    perf: bool = False,
+    modes: Tuple[str, ...] = ("realtime", "fast"),
+    worker: int = 1,
+) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
+    # One Chromium launch per worker; each case gets its own isolated context.
+    results: List[Dict[str, object]] = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            commands = run_commands(browser, base_url, Path(trace_dir), worker, trace, perf, modes)
+            for item in fixture_paths:
+                results.append(run_fixture(browser, base_url, Path(item), Path(trace_dir), clock, trace, perf, modes))
+        finally:
+            browser.close()
+    return results, commands
+
+
+@lru_cache(maxsize=None)
+def open_corpus(path: str) -> ReplayCorpus:
+    # One mmap per corpus per worker process, kept open for the whole run.
+    return ReplayCorpus(Path(path))
+
+
+def load_fixture(ref: Path) -> Dict[str, object]:
+    """Fixture file, or ``<corpus>.ndjson#<id>`` decoded from that single corpus line."""
+    corpus_path, sep, fixture_id = str(ref).partition("#")
+    if sep:
+        return open_corpus(corpus_path).get(fixture_id)
+    return json.loads(ref.read_text(encoding="utf-8"))
+
+
+def collect_fixtures(spec: str, tags: Optional[List[str]] = None) -> List[Path]:
+    path = Path(spec)
+    if path.suffix == ".ndjson" and path.is_file():
+        # Tag selection comes from the corpus index; no fixture is decoded here.
+        return [Path(f"{spec}#{fixture_id}") for fixture_id in open_corpus(spec).ids(tags)]
+    if path.is_dir():
+        paths = sorted(path.glob("*.events.json"))
+    elif path.is_file():
+        paths = [path]
+    else:
+        paths = sorted(Path(item) for item in glob.glob(spec, recursive=True) if item.endswith(".events.json"))
+    if tags:
+        paths = [p for p in paths if set(tags) & set(load_fixture(p).get("tags", []) or [])]  # type: ignore[arg-type]
+    return paths
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    try:
+        index_text, total_text = value.split("/", 1)
+        index, total = int(index_text), int(total_text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"shard must look like i/n: {value}") from exc
+    if total < 1 or not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"shard index out of range: {value}")
+    return index, total
+
+
+def fixture_root(spec: str) -> Path:
+    """Directory (or corpus file) that fixture keys are relative to."""
+    path = Path(spec)
+    if path.is_dir() or (path.suffix == ".ndjson" and path.is_file()):
+        return path
+    if path.is_file():
+        return path.parent
+    parts: List[str] = []
+    for part in path.parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def fixture_key(path: Path, root: Path) -> str:
+    """Stable duration key: path relative to the fixture root, or the id inside a corpus."""
+    corpus_path, sep, fixture_id = str(path).partition("#")
+    if sep:
+        return fixture_id
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def load_durations(path: Path) -> Dict[str, float]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k): float(v) for k, v in data.items() if isinstance(v, (int, float))}
+
+
+def balance(paths: List[Path], buckets: int, durations: Dict[str, float], key: Callable[[Path], str]) -> List[List[Path]]:
+    """Split fixtures into buckets with similar total recorded duration.
+
+    Longest-first greedy assignment; fixtures without a recorded duration are
+    weighted with the mean of the known ones so new fixtures still spread out.
+    """
+    keys = {path: key(path) for path in paths}
+    known = [durations[k] for k in keys.values() if k in durations]
+    fallback = sum(known) / len(known) if known else 1.0
+    weighted = sorted(paths, key=lambda p: (-durations.get(keys[p], fallback), keys[p]))
+    groups: List[List[Path]] = [[] for _ in range(max(1, buckets))]
+    totals = [0.0] * len(groups)
+    for path in weighted:
+        slot = totals.index(min(totals))
+        groups[slot].append(path)
+        totals[slot] += durations.get(keys[path], fallback)
+    return groups
+
+
+def merge_durations(durations_path: Path, output_dir: Path) -> int:
+    """Fold the per-shard duration files written by run() into the shared durations record."""
+    durations = load_durations(durations_path)
+    parts = sorted(output_dir.glob("*.json")) if output_dir.is_dir() else []
+    for part in parts:
+        durations.update(load_durations(part))
+    durations_path.parent.mkdir(parents=True, exist_ok=True)
+    durations_path.write_text(json.dumps(durations, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print("== Replay Durations Merge ==")
+    print(f"Merged: {len(parts)} files from {output_dir} -> {durations_path} ({len(durations)} fixtures)")
+    return 0
+
+
+def run(
+    base_url: str,
+    fixture_spec: str,
+    trace_dir: Path,
+    workers: int = 1,
+    shard: Tuple[int, int] = (1, 1),
+    durations_path: Optional[Path] = None,
+    clock: str = "virtual",
+    trace: str = "on",
+    tags: Optional[List[str]] = None,
+    perf: bool = False,
+    modes: Tuple[str, ...] = ("realtime", "fast"),
+    durations_output_dir: Optional[Path] = None,
+) -> int:
+    fixture_paths = collect_fixtures(fixture_spec, tags)
+    if not fixture_paths:
+        print(f"FAIL: no replay fixtures matched: {fixture_spec}")
         return 1
-    trace_dir.mkdir(parents=True, exist_ok=True)
+    # The durations record is only read here; every shard partitions from the same snapshot.
+    durations = load_durations(durations_path) if durations_path else {}
+    root = fixture_root(fixture_spec)
 
-    outputs: Dict[str, object] = {}
-    failures = []
-    for mode in ("realtime", "fast"):
-        first = run_case(base_url, fixture, mode, trace_dir / f"{fixture['id']}_{mode}_run1_trace.zip")
-        second = run_case(base_url, fixture, mode, trace_dir / f"{fixture['id']}_{mode}_run2_trace.zip")
-        command_report, command_failures = run_command_suite(
-            base_url,
-            mode,
-            trace_dir / f"{fixture['id']}_{mode}_command_trace.zip",
-        )
-        outputs[mode] = {
-            "run1": first,
-            "run2": second,
-            "command": command_report,
-        }
-        if first != second:
-            failures.append(f"{mode}: non-deterministic output run1 != run2")
-        if first != expected:
-            failures.append(f"{mode}: output mismatch expected='{expected}' actual='{first}'")
-        failures.extend(command_failures)
+    def key(path: Path) -> str:
+        return fixture_key(path, root)
+
+    shard_index, shard_total = shard
+    selected = balance(fixture_paths, shard_total, durations, key)[shard_index - 1]
+    if not selected:
+        print(f"PASS: shard {shard_index}/{shard_total} has no fixtures")
+        return 0
+    if trace != "off":
+        trace_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    groups = [group for group in balance(selected, min(workers, len(selected)), durations, key) if group]
+    results: List[Dict[str, object]] = []
+    commands: List[Dict[str, object]] = []
+    if len(groups) == 1:
+        fixture_results, command_result = run_worker(base_url, [str(p) for p in groups[0]], str(trace_dir), clock, trace, perf, modes)
+        results.extend(fixture_results)
+        commands.append(command_result)
+    else:
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            futures = [
+                pool.submit(run_worker, base_url, [str(p) for p in group], str(trace_dir), clock, trace, perf, modes, n + 1)
+                for n, group in enumerate(groups)
+            ]
+            for future in futures:
+                fixture_results, command_result = future.result()
+                results.extend(fixture_results)
+                commands.append(command_result)
+    results.sort(key=lambda item: str(item["id"]))
+
+    failures: List[str] = []
+    for item in [*commands, *results]:
+        failures.extend(item["failures"])  # type: ignore[arg-type]
+    if durations_output_dir:
+        # Per-shard output; merge into the shared record with --merge-durations once all shards are done.
+        measured = {key(Path(str(item["path"]))): float(item["duration_sec"]) for item in results}  # type: ignore[arg-type]
+        durations_output = durations_output_dir / f"shard_{shard_index}_of_{shard_total}.json"
+        durations_output.parent.mkdir(parents=True, exist_ok=True)
+        durations_output.write_text(json.dumps(measured, indent=2, sort_keys=True) + "\n", encoding="utf-8")
 
     print("== Playwright Replay Checks ==")
-    print(f"Fixture: {fixture_path}")
+    print(f"Fixtures: {len(selected)} / {len(fixture_paths)} (shard {shard_index}/{shard_total}, workers {len(groups)})")
     print(f"Base URL: {base_url}")
-    print(f"Trace Dir: {trace_dir}")
-    print(json.dumps(outputs, ensure_ascii=True, indent=2))
+    print(f"Trace Dir: {trace_dir} (policy {trace})")
+    traces = trace_totals([item["trace"] for item in [*commands, *results]])  # type: ignore[misc]
+    print(
+        f"Trace Cost: {traces['seconds']:.2f}s, {traces['files']} files / {traces['bytes']} bytes written, "
+        f"{traces['kept_files']} files / {traces['kept_bytes']} bytes kept"
+    )
+    print(f"Modes: {', '.join(modes)} (clock {clock})")
+    print(f"Perf: {'on (per-case deltas under outputs.*.timing.perf / command.perf)' if perf else 'off'}")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    report = {str(item["id"]): {"outputs": item["outputs"], "duration_sec": item["duration_sec"]} for item in results}
+    print(json.dumps(report, ensure_ascii=True, indent=2))
+    print("Command Suite:")
+    print(json.dumps({f"worker {item['worker']}": item["outputs"] for item in commands}, ensure_ascii=True, indent=2))
     if failures:
         print("")
         print("Failures:")
@@ -220,21 +661,277 @@ def run(base_url: str, fixture_path: Path, trace_dir: Path) -> int:
     return 0
 
 
+# Soak: many fast replay sessions back to back on one page, the way a device
+# keeps Koedeam open all day. Each batch cycles through the fixtures in-page.
+SOAK_BATCH_JS = r"""
+async ({ fixtures, offset, count, timeoutMs }) => {
+  const bridge = window.__KOEDEAM_TEST__;
+  const ta = document.getElementById('editor');
+  const mic = document.getElementById('btnMic');
+  const latencies = [];
+  let commits = [];
+  const off = bridge.onSignal((entry) => {
+    if (entry.name === 'voice-committed') commits.push(entry.at);
+  });
+  try {
+    for (let i = 0; i < count; i += 1) {
+      // Empty editor per session so growth comes from accumulated app state, not document length.
+      ta.value = '';
+      ta.focus();
+      ta.setSelectionRange(0, 0);
+      ta.dispatchEvent(new Event('input', { bubbles: true }));
+      bridge.setReplayEvents(fixtures[(offset + i) % fixtures.length]);
+      commits = [];
+      const since = bridge.signalSeq;
+      mic.click();
+      await bridge.waitForSignal('voice-state', { since, detail: { input: 'VOICE_OFF' }, timeoutMs });
+      // Each commit pairs with the latest result emitted before it (interims never commit).
+      const emits = (bridge.replayEmitLog || []).filter((e) => e.type === 'result').map((e) => e.at);
+      const deltas = commits.map((at) => {
+        const before = emits.filter((e) => e <= at);
+        return before.length ? at - before[before.length - 1] : null;
+      }).filter((v) => v !== null);
+      latencies.push(deltas.length ? deltas.reduce((a, b) => a + b, 0) / deltas.length : null);
+    }
+  } finally {
+    off();
+  }
+  return latencies;
+}
+"""
+
+# Absolute growth below these floors is noise, whatever the relative change.
+SOAK_FLOORS = {
+    "heap_bytes": 1024 * 1024,
+    "storage_bytes": 4096,
+    "telemetry_events": 1,
+    "telemetry_sessions": 1,
+    "undo_depth": 1,
+    "latency_ms": 1.0,
+}
+
+
+def tail_growth(points: List[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Fitted growth across the last half of the samples: (absolute, relative to the tail mean)."""
+    tail = points[len(points) // 2 :]
+    if len(tail) < 2:
+        return None
+    mean_x = sum(x for x, _ in tail) / len(tail)
+    mean_y = sum(y for _, y in tail) / len(tail)
+    var_x = sum((x - mean_x) ** 2 for x, _ in tail)
+    if var_x == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in tail) / var_x
+    growth = slope * (tail[-1][0] - tail[0][0])
+    return growth, growth / abs(mean_y) if mean_y else float("inf")
+
+
+def soak_sample(page: Page, cdp, done: int, latencies: List[Optional[float]]) -> Dict[str, object]:
+    cdp.send("HeapProfiler.collectGarbage")
+    stats = page.evaluate("() => window.__KOEDEAM_TEST__.runtimeStats()")
+    measured = sorted(v for v in latencies if v is not None)
+    return {
+        "sessions": done,
+        "heap_bytes": int(read_cdp(cdp).get("JSHeapUsedSize", 0.0)),
+        "storage_bytes": int(stats["storageBytes"]),
+        "telemetry_events": int(stats["telemetryEvents"]),
+        "telemetry_sessions": int(stats["telemetrySessions"]),
+        "undo_depth": int(stats["undoDepth"]),
+        "latency_ms": round(measured[len(measured) // 2], 3) if measured else None,
+        "latency_max_ms": round(measured[-1], 3) if measured else None,
+    }
+
+
+def run_soak(
+    base_url: str,
+    fixture_spec: str,
+    sessions: int,
+    sample_every: int,
+    tolerance: float,
+    output_path: Optional[Path],
+    tags: Optional[List[str]] = None,
+    mode: str = "fast",
+) -> int:
+    fixture_paths = collect_fixtures(fixture_spec, tags)
+    if not fixture_paths:
+        print(f"FAIL: no replay fixtures matched: {fixture_spec}")
+        return 1
+    fixtures = [load_fixture(path).get("events", []) for path in fixture_paths]
+    started = time.perf_counter()
+    samples: List[Dict[str, object]] = []
+    failures: List[str] = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context(viewport=VIEWPORT)
+        context.add_init_script("localStorage.setItem('koedeam.settings', JSON.stringify({ voiceStartTone: false }));")
+        try:
+            page = context.new_page()
+            page.goto(f"{base_url}?testMode=1&voiceEngine=replay&replayMode={mode}", wait_until="networkidle")
+            cdp = page.context.new_cdp_session(page)
+            cdp.send("Performance.enable")
+            samples.append(soak_sample(page, cdp, 0, []))
+            done = 0
+            while done < sessions:
+                count = min(sample_every, sessions - done)
+                latencies = page.evaluate(
+                    SOAK_BATCH_JS, {"fixtures": fixtures, "offset": done, "count": count, "timeoutMs": 10000}
+                )
+                done += count
+                samples.append(soak_sample(page, cdp, done, latencies))
+                print(
+                    f"[soak] {done}/{sessions} heap={samples[-1]['heap_bytes'] / 1048576:.1f}MB "
+                    f"storage={samples[-1]['storage_bytes'] / 1024:.0f}KB events={samples[-1]['telemetry_events']} "
+                    f"sessions={samples[-1]['telemetry_sessions']} latency={samples[-1]['latency_ms']}ms",
+                    flush=True,
+                )
+        except PlaywrightError as exc:
+            failures.append(f"soak stopped after {samples[-1]['sessions'] if samples else 0} sessions: {str(exc).splitlines()[0]}")
+        finally:
+            context.close()
+            browser.close()
+
+    trends: Dict[str, Dict[str, object]] = {}
+    for metric, floor in SOAK_FLOORS.items():
+        # The pre-soak sample only anchors the plot; latency has no value there.
+        points = [(float(s["sessions"]), float(s[metric])) for s in samples[1:] if s[metric] is not None]  # type: ignore[arg-type]
+        fitted = tail_growth(points)
+        if fitted is None:
+            trends[metric] = {"growth": None, "relative": None, "levels_off": None}
+            continue
+        growth, relative = fitted
+        levels_off = growth < floor or relative <= tolerance
+        trends[metric] = {"growth": round(growth, 3), "relative": round(relative, 4), "levels_off": levels_off}
+        if not levels_off:
+            failures.append(
+                f"{metric}: still growing over the last half of the run (+{growth:.1f}, +{relative * 100:.0f}% of tail mean)"
+            )
+
+    print("== Playwright Replay Soak ==")
+    print(f"Fixtures: {len(fixtures)} (cycled, replayMode={mode})")
+    print(f"Base URL: {base_url}")
+    print(f"Sessions: {samples[-1]['sessions'] if samples else 0} / {sessions} (sampled every {sample_every})")
+    print(f"Tolerance: +{tolerance * 100:.0f}% over the last half of the run")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    for metric, trend in trends.items():
+        verdict = "n/a" if trend["levels_off"] is None else ("flat" if trend["levels_off"] else "GROWING")
+        print(f"{metric:<20} {verdict:<8} growth={trend['growth']} relative={trend['relative']}")
+    if output_path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(
+            json.dumps({"url": base_url, "sessions": sessions, "samples": samples, "trends": trends}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Report: {output_path}")
+    if failures:
+        print("")
+        print("Failures:")
+        for item in failures:
+            print(f"- {item}")
+        return 1
+    print("PASS: soak metrics level off")
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Deterministic replay checks with Playwright traces")
     parser.add_argument("--url", default="http://localhost:8000/app/", help="App URL to test")
     parser.add_argument(
         "--fixture",
         default="tests/fixtures/quiet_01.events.json",
-        help="Replay fixture path",
+        help="Replay fixture path, directory of *.events.json, glob pattern, or indexed corpus (*.ndjson)",
+    )
+    parser.add_argument("--tag", default="", help="Comma-separated fixture tags to select (any match)")
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="Collect CDP metrics, long tasks and forced layouts per case (instruments layout getters; off by default)",
     )
     parser.add_argument(
         "--trace-dir",
         default="artifacts/traces",
         help="Directory to store Playwright trace zip files",
     )
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), help="Run only shard i of n (e.g. 2/4)")
+    parser.add_argument(
+        "--durations",
+        default="artifacts/replay_durations.json",
+        help="Per-fixture duration record used to balance shards and workers (read only)",
+    )
+    parser.add_argument(
+        "--durations-output",
+        default="artifacts/replay_durations",
+        help="Directory for this shard's measured durations (shard_<i>_of_<n>.json)",
+    )
+    parser.add_argument(
+        "--merge-durations",
+        action="store_true",
+        help="Merge the files under --durations-output into --durations and exit",
+    )
+    parser.add_argument(
+        "--clock",
+        choices=("virtual", "real"),
+        default="virtual",
+        help="virtual: drive realtime replay with Playwright's fake clock; real: wait on wall-clock atMs",
+    )
+    parser.add_argument(
+        "--trace",
+        choices=TRACE_POLICIES,
+        default="on",
+        help="Trace capture policy; retain-on-failure keeps zips only for failing fixtures",
+    )
+    parser.add_argument(
+        "--modes",
+        default="realtime,fast",
+        help=f"Replay modes to check per fixture ({','.join(REPLAY_MODES)})",
+    )
+    parser.add_argument("--soak", type=int, default=0, help="Run N back-to-back replay sessions on one page instead of the checks")
+    parser.add_argument("--soak-mode", choices=REPLAY_MODES[1:], default="fast", help="Replay mode for soak sessions")
+    parser.add_argument("--soak-sample-every", type=int, default=100, help="Sessions between soak samples")
+    parser.add_argument(
+        "--soak-tolerance",
+        type=float,
+        default=0.1,
+        help="Flag a soak metric whose fitted growth over the last half exceeds this fraction",
+    )
+    parser.add_argument("--soak-output", default="artifacts/soak/replay_soak.json", help="Where to write the soak report")
     args = parser.parse_args()
-    return run(args.url, Path(args.fixture), Path(args.trace_dir))
+    tags = [tag.strip() for tag in args.tag.split(",") if tag.strip()]
+    modes = tuple(mode.strip() for mode in args.modes.split(",") if mode.strip())
+    unknown = [mode for mode in modes if mode not in REPLAY_MODES]
+    if unknown or not modes:
+        print(f"ERROR: unknown replay mode: {', '.join(unknown) or '(none)'}")
+        return 2
+    if args.merge_durations:
+        if not args.durations or not args.durations_output:
+            print("ERROR: --merge-durations needs --durations and --durations-output")
+            return 2
+        return merge_durations(Path(args.durations), Path(args.durations_output))
+    if args.soak > 0:
+        return run_soak(
+            args.url,
+            args.fixture,
+            args.soak,
+            max(1, args.soak_sample_every),
+            max(0.0, args.soak_tolerance),
+            Path(args.soak_output) if args.soak_output else None,
+            tags,
+            args.soak_mode,
+        )
+    return run(
+        args.url,
+        args.fixture,
+        Path(args.trace_dir),
+        workers=max(1, args.workers),
+        shard=args.shard,
+        durations_path=Path(args.durations) if args.durations else None,
+        clock=args.clock,
+        trace=args.trace,
+        tags=tags,
+        perf=args.perf,
+        modes=modes,
+        durations_output_dir=Path(args.durations_output) if args.durations_output else None,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Replay corpus: one compact fixture per line (NDJSON) plus a sidecar
+# <name>.index.json holding the byte [offset, length] of every fixture id and the
+# ids per tag. Runners mmap the NDJSON and decode only the lines they select, and
+# the app loads a single fixture with ?eventsUrl=<corpus>.ndjson&replayId=<id>.
+
+INDEX_VERSION = 2
+
+
+def index_path(corpus: Path) -> Path:
+    return corpus.with_suffix(".index.json")
+
+
+def fixture_tags(fixture: Dict[str, object], extra: Optional[Dict[str, object]] = None) -> List[str]:
+    """Fixture tags plus noise:<level>; ``extra`` is the matching audio manifest entry, if any."""
+    tags: List[str] = []
+    for source in (fixture, extra or {}):
+        tags.extend(str(tag) for tag in source.get("tags", []) or [])  # type: ignore[union-attr]
+        if source.get("noise"):
+            tags.append(f"noise:{source['noise']}")
+    return sorted(set(tags))
+
+
+def load_manifest(path: Optional[Path]) -> Dict[str, Dict[str, object]]:
+    if path is None or not path.exists():
+        return {}
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    return {str(item.get("id", "")): item for item in manifest.get("fixtures", [])}
+
+
+def manifest_extra(index: Dict[str, object]) -> Dict[str, Dict[str, object]]:
+    """Manifest tags recorded by an earlier index, shaped like ``load_manifest`` entries.
+
+    Version 1 indexes did not keep them apart, so every tag they list for an id is carried over.
+    """
+    recorded = index.get("manifest_tags")
+    if not isinstance(recorded, dict):
+        recorded = {}
+        for tag, ids in (index.get("tags") or {}).items():  # type: ignore[union-attr]
+            for fixture_id in ids:
+                recorded.setdefault(fixture_id, []).append(tag)
+    return {str(fixture_id): {"tags": list(tags)} for fixture_id, tags in recorded.items()}
+
+
+def new_index(corpus: Path, manifest: Optional[Path] = None) -> Dict[str, object]:
+    return {
+        "version": INDEX_VERSION,
+        "corpus": corpus.name,
+        "size": 0,
+        "mtime_ns": 0,
+        "manifest": str(manifest) if manifest is not None else "",
+        "count": 0,
+        "fixtures": {},
+        "tags": {},
+        "manifest_tags": {},
+    }
+
+
+def add_entry(
+    index: Dict[str, object],
+    fixture_id: str,
+    offset: int,
+    length: int,
+    fixture: Dict[str, object],
+    extra: Optional[Dict[str, object]] = None,
+) -> None:
+    fixtures: Dict[str, List[int]] = index["fixtures"]  # type: ignore[assignment]
+    if fixture_id in fixtures:
+        raise ValueError(f"duplicate fixture id in corpus: {fixture_id}")
+    fixtures[fixture_id] = [offset, length]
+    by_tag: Dict[str, List[str]] = index["tags"]  # type: ignore[assignment]
+    for tag in fixture_tags(fixture, extra):
+        by_tag.setdefault(tag, []).append(fixture_id)
+    # Kept separately so an automatic rebuild can restore them without the manifest.
+    from_manifest = fixture_tags({}, extra)
+    if from_manifest:
+        index["manifest_tags"][fixture_id] = from_manifest  # type: ignore[index]
+    index["count"] = len(fixtures)
+
+
+def corpus_stamp(corpus: Path) -> Tuple[int, int]:
+    st = corpus.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def write_index(corpus: Path, index: Dict[str, object]) -> Path:
+    index["size"], index["mtime_ns"] = corpus_stamp(corpus)
+    path = index_path(corpus)
+    path.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+    return path
+
+
+def pack(sources: Iterable[Path], corpus: Path, manifest: Optional[Path] = None) -> Dict[str, object]:
+    """Write *.events.json fixtures into an NDJSON corpus and build its index in the same pass."""
+    extra = load_manifest(manifest)
+    index = new_index(corpus, manifest)
+    corpus.parent.mkdir(parents=True, exist_ok=True)
+    offset = 0
+    with corpus.open("wb") as out:
+        for source in sources:
+            fixture = json.loads(source.read_text(encoding="utf-8"))
+            fixture_id = str(fixture.get("id") or source.name.replace(".events.json", ""))
+            # id first, so the line is recognisable without decoding the events.
+            record = {"id": fixture_id, **{k: v for k, v in fixture.items() if k != "id"}}
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            out.write(line + b"\n")
+            add_entry(index, fixture_id, offset, len(line), fixture, extra.get(fixture_id))
+            offset += len(line) + 1
+    write_index(corpus, index)
+    return index
+
+
+def build_index(
+    corpus: Path, manifest: Optional[Path] = None, extra: Optional[Dict[str, Dict[str, object]]] = None
+) -> Dict[str, object]:
+    """Index an existing NDJSON corpus (e.g. tools/synthetic_replay.py output).
+
+    ``extra`` stands in for the manifest when it is not given (the tags an earlier index recorded).
+    """
+    if manifest is not None or extra is None:
+        extra = load_manifest(manifest)
+    index = new_index(corpus, manifest)
+    with corpus.open("rb") as src:
+        offset = 0
+        for raw in src:
+            line = raw.rstrip(b"\r\n")
+            if line.strip():
+                fixture = json.loads(line)
+                fixture_id = str(fixture.get("id", ""))
+                if not fixture_id:
+                    raise ValueError(f"{corpus}: fixture at byte {offset} has no id")
+                add_entry(index, fixture_id, offset, len(line), fixture, extra.get(fixture_id))
+            offset += len(raw)
+    write_index(corpus, index)
+    return index
+
+
+def load_index(corpus: Path) -> Dict[str, object]:
+    """Read the sidecar index, rebuilding it when missing or stale (corpus size or mtime changed).
+
+    A rebuild keeps the manifest tags: from the recorded manifest if it still exists, otherwise
+    from the tags the stale index recorded.
+    """
+    path = index_path(corpus)
+    try:
+        index = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        index = None
+    if not isinstance(index, dict):
+        return build_index(corpus)
+    size, mtime_ns = corpus_stamp(corpus)
+    if index.get("version") == INDEX_VERSION and index.get("size") == size and index.get("mtime_ns") == mtime_ns:
+        return index
+    manifest = Path(str(index["manifest"])) if index.get("manifest") else None
+    if manifest is not None and manifest.exists():
+        return build_index(corpus, manifest)
+    return build_index(corpus, extra=manifest_extra(index))
+
+
+class ReplayCorpus:
+    """Read-only, mmap-backed view of a corpus; fixtures are decoded on demand."""
+
+    def __init__(self, corpus: Path) -> None:
+        self.path = corpus
+        self.index = load_index(corpus)
+        self._file = corpus.open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.index["size"] else None
+
+    def __enter__(self) -> "ReplayCorpus":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self.index["count"])  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def ids(self, tags: Optional[List[str]] = None) -> List[str]:
+        """All ids in corpus order, or those carrying any of ``tags``."""
+        fixtures: Dict[str, List[int]] = self.index["fixtures"]  # type: ignore[assignment]
+        if not tags:
+            return list(fixtures)
+        by_tag: Dict[str, List[str]] = self.index["tags"]  # type: ignore[assignment]
+        wanted = {fixture_id for tag in tags for fixture_id in by_tag.get(tag, [])}
+        return [fixture_id for fixture_id in fixtures if fixture_id in wanted]
+
+    def span(self, fixture_id: str) -> Tuple[int, int]:
+        entry = self.index["fixtures"].get(fixture_id)  # type: ignore[union-attr]
+        if entry is None:
+            raise KeyError(f"fixture not in corpus {self.path}: {fixture_id}")
+        return int(entry[0]), int(entry[1])
+
+    def raw(self, fixture_id: str) -> bytes:
+        offset, length = self.span(fixture_id)
+        assert self._map is not None
+        return self._map[offset : offset + length]
+
+    def get(self, fixture_id: str) -> Dict[str, object]:
+        return json.loads(self.raw(fixture_id))
+
+
+def collect_sources(spec: str) -> List[Path]:
+    path = Path(spec)
+    if path.is_dir():
+        return sorted(path.glob("*.events.json"))
+    if path.is_file():
+        return [path]
+    return sorted(Path(item) for item in glob.glob(spec, recursive=True) if item.endswith(".events.json"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build and inspect indexed NDJSON replay corpora")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_pack = sub.add_parser("pack", help="Pack *.events.json fixtures into <output>.ndjson + <output>.index.json")
+    p_pack.add_argument("--input", default="tests/fixtures", help="Fixture file, directory or glob")
+    p_pack.add_argument("--output", default="artifacts/replay/corpus.ndjson", help="Corpus NDJSON path")
+    p_pack.add_argument(
+        "--manifest",
+        default="test/fixtures/audio/fixtures.meta.json",
+        help="Audio manifest whose tags/noise are merged into the index by fixture id",
+    )
+    p_index = sub.add_parser("index", help="(Re)build the index of an existing NDJSON corpus")
+    p_index.add_argument("corpus", help="Corpus NDJSON path")
+    p_index.add_argument("--manifest", default="", help="Optional audio manifest for extra tags")
+    p_list = sub.add_parser("list", help="Print fixture ids, optionally filtered by tag")
+    p_list.add_argument("corpus", help="Corpus NDJSON path")
+    p_list.add_argument("--tag", default="", help="Comma-separated tags (any match), e.g. baseline,noise:quiet")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        sources = collect_sources(args.input)
+        if not sources:
+            print(f"ERROR: no replay fixtures matched: {args.input}")
+            return 2
+        index = pack(sources, Path(args.output), Path(args.manifest) if args.manifest else None)
+        print(f"OK: {index['count']} fixtures -> {args.output} (index {index_path(Path(args.output))})")
+        return 0
+    corpus = Path(args.corpus)
+    if not corpus.exists():
+        print(f"ERROR: corpus does not exist: {corpus}")
+        return 2
+    if args.command == "index":
+        index = build_index(corpus, Path(args.manifest) if args.manifest else None)
+        print(f"OK: indexed {index['count']} fixtures -> {index_path(corpus)}")
+        return 0
+    tags = [tag.strip() for tag in args.tag.split(",") if tag.strip()]
+    with ReplayCorpus(corpus) as store:
+        for fixture_id in store.ids(tags):
+            print(fixture_id)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+
+from aggregate_field_tests import JsonStream  # noqa: E402
+
+DOC = '{"v": [12.5, 3e2, -0.25E-3, 7, 1234567890.0987], "n": -12.5e+1, "s": "12.", "t": [true, null]}'
+
+
+def read_all(text: str, chunk_chars: int) -> dict:
+    out: dict = {}
+    for kind, key, value in JsonStream(io.StringIO(text), chunk_chars=chunk_chars).members():
+        if kind == "item":
+            out.setdefault(key, []).append(value)
+        else:
+            out[key] = value
+    return out
+
+
+def test_numbers_split_at_every_chunk_size() -> None:
+    expected = json.loads(DOC)
+    for chunk_chars in range(1, len(DOC) + 2):
+        assert read_all(DOC, chunk_chars) == expected, chunk_chars
+
+
+def test_number_at_end_of_stream() -> None:
+    for chunk_chars in (1, 2, 3, 5, 10):
+        assert read_all('{"v": 12.5}', chunk_chars) == {"v": 12.5}
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+# Aggregates field-test ZIP exports (exportFieldTestZip in app/app.js) from many
+# devices. session.json is read with a small streaming reader: top-level arrays
+# such as "events" are decoded one element at a time, so a long session never
+# has to be held in memory as a whole.
+
+METRICS = ("t_start_to_first_interim_ms", "t_start_to_first_final_ms", "session_duration_ms")
+DIMENSIONS = ("os.name", "browser.name", "environment_tag")
+PERCENTILES = (50, 90, 95, 99)
+CHUNK_CHARS = 1 << 16
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+Item = Tuple[str, str, object]
+
+
+class JsonStream:
+    """Incremental reader over a top-level JSON object.
+
+    ``members()`` yields ("value", key, value) for ordinary members and
+    ("item", key, element) for every element of an array-valued member.
+    """
+
+    def __init__(self, stream: TextIO, chunk_chars: int = CHUNK_CHARS) -> None:
+        self.stream = stream
+        self.chunk_chars = chunk_chars
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.stream.read(self.chunk_chars)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected '{char}' but found '{found or 'EOF'}'")
+        self.pos += 1
+
+    def value(self) -> object:
+        while True:
+            self.peek()
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number may continue in the next chunk: "12." or "3e" decode as 12 / 3 with only
+            # number characters left before the buffer edge. Refill until a terminator shows up.
+            if (
+                isinstance(obj, (int, float))
+                and not isinstance(obj, bool)
+                and all(char in NUMBER_CHARS for char in self.buf[end:])
+                and not self.eof
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return obj
+
+    def members(self) -> Iterator[Item]:
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                self.pos += 1
+                if self.peek() != "]":
+                    while True:
+                        yield "item", str(key), self.value()
+                        if self.peek() != ",":
+                            break
+                        self.pos += 1
+                self.expect("]")
+            else:
+                yield "value", str(key), self.value()
+            if self.peek() != ",":
+                break
+            self.pos += 1
+        self.expect("}")
+
+
+def open_session_json(zip_path: Path) -> Tuple[zipfile.ZipFile, TextIO]:
+    archive = zipfile.ZipFile(zip_path, "r")
+    return archive, io.TextIOWrapper(archive.open("session.json"), encoding="utf-8")
+
+
+def session_metrics(session: Dict[str, object]) -> Dict[str, Optional[float]]:
+    """Same definitions as buildTelemetryPayload() in app/app.js."""
+    start = float(session.get("startedAt") or 0)  # type: ignore[arg-type]
+    end = float(session.get("endedAt") or start)  # type: ignore[arg-type]
+    interim = session.get("firstInterimAt")
+    final = session.get("firstFinalAt")
+    return {
+        "t_start_to_first_interim_ms": max(0.0, float(interim) - start) if interim else None,  # type: ignore[arg-type]
+        "t_start_to_first_final_ms": max(0.0, float(final) - start) if final else None,  # type: ignore[arg-type]
+        "session_duration_ms": end - start if end > start else None,
+    }
+
+
+def read_zip(zip_path: str) -> Dict[str, object]:
+    """Per-session metric rows plus device dimensions for one export."""
+    info: Dict[str, object] = {"path": zip_path, "ok": False, "rows": [], "events": 0, "message": ""}
+    dims = {"os.name": "Unknown", "browser.name": "Unknown", "environment_tag": ""}
+    rows: List[Dict[str, Optional[float]]] = []
+    try:
+        archive, stream = open_session_json(Path(zip_path))
+        with archive, stream:
+            schema = ""
+            for kind, key, value in JsonStream(stream).members():
+                if kind == "item" and key == "sessions" and isinstance(value, dict):
+                    rows.append(session_metrics(value))
+                elif kind == "item" and key == "events":
+                    info["events"] = int(info["events"]) + 1  # type: ignore[call-overload]
+                elif key == "schema_version":
+                    schema = str(value)
+                elif key == "environment_tag":
+                    dims["environment_tag"] = str(value or "")
+                elif key in ("os", "browser") and isinstance(value, dict):
+                    dims[f"{key}.name"] = str(value.get("name") or "Unknown")
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+        info["message"] = f"{type(exc).__name__}: {exc}"
+        return info
+    if schema != "1.1":
+        info["message"] = f"unsupported schema_version '{schema}'"
+        return info
+    info.update(ok=True, rows=[{**dims, **row} for row in rows])
+    return info
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100.0
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(rows: List[Dict[str, object]]) -> Dict[str, object]:
+    out: Dict[str, object] = {"sessions": len(rows)}
+    for metric in METRICS:
+        values = [float(row[metric]) for row in rows if row.get(metric) is not None]  # type: ignore[arg-type]
+        out[metric] = (
+            {"n": len(values), **{f"p{p}": round(percentile(values, p), 1) for p in PERCENTILES}} if values else {"n": 0}
+        )
+    return out
+
+
+def aggregate(rows: List[Dict[str, object]]) -> Dict[str, Dict[str, object]]:
+    groups: Dict[str, Dict[str, List[Dict[str, object]]]] = {dim: {} for dim in (*DIMENSIONS, "combined")}
+    for row in rows:
+        for dim in DIMENSIONS:
+            groups[dim].setdefault(str(row[dim]) or "(none)", []).append(row)
+        combined = " / ".join(str(row[dim]) or "(none)" for dim in DIMENSIONS)
+        groups["combined"].setdefault(combined, []).append(row)
+    return {dim: {key: summarize(items) for key, items in sorted(by_key.items())} for dim, by_key in groups.items()}
+
+
+def collect_zips(root: Path) -> List[Path]:
+    if root.is_file():
+        return [root]
+    return sorted(root.rglob("*.zip"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Aggregate field-test ZIP exports by OS, browser and environment tag")
+    parser.add_argument("input", help="Directory searched recursively for *.zip (or a single zip)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--output", default="artifacts/field_tests/aggregate.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    zips = collect_zips(Path(args.input))
+    if not zips:
+        print(f"ERROR: no zip files under {args.input}")
+        return 2
+
+    started = time.perf_counter()
+    rows: List[Dict[str, object]] = []
+    failures: List[str] = []
+    events = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for info in pool.map(read_zip, [str(p) for p in zips], chunksize=8):
+            if not info["ok"]:
+                failures.append(f"{info['path']}: {info['message']}")
+                continue
+            rows.extend(info["rows"])  # type: ignore[arg-type]
+            events += int(info["events"])  # type: ignore[call-overload]
+    report = aggregate(rows)
+
+    print("== Field Test Aggregate ==")
+    print(f"Archives: {len(zips) - len(failures)} / {len(zips)} ({events} events, {len(rows)} sessions)")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    for dim in DIMENSIONS:
+        print("")
+        print(f"[{dim}]")
+        for key, summary in report[dim].items():
+            cells = []
+            for metric in METRICS:
+                stats = summary[metric]  # type: ignore[index]
+                cells.append(
+                    f"{metric.replace('_ms', '')} p50={stats['p50']:.0f} p95={stats['p95']:.0f}" if stats["n"] else f"{metric.replace('_ms', '')} n/a"
+                )
+            print(f"- {key} (n={summary['sessions']}): " + ", ".join(cells))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"archives": len(zips), "sessions": len(rows), "events": events, "breakdown": report}, ensure_ascii=False, indent=2)
+        + "\n",
+        encoding="utf-8",
+    )
+    print(f"Report: {output}")
+    if failures:
+        print("")
+        print("Failures:")
+        for item in failures:
+            print(f"- {item}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
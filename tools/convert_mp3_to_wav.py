@@ -1,21 +1,147 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
 import shutil
 import subprocess
+import wave
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy every input goes through ffmpeg
+    np = None
+
+# Bump when conversion output could change for identical input/params.
+CACHE_VERSION = "2"
+
+CHUNK_FRAMES = 1 << 16
+FIR_TAPS = 63
+
+
+def read_pcm_chunk(raw: bytes, sampwidth: int, channels: int) -> "np.ndarray":
+    """Decode little-endian PCM frames to float32 in [-1, 1), shape (frames, channels)."""
+    if sampwidth == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sampwidth == 2:
+        data = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif sampwidth == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        data = ints.astype(np.float32) / float(1 << 23)
+    else:
+        data = (np.frombuffer(raw, dtype="<i4").astype(np.float64) / float(1 << 31)).astype(np.float32)
+    return data.reshape(-1, channels)
+
+
+def lowpass_taps(cutoff: float) -> "np.ndarray":
+    """Hann-windowed sinc; ``cutoff`` is a fraction of the input Nyquist frequency."""
+    n = np.arange(FIR_TAPS, dtype=np.float64) - (FIR_TAPS - 1) / 2
+    taps = cutoff * np.sinc(cutoff * n) * np.hanning(FIR_TAPS)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+def convert_wav_native(input_path: Path, output_path: Path, sample_rate: int, channels: int) -> Optional[int]:
+    """Downmix/resample a PCM WAV in bounded memory without spawning ffmpeg.
+
+    Returns None when the input is not something this path handles (NumPy missing,
+    non-PCM WAV, unsupported channel layout) so the caller can fall back to ffmpeg.
+    """
+    if np is None:
+        return None
+    try:
+        src = wave.open(str(input_path), "rb")
+    except (wave.Error, EOFError):
+        return None
+    with src:
+        in_channels = src.getnchannels()
+        in_rate = src.getframerate()
+        sampwidth = src.getsampwidth()
+        total_in = src.getnframes()
+        if sampwidth not in (1, 2, 3, 4):
+            return None
+        if not (channels == 1 or channels == in_channels or in_channels == 1):
+            return None
+
+        ratio = sample_rate / in_rate
+        taps = lowpass_taps(min(1.0, ratio) * 0.95) if ratio < 1 else None
+        delay = (FIR_TAPS - 1) // 2 if taps is not None else 0
+        history = np.zeros((FIR_TAPS - 1 if taps is not None else 0, channels), dtype=np.float32)
+        total_out = int(round(total_in * ratio))
+        step = 1.0 / ratio
+        buf = np.zeros((0, channels), dtype=np.float32)
+        buf_start = 0  # filtered-sample index of buf[0]
+        next_out = 0
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(output_path), "wb") as dst:
+            dst.setnchannels(channels)
+            dst.setsampwidth(2)
+            dst.setframerate(sample_rate)
+
+            def feed(frames: "np.ndarray", final: bool) -> None:
+                nonlocal history, buf, buf_start, next_out
+                if taps is not None:
+                    padded = np.concatenate([history, frames])
+                    history = padded[len(padded) - (FIR_TAPS - 1):]
+                    filtered = np.stack(
+                        [np.convolve(padded[:, c], taps, mode="valid") for c in range(channels)], axis=1
+                    ).astype(np.float32)
+                else:
+                    filtered = frames
+                buf = np.concatenate([buf, filtered])
+                buf_end = buf_start + len(buf)
+                # Output k sits at input time k/ratio, i.e. filtered index k/ratio + delay.
+                last = total_out if final else min(total_out, int(np.floor((buf_end - 2 - delay) * ratio)) + 1)
+                if last > next_out:
+                    pos = np.arange(next_out, last, dtype=np.float64) * step + delay - buf_start
+                    idx = np.clip(np.floor(pos).astype(np.int64), 0, max(0, len(buf) - 1))
+                    nxt = np.minimum(idx + 1, len(buf) - 1)
+                    frac = (pos - idx).astype(np.float32)[:, None]
+                    out = buf[idx] * (1.0 - frac) + buf[nxt] * frac
+                    pcm = np.clip(np.round(out * 32767.0), -32768, 32767).astype("<i2")
+                    dst.writeframes(pcm.tobytes())
+                    next_out = last
+                keep_from = max(0, int(next_out * step + delay) - buf_start - 1)
+                buf = buf[keep_from:]
+                buf_start += keep_from
+
+            while True:
+                raw = src.readframes(CHUNK_FRAMES)
+                if not raw:
+                    break
+                frames = read_pcm_chunk(raw, sampwidth, in_channels)
+                if channels == 1 and in_channels > 1:
+                    frames = frames.mean(axis=1, keepdims=True)
+                elif channels > 1 and in_channels == 1:
+                    frames = np.repeat(frames, channels, axis=1)
+                feed(frames, final=False)
+            feed(np.zeros((delay + 2, channels), dtype=np.float32), final=True)
+
+    print(f"OK (native): {input_path} -> {output_path}")
+    return 0
 
 
 def convert(input_path: Path, output_path: Path, sample_rate: int, channels: int) -> int:
+    if not input_path.exists():
+        print(f"ERROR: input file does not exist: {input_path}")
+        return 2
+
+    if input_path.suffix.lower() == ".wav":
+        native = convert_wav_native(input_path, output_path, sample_rate, channels)
+        if native is not None:
+            return native
+
     ffmpeg = shutil.which("ffmpeg")
     if not ffmpeg:
         print("ERROR: ffmpeg is not found on PATH.")
         return 2
 
-    if not input_path.exists():
-        print(f"ERROR: input file does not exist: {input_path}")
-        return 2
-
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     cmd = [
@@ -43,14 +169,150 @@ def convert(input_path: Path, output_path: Path, sample_rate: int, channels: int
     return 0
 
 
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(path: Path) -> List[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def cache_params(sample_rate: int, channels: int) -> str:
+    return f"v{CACHE_VERSION}|{sample_rate}|{channels}|pcm_s16le"
+
+
+def convert_cached(job: Dict[str, object]) -> Dict[str, object]:
+    """Convert one manifest entry unless its existing output already matches input and params.
+
+    The index record for an output keeps the input's size/mtime and hash and the output's
+    size/mtime and hash. Files whose size and mtime are unchanged are not read again; a
+    changed stamp is settled by the hash, so a touched but identical file is still skipped.
+    """
+    input_path = Path(str(job["input"]))
+    output_path = Path(str(job["output"]))
+    sample_rate = int(job["sample_rate"])  # type: ignore[arg-type]
+    channels = int(job["channels"])  # type: ignore[arg-type]
+    previous: Dict[str, object] = job.get("previous") or {}  # type: ignore[assignment]
+    result: Dict[str, object] = {"id": job["id"], "output": str(output_path), "record": None, "status": "error", "code": 2}
+    if not input_path.exists():
+        print(f"ERROR: input file does not exist: {input_path}")
+        return result
+
+    params = cache_params(sample_rate, channels)
+    input_stamp = file_stamp(input_path)
+    if previous.get("input_stamp") == input_stamp and previous.get("input_sha256"):
+        input_sha = str(previous["input_sha256"])
+    else:
+        input_sha = file_sha256(input_path)
+    record: Dict[str, object] = {"params": params, "input_stamp": input_stamp, "input_sha256": input_sha}
+
+    if previous.get("params") == params and previous.get("input_sha256") == input_sha and output_path.exists():
+        output_stamp = file_stamp(output_path)
+        if previous.get("output_stamp") == output_stamp or previous.get("output_sha256") == file_sha256(output_path):
+            record.update(output_stamp=output_stamp, output_sha256=previous.get("output_sha256"))
+            result.update(record=record, status="skip", code=0)
+            return result
+
+    code = convert(input_path, output_path, sample_rate, channels)
+    if code == 0:
+        record.update(output_stamp=file_stamp(output_path), output_sha256=file_sha256(output_path))
+        result.update(record=record, status="converted", code=0)
+    else:
+        result["code"] = code
+    return result
+
+
+def convert_manifest(manifest_path: Path, jobs: int, cache_dir: Optional[Path] = None) -> int:
+    if not manifest_path.exists():
+        print(f"ERROR: manifest does not exist: {manifest_path}")
+        return 2
+    if not shutil.which("ffmpeg"):
+        print("WARN: ffmpeg is not found on PATH; only unchanged outputs and PCM WAV inputs can be handled.")
+
+    base_dir = manifest_path.parent
+    cache_dir = cache_dir or base_dir / "tmp" / "convert-cache"
+    index_path = cache_dir / "index.json"
+    try:
+        loaded = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        loaded = {}
+    # Older indexes mapped outputs to a key string and kept a copy of every WAV next to it.
+    index: Dict[str, Dict[str, object]] = {k: v for k, v in loaded.items() if isinstance(v, dict)}
+    for blob in cache_dir.glob("*.wav"):
+        if len(blob.stem) == 64 and all(ch in "0123456789abcdef" for ch in blob.stem):
+            blob.unlink()
+
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    work: List[Dict[str, object]] = []
+    for fixture in manifest.get("fixtures", []):
+        paths = fixture.get("paths", {})
+        audio = fixture.get("audio", {})
+        if not paths.get("mp3") or not paths.get("wav"):
+            print(f"WARN: {fixture.get('id')}: paths.mp3/paths.wav missing, skipped")
+            continue
+        output = base_dir / paths["wav"]
+        work.append(
+            {
+                "id": fixture.get("id", ""),
+                "input": str(base_dir / paths["mp3"]),
+                "output": str(output),
+                "sample_rate": int(audio.get("sampleRateHz", 16000)),
+                "channels": int(audio.get("channels", 1)),
+                "previous": index.get(str(output), {}),
+            }
+        )
+
+    if jobs <= 1 or len(work) <= 1:
+        results = [convert_cached(job) for job in work]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(convert_cached, work))
+
+    for item in results:
+        if item["code"] == 0:
+            index[str(item["output"])] = item["record"]  # type: ignore[assignment]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(json.dumps(index, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    counts = {status: sum(1 for item in results if item["status"] == status) for status in ("converted", "skip", "error")}
+    print(f"Batch: {len(results)} fixtures, converted={counts['converted']} skip={counts['skip']} error={counts['error']}")
+    failed = [item for item in results if item["code"] != 0]
+    for item in failed:
+        print(f"ERROR: {item['id']}: conversion failed")
+    return 1 if failed else 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Convert MP3 audio fixture to WAV for local tests")
-    parser.add_argument("--input", required=True, help="Input mp3 path")
-    parser.add_argument("--output", required=True, help="Output wav path")
+    parser.add_argument("--input", help="Input mp3 path (PCM WAV inputs are converted in-process when NumPy is available)")
+    parser.add_argument("--output", help="Output wav path")
     parser.add_argument("--sample-rate", type=int, default=16000, help="Output sample rate (default: 16000)")
     parser.add_argument("--channels", type=int, default=1, help="Output channels (default: 1)")
+    parser.add_argument(
+        "--manifest",
+        help="Batch mode: convert every fixture in fixtures.meta.json (paths.mp3 -> paths.wav)",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Batch mode worker processes")
+    parser.add_argument(
+        "--cache-dir",
+        help="Batch mode index directory (default: <manifest dir>/tmp/convert-cache)",
+    )
     args = parser.parse_args()
 
+    if args.manifest:
+        return convert_manifest(
+            manifest_path=Path(args.manifest),
+            jobs=max(1, args.jobs),
+            cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        )
+    if not args.input or not args.output:
+        parser.error("--input and --output are required unless --manifest is given")
+
     return convert(
         input_path=Path(args.input),
         output_path=Path(args.output),
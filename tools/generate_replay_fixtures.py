@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # required for this tool; reported in main()
+    np = None
+
+from convert_mp3_to_wav import CHUNK_FRAMES, read_pcm_chunk
+
+Segment = Tuple[int, int]
+
+
+def frame_energy_db(wav_path: Path, frame_ms: int) -> Tuple["np.ndarray", int]:
+    """Per-frame energy in dB (non-overlapping frames), read in chunks; returns (db, sample_rate)."""
+    with wave.open(str(wav_path), "rb") as src:
+        rate = src.getframerate()
+        channels = src.getnchannels()
+        sampwidth = src.getsampwidth()
+        frame_len = max(1, rate * frame_ms // 1000)
+        read_frames = max(frame_len, CHUNK_FRAMES // frame_len * frame_len)
+        energies: List["np.ndarray"] = []
+        carry = np.zeros(0, dtype=np.float32)
+        while True:
+            raw = src.readframes(read_frames)
+            if not raw:
+                break
+            mono = read_pcm_chunk(raw, sampwidth, channels).mean(axis=1)
+            data = np.concatenate([carry, mono])
+            usable = len(data) // frame_len * frame_len
+            if usable:
+                frames = data[:usable].reshape(-1, frame_len)
+                energies.append(np.mean(frames * frames, axis=1))
+            carry = data[usable:]
+        if len(carry):
+            energies.append(np.array([np.mean(carry * carry)], dtype=np.float32))
+    energy = np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+    return 10.0 * np.log10(energy + 1e-10), rate
+
+
+def detect_segments(
+    db: "np.ndarray",
+    frame_ms: int,
+    threshold_db: float,
+    min_speech_ms: int,
+    min_silence_ms: int,
+) -> List[Segment]:
+    """Speech segments in ms: frames above noise floor + threshold, short gaps merged, short blips dropped."""
+    if not len(db):
+        return []
+    floor = float(np.percentile(db, 10))
+    active = (db > max(floor + threshold_db, -60.0)).astype(np.int8)
+    edges = np.diff(np.concatenate([[0], active, [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    segments: List[Segment] = []
+    for s, e in zip(starts * frame_ms, ends * frame_ms):
+        if segments and s - segments[-1][1] < min_silence_ms:
+            segments[-1] = (segments[-1][0], int(e))
+        else:
+            segments.append((int(s), int(e)))
+    return [(s, e) for s, e in segments if e - s >= min_speech_ms]
+
+
+def split_text(text: str, segments: List[Segment]) -> List[str]:
+    """Distribute characters over segments proportionally to segment duration."""
+    chars = list(text)
+    if not segments:
+        return []
+    total = sum(e - s for s, e in segments) or 1
+    parts: List[str] = []
+    taken = 0
+    spent = 0
+    for i, (s, e) in enumerate(segments):
+        spent += e - s
+        upto = len(chars) if i == len(segments) - 1 else int(round(len(chars) * spent / total))
+        upto = max(upto, min(len(chars), taken + 1))
+        parts.append("".join(chars[taken:upto]))
+        taken = upto
+    return [p for p in parts if p]
+
+
+def result_event(at_ms: int, transcript: str, is_final: bool, confidence: float) -> Dict[str, object]:
+    return {
+        "type": "result",
+        "atMs": at_ms,
+        "results": [
+            {
+                "isFinal": is_final,
+                "alternatives": [{"transcript": transcript, "confidence": confidence}],
+            }
+        ],
+    }
+
+
+def build_events(
+    segments: List[Segment],
+    texts: List[str],
+    interim_ms: int,
+    final_latency_ms: int,
+    duration_ms: int,
+) -> List[Dict[str, object]]:
+    """start -> per segment growing interim prefixes while speech lasts, final after the segment -> end."""
+    events: List[Dict[str, object]] = [{"type": "start", "atMs": 0}]
+    last_at = 0
+    for (seg_start, seg_end), text in zip(segments, texts):
+        chars = list(text)
+        ticks = list(range(seg_start + interim_ms, seg_end, interim_ms))
+        for n, at in enumerate(ticks, start=1):
+            prefix = "".join(chars[: max(1, len(chars) * n // (len(ticks) + 1))])
+            events.append(result_event(at, prefix, False, 0.8))
+        last_at = max(last_at, seg_end + final_latency_ms)
+        events.append(result_event(last_at, text, True, 0.9))
+    events.append({"type": "end", "atMs": max(last_at + 200, min(duration_ms, last_at + 1000))})
+    return events
+
+
+def generate_one(job: Dict[str, object]) -> Dict[str, object]:
+    wav_path = Path(str(job["wav"]))
+    out_path = Path(str(job["output"]))
+    opts: Dict[str, int] = job["options"]  # type: ignore[assignment]
+    if out_path.exists() and not job.get("force"):
+        return {"id": job["id"], "ok": False, "message": f"{out_path} exists (use --force to overwrite)"}
+    try:
+        db, rate = frame_energy_db(wav_path, opts["frame_ms"])
+    except (OSError, wave.Error, EOFError) as exc:
+        return {"id": job["id"], "ok": False, "message": f"cannot read {wav_path}: {exc}"}
+    segments = detect_segments(
+        db, opts["frame_ms"], float(opts["threshold_db"]), opts["min_speech_ms"], opts["min_silence_ms"]
+    )
+    texts = split_text(str(job["text"]), segments)
+    segments = segments[: len(texts)]
+    if not segments:
+        return {"id": job["id"], "ok": False, "message": f"no speech detected in {wav_path}"}
+    duration_ms = int(len(db) * opts["frame_ms"])
+    fixture = {
+        "id": job["id"],
+        "description": f"Generated from {wav_path.name} by frame-energy VAD.",
+        "expectedText": job["text"],
+        "tags": job.get("tags", []),
+        "source": {
+            "wav": wav_path.name,
+            "sampleRateHz": rate,
+            "durationMs": duration_ms,
+            "segmentsMs": [list(seg) for seg in segments],
+        },
+        "events": build_events(segments, texts, opts["interim_ms"], opts["final_latency_ms"], duration_ms),
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(fixture, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return {"id": job["id"], "ok": True, "message": f"{wav_path} -> {out_path} ({len(segments)} segments)"}
+
+
+def collect_jobs(
+    manifest_path: Path, audio_dir: Optional[Path], output_dir: Path, options: Dict[str, int], force: bool = False
+) -> List[Dict[str, object]]:
+    base_dir = manifest_path.parent
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    by_id: Dict[str, Dict[str, object]] = {}
+    for fixture in manifest.get("fixtures", []):
+        by_id[str(fixture.get("id", ""))] = fixture
+        wav_rel = (fixture.get("paths") or {}).get("wav")
+        if wav_rel:
+            by_id[Path(wav_rel).stem] = fixture
+
+    if audio_dir is not None:
+        wavs = sorted(audio_dir.glob("*.wav"))
+    else:
+        wavs = [base_dir / f["paths"]["wav"] for f in manifest.get("fixtures", []) if (f.get("paths") or {}).get("wav")]
+
+    jobs: List[Dict[str, object]] = []
+    for wav_path in wavs:
+        fixture = by_id.get(wav_path.stem)
+        if not fixture or not fixture.get("expectedText"):
+            print(f"WARN: {wav_path}: no manifest entry with expectedText, skipped")
+            continue
+        if not wav_path.exists():
+            print(f"WARN: {wav_path}: file does not exist (run convert_mp3_to_wav.py --manifest first), skipped")
+            continue
+        fixture_id = str(fixture["id"])
+        jobs.append(
+            {
+                "id": fixture_id,
+                "wav": str(wav_path),
+                "text": fixture["expectedText"],
+                "tags": fixture.get("tags", []),
+                "output": str(output_dir / f"{fixture_id}.events.json"),
+                "options": options,
+                "force": force,
+            }
+        )
+    return jobs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate replay fixtures from WAV recordings with frame-energy VAD")
+    parser.add_argument(
+        "--manifest",
+        default="test/fixtures/audio/fixtures.meta.json",
+        help="Audio fixture manifest providing id/expectedText/tags",
+    )
+    parser.add_argument("--audio-dir", help="Process every *.wav here instead of the manifest's paths.wav")
+    parser.add_argument(
+        "--output-dir",
+        default="tests/fixtures/generated",
+        help="Where <id>.events.json files are written (default keeps them apart from the hand-written fixtures)",
+    )
+    parser.add_argument("--force", action="store_true", help="Overwrite existing <id>.events.json files")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--frame-ms", type=int, default=20, help="VAD frame length (default: 20)")
+    parser.add_argument("--threshold-db", type=int, default=12, help="Speech threshold above noise floor (default: 12)")
+    parser.add_argument("--min-speech-ms", type=int, default=120, help="Drop segments shorter than this")
+    parser.add_argument("--min-silence-ms", type=int, default=250, help="Merge segments separated by less than this")
+    parser.add_argument("--interim-ms", type=int, default=150, help="Interim result spacing during speech")
+    parser.add_argument("--final-latency-ms", type=int, default=120, help="Delay of final result after segment end")
+    args = parser.parse_args()
+
+    if np is None:
+        print("ERROR: NumPy is required for generate_replay_fixtures.py.")
+        return 2
+    manifest_path = Path(args.manifest)
+    if not manifest_path.exists():
+        print(f"ERROR: manifest does not exist: {manifest_path}")
+        return 2
+
+    options = {
+        "frame_ms": max(5, args.frame_ms),
+        "threshold_db": args.threshold_db,
+        "min_speech_ms": args.min_speech_ms,
+        "min_silence_ms": args.min_silence_ms,
+        "interim_ms": max(20, args.interim_ms),
+        "final_latency_ms": max(0, args.final_latency_ms),
+    }
+    jobs = collect_jobs(
+        manifest_path, Path(args.audio_dir) if args.audio_dir else None, Path(args.output_dir), options, args.force
+    )
+    if not jobs:
+        print("ERROR: no recordings to process.")
+        return 2
+
+    if args.jobs <= 1 or len(jobs) == 1:
+        results = [generate_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(generate_one, jobs))
+
+    failed = 0
+    for item in results:
+        print(f"{'OK' if item['ok'] else 'ERROR'}: {item['id']}: {item['message']}")
+        failed += 0 if item["ok"] else 1
+    print(f"Generated: {len(results) - failed} / {len(results)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
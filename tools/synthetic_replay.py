@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Python port of the synthetic replay generator in app/app.js
+# (hashSeed / createSeededRandom / splitTextForSynthetic / applyTailDrop /
+# injectTypo / generateSyntheticReplayEvents). Output must stay identical to the
+# browser for the same seed and text, so string handling follows JS semantics:
+# lengths, indices and slices are in UTF-16 code units.
+
+DEFAULT_SEED = "koedeam-seed"
+DEFAULT_TEXT = "これは合成音声イベントの再生テストです。"
+
+# String.prototype.trim: WhiteSpace (incl. Zs and BOM) + LineTerminator.
+JS_TRIM_CHARS = "\t\n\v\f\r \u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+
+TYPO_MAP = {
+    "は": "わ",
+    "を": "お",
+    "じ": "ぢ",
+    "ず": "づ",
+    "ゃ": "や",
+    "ゅ": "ゆ",
+    "ょ": "よ",
+    "。": "、",
+    "、": "。",
+}
+TYPO_FALLBACK = ["あ", "い", "う", "え", "お", "ん"]
+
+
+def to_uint32(v: float) -> int:
+    return int(v) & 0xFFFFFFFF
+
+
+def to_int32(v: float) -> int:
+    u = int(v) & 0xFFFFFFFF
+    return u - 0x100000000 if u >= 0x80000000 else u
+
+
+def imul(a: int, b: int) -> int:
+    return to_int32(to_uint32(a) * to_uint32(b))
+
+
+def to_units(text: str) -> str:
+    """Re-express ``text`` as one Python character per UTF-16 code unit."""
+    data = text.encode("utf-16-le", "surrogatepass")
+    return "".join(chr(data[i] | (data[i + 1] << 8)) for i in range(0, len(data), 2))
+
+
+def from_units(units: str) -> str:
+    """Inverse of to_units; surrogate pairs are joined, lone surrogates are kept as in JS."""
+    return units.encode("utf-16-le", "surrogatepass").decode("utf-16-le", "surrogatepass")
+
+
+def hash_seed(seed_text: str) -> int:
+    h = 2166136261
+    for ch in seed_text or "":
+        h ^= ord(ch)
+        h = imul(h, 16777619) & 0xFFFFFFFF
+    return h
+
+
+def create_seeded_random(seed_text: str) -> Callable[[], float]:
+    # JS keeps ``t`` as a double that is never wrapped; mirror that with a float.
+    state = [float(hash_seed(seed_text))]
+
+    def rand() -> float:
+        state[0] += 0x6D2B79F5
+        t = state[0]
+        x = imul(to_int32(t) ^ (to_uint32(t) >> 15), 1 | to_int32(t))
+        x = x ^ to_int32(x + imul(x ^ (to_uint32(x) >> 7), 61 | x))
+        return to_uint32(x ^ (to_uint32(x) >> 14)) / 4294967296
+
+    return rand
+
+
+def split_text_for_synthetic(units: str, rand: Callable[[], float]) -> List[str]:
+    out: List[str] = []
+    i = 0
+    while i < len(units):
+        span = 3 + math.floor(rand() * 5)
+        out.append(units[i : i + span])
+        i += span
+    return [s for s in out if s]
+
+
+def apply_tail_drop(chunks: List[str], rand: Callable[[], float]) -> List[str]:
+    if not chunks:
+        return chunks
+    out = list(chunks)
+    last = out[-1]
+    if len(last) < 2:
+        return out
+    if rand() < 0.35:
+        drop_count = 1 + math.floor(rand() * min(2, len(last) - 1))
+        out[-1] = last[: max(1, len(last) - drop_count)]
+    return out
+
+
+def inject_typo(units: str, rand: Callable[[], float]) -> str:
+    if len(units) < 2:
+        return units
+    if rand() >= 0.4:
+        return units
+    pos = math.floor(rand() * len(units))
+    curr = units[pos]
+    rep = TYPO_MAP.get(curr)
+    if not rep:
+        rep = TYPO_FALLBACK[math.floor(rand() * len(TYPO_FALLBACK))]
+    if rep == curr:
+        rep = TYPO_FALLBACK[(math.floor(rand() * len(TYPO_FALLBACK)) + 1) % len(TYPO_FALLBACK)]
+    return units[:pos] + rep + units[pos + 1 :]
+
+
+def generate_synthetic_replay_events(seed: str = "", text: str = "") -> List[Dict[str, object]]:
+    seed = seed or DEFAULT_SEED
+    units = to_units(text or DEFAULT_TEXT).strip(JS_TRIM_CHARS)
+    rand = create_seeded_random(seed)
+    final_chunks = apply_tail_drop(split_text_for_synthetic(units, rand), rand)
+    events: List[Dict[str, object]] = [{"type": "start", "atMs": 0, "source": "synthetic", "seed": seed}]
+    at = 140
+    for i, chunk in enumerate(final_chunks):
+        interim = chunk[: max(1, math.floor(len(chunk) * 0.6))] if len(chunk) > 1 else chunk
+        events.append(
+            {"type": "result", "atMs": at, "isFinal": False, "text": from_units(interim), "source": "synthetic", "chunkIndex": i}
+        )
+        at += 90 + math.floor(rand() * 120)
+        final_text = inject_typo(chunk, rand)
+        events.append(
+            {"type": "result", "atMs": at, "isFinal": True, "text": from_units(final_text), "source": "synthetic", "chunkIndex": i}
+        )
+        at += 140 + math.floor(rand() * 160)
+    events.append({"type": "end", "atMs": at + 120, "source": "synthetic", "seed": seed})
+    return events
+
+
+def build_fixture(seed: str, text: str) -> Dict[str, object]:
+    events = generate_synthetic_replay_events(seed, text)
+    finals = "".join(str(e["text"]) for e in events if e.get("isFinal") is True)
+    return {
+        "id": f"synthetic_{seed}",
+        "description": "Synthetic replay fixture (seeded, generated offline).",
+        "expectedText": finals,
+        "tags": ["synthetic"],
+        "seed": seed,
+        "events": events,
+    }
+
+
+def generate_batch(args: Tuple[str, int, int, str]) -> List[str]:
+    prefix, start, stop, text = args
+    return [json.dumps(build_fixture(f"{prefix}{i}", text), ensure_ascii=False) for i in range(start, stop)]
+
+
+def write_corpus(output: Path, prefix: str, count: int, text: str, jobs: int) -> int:
+    batch = 2000
+    work = [(prefix, i, min(count, i + batch), text) for i in range(0, count, batch)]
+    if output.suffix != ".ndjson":
+        output.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        sink = output.open("w", encoding="utf-8") if output.suffix == ".ndjson" else None
+        try:
+            for lines in pool.map(generate_batch, work):
+                for line in lines:
+                    if sink is not None:
+                        sink.write(line + "\n")
+                    else:
+                        fixture = json.loads(line)
+                        path = output / f"{fixture['id']}.events.json"
+                        path.write_text(json.dumps(fixture, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+                    written += 1
+        finally:
+            if sink is not None:
+                sink.close()
+    return written
+
+
+def crosscheck(base_url: str, prefix: str, sample: int, text: str) -> List[str]:
+    """Compare Python output with __KOEDEAM_TEST__.syntheticEvents from the app for ``sample`` seeds."""
+    from urllib.parse import urlencode
+
+    from playwright.sync_api import sync_playwright
+
+    mismatches: List[str] = []
+    sep = "&" if "?" in base_url else "?"
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        try:
+            for i in range(sample):
+                seed = f"{prefix}{i}"
+                query = {"testMode": "1", "voiceEngine": "replay", "replayMode": "fast", "synthetic": "1", "seed": seed}
+                if text:
+                    query["syntheticText"] = text
+                page = context.new_page()
+                page.goto(f"{base_url}{sep}{urlencode(query)}", wait_until="networkidle")
+                page.click("#btnMic")
+                page.wait_for_function("() => Array.isArray(window.__KOEDEAM_TEST__?.syntheticEvents)")
+                browser_events = page.evaluate("() => window.__KOEDEAM_TEST__.syntheticEvents")
+                page.close()
+                expected = generate_synthetic_replay_events(seed, text)
+                if browser_events != expected:
+                    mismatches.append(f"{seed}: browser={json.dumps(browser_events, ensure_ascii=False)}")
+        finally:
+            browser.close()
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic replay fixtures offline (bit-exact with app.js)")
+    parser.add_argument("--count", type=int, default=1000, help="Number of seeds to generate")
+    parser.add_argument("--seed-prefix", default="fuzz-", help="Seeds are <prefix><index>")
+    parser.add_argument("--text", default="", help=f"Source text (default: {DEFAULT_TEXT})")
+    parser.add_argument(
+        "--output",
+        default="artifacts/synthetic/corpus.ndjson",
+        help="*.ndjson file (one fixture per line) or a directory for <id>.events.json files",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument(
+        "--crosscheck",
+        metavar="URL",
+        help="Instead of generating, compare a sample of seeds with the app's syntheticEvents at URL",
+    )
+    parser.add_argument("--sample", type=int, default=20, help="Seeds to compare in --crosscheck mode")
+    args = parser.parse_args()
+
+    if args.crosscheck:
+        mismatches = crosscheck(args.crosscheck, args.seed_prefix, args.sample, args.text)
+        if mismatches:
+            print("Failures:")
+            for item in mismatches:
+                print(f"- {item}")
+            return 1
+        print(f"PASS: {args.sample} seeds match the browser generator")
+        return 0
+
+    output = Path(args.output)
+    if output.suffix == ".ndjson":
+        output.parent.mkdir(parents=True, exist_ok=True)
+    written = write_corpus(output, args.seed_prefix, max(0, args.count), args.text, args.jobs)
+    print(f"OK: {written} fixtures -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import zipfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # required for this tool; reported in main()
+    np = None
+
+from aggregate_field_tests import JsonStream, open_session_json
+
+# Columnar store for telemetry events exported by buildTelemetryPayload() (telemetry JSON)
+# and buildSessionJsonV11() (session.json, plain or inside a field-test ZIP).
+#
+# Layout of the .npz (no pickled objects):
+#   ts_ms                 int64 epoch milliseconds (INT64_MIN when missing)
+#   <name>                float64 for numeric fields (NaN when missing)
+#   <name>, <name>__vocab int32 codes (-1 when missing) + unicode vocabulary for text fields
+# "event", "sessionId" and "source" (input file) are always dictionary-encoded.
+
+MISSING_TS = -(1 << 63)
+ALWAYS_TEXT = ("event", "sessionId", "source")
+
+Mask = "np.ndarray"
+TimeBound = Union[None, int, float, str]
+
+
+class ColumnBuilder:
+    """Accumulates events row by row into typed arrays, inferring numeric vs text per field."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.ts: List[str] = []
+        self.numeric: Dict[str, array] = {}
+        self.codes: Dict[str, array] = {}
+        self.vocab: Dict[str, Dict[str, int]] = {}
+
+    def _text_column(self, name: str) -> array:
+        if name not in self.codes:
+            self.codes[name] = array("i", [-1] * self.rows)
+            self.vocab[name] = {}
+            if name in self.numeric:
+                # Field turned out to be mixed; re-encode the numbers seen so far as text.
+                for i, value in enumerate(self.numeric.pop(name)):
+                    if value == value:
+                        self.codes[name][i] = self._code(name, json.dumps(value))
+        return self.codes[name]
+
+    def _code(self, name: str, text: str) -> int:
+        vocab = self.vocab[name]
+        code = vocab.get(text)
+        if code is None:
+            code = vocab[text] = len(vocab)
+        return code
+
+    def add(self, event: Dict[str, object], source: str) -> None:
+        row = self.rows
+        self.ts.append(str(event.get("ts") or "NaT").rstrip("Z"))
+        fields = {k: v for k, v in event.items() if k != "ts" and v is not None}
+        fields["source"] = source
+        for name, value in fields.items():
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and name not in self.codes and name not in ALWAYS_TEXT:
+                if name not in self.numeric:
+                    self.numeric[name] = array("d", [float("nan")] * row)
+                column = self.numeric[name]
+                column.append(float(value))  # type: ignore[arg-type]
+                continue
+            text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, sort_keys=True)
+            column = self._text_column(name)
+            column.append(self._code(name, text))
+        self.rows += 1
+        for name, column in self.numeric.items():
+            if len(column) < self.rows:
+                column.append(float("nan"))
+        for name, column in self.codes.items():
+            if len(column) < self.rows:
+                column.append(-1)
+
+    def arrays(self) -> Dict[str, "np.ndarray"]:
+        out: Dict[str, "np.ndarray"] = {
+            "ts_ms": np.array(self.ts, dtype="datetime64[ms]").astype(np.int64) if self.ts else np.zeros(0, np.int64)
+        }
+        for name, column in self.numeric.items():
+            out[name] = np.frombuffer(column, dtype=np.float64).copy()
+        for name, column in self.codes.items():
+            out[name] = np.frombuffer(column, dtype=np.int32).copy()
+            ordered = sorted(self.vocab[name], key=self.vocab[name].get)  # type: ignore[arg-type]
+            out[f"{name}__vocab"] = np.array(ordered, dtype=str)
+        return out
+
+
+def iter_events(path: Path) -> Iterator[Dict[str, object]]:
+    """Events of a telemetry JSON / session.json file or a field-test ZIP, streamed."""
+    if path.suffix == ".zip":
+        archive, stream = open_session_json(path)
+        with archive, stream:
+            yield from events_from(stream)
+        return
+    with path.open("r", encoding="utf-8") as stream:
+        yield from events_from(stream)
+
+
+def events_from(stream: io.TextIOBase) -> Iterator[Dict[str, object]]:
+    for kind, key, value in JsonStream(stream).members():  # type: ignore[arg-type]
+        if kind == "item" and key == "events" and isinstance(value, dict):
+            yield value
+
+
+def collect_inputs(items: Iterable[str]) -> List[Path]:
+    paths: List[Path] = []
+    for item in items:
+        path = Path(item)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.rglob("*") if p.suffix in (".json", ".zip")))
+        elif path.exists():
+            paths.append(path)
+    return paths
+
+
+def build(inputs: List[Path], output: Path) -> Tuple[int, List[str]]:
+    builder = ColumnBuilder()
+    failures: List[str] = []
+    for path in inputs:
+        try:
+            for event in iter_events(path):
+                builder.add(event, str(path))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+            failures.append(f"{path}: {type(exc).__name__}: {exc}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(output, **builder.arrays())
+    return builder.rows, failures
+
+
+def to_epoch_ms(value: TimeBound) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(np.datetime64(str(value).rstrip("Z"), "ms").astype(np.int64))
+
+
+class TelemetryStore:
+    """Vectorised filters and group-bys over a store written by build()."""
+
+    def __init__(self, path: Path) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            self.columns: Dict[str, "np.ndarray"] = {name: data[name] for name in data.files}
+        self.ts_ms = self.columns["ts_ms"]
+
+    def __len__(self) -> int:
+        return int(self.ts_ms.shape[0])
+
+    def is_text(self, name: str) -> bool:
+        return f"{name}__vocab" in self.columns
+
+    def vocab(self, name: str) -> "np.ndarray":
+        return self.columns[f"{name}__vocab"]
+
+    def values(self, name: str) -> "np.ndarray":
+        """Numeric column as float64, or text column decoded (missing -> '')."""
+        if not self.is_text(name):
+            return self.columns[name]
+        codes = self.columns[name]
+        lookup = np.append(self.vocab(name), "")
+        return lookup[codes]
+
+    def match(self, name: str, wanted: Iterable[str]) -> Mask:
+        """Rows whose text column equals any of ``wanted`` (compared on codes, not strings)."""
+        vocab = self.vocab(name)
+        codes = np.flatnonzero(np.isin(vocab, list(wanted)))
+        return np.isin(self.columns[name], codes)
+
+    def where(
+        self,
+        event: Optional[Iterable[str]] = None,
+        session: Optional[Iterable[str]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        **equals: Iterable[str],
+    ) -> Mask:
+        mask = np.ones(len(self), dtype=bool)
+        if event:
+            mask &= self.match("event", event)
+        if session:
+            mask &= self.match("sessionId", session)
+        for name, wanted in equals.items():
+            mask &= self.match(name, wanted)
+        lower, upper = to_epoch_ms(since), to_epoch_ms(until)
+        if lower is not None:
+            mask &= self.ts_ms >= lower
+        if upper is not None:
+            mask &= (self.ts_ms < upper) & (self.ts_ms != MISSING_TS)
+        return mask
+
+    def count_by(self, name: str, mask: Optional[Mask] = None) -> Dict[str, int]:
+        codes = self.columns[name] if mask is None else self.columns[name][mask]
+        vocab = self.vocab(name)
+        counts = np.bincount(codes[codes >= 0], minlength=len(vocab))
+        order = np.argsort(-counts, kind="stable")
+        return {str(vocab[i]): int(counts[i]) for i in order if counts[i]}
+
+    def stats_by(self, name: str, value: str, mask: Optional[Mask] = None) -> Dict[str, Dict[str, float]]:
+        """count/mean/p50/p95/max of a numeric column per group of a text column."""
+        keep = self.columns[name] >= 0
+        if mask is not None:
+            keep &= mask
+        codes = self.columns[name][keep]
+        values = self.columns[value][keep]
+        valid = ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(codes)]
+        vocab = self.vocab(name)
+        out: Dict[str, Dict[str, float]] = {}
+        for start, end in zip(starts, ends):
+            chunk = values[start:end]
+            out[str(vocab[codes[start]])] = {
+                "count": int(end - start),
+                "mean": round(float(chunk.mean()), 3),
+                "p50": round(float(np.percentile(chunk, 50)), 3),
+                "p95": round(float(np.percentile(chunk, 95)), 3),
+                "max": round(float(chunk[-1]), 3),
+            }
+        return out
+
+    def histogram(self, bucket_ms: int, mask: Optional[Mask] = None) -> Dict[str, int]:
+        """Event counts per time bucket (bucket start as ISO string)."""
+        ts = self.ts_ms[(self.ts_ms != MISSING_TS) if mask is None else mask & (self.ts_ms != MISSING_TS)]
+        if not len(ts):
+            return {}
+        buckets, counts = np.unique(ts // bucket_ms * bucket_ms, return_counts=True)
+        labels = buckets.astype("datetime64[ms]").astype(str)
+        return {f"{label}Z": int(count) for label, count in zip(labels, counts)}
+
+
+def split_arg(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Columnar NumPy store and queries for exported telemetry events")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Convert telemetry JSON / session.json / field-test ZIPs into an .npz store")
+    p_build.add_argument("inputs", nargs="+", help="Files or directories (searched for *.json and *.zip)")
+    p_build.add_argument("--output", default="artifacts/telemetry/events.npz", help="Store path")
+    p_query = sub.add_parser("query", help="Filter and group a store")
+    p_query.add_argument("store", help="Store path written by build")
+    p_query.add_argument("--event", default="", help="Comma-separated event names, e.g. voice.onresult.final")
+    p_query.add_argument("--session", default="", help="Comma-separated session ids")
+    p_query.add_argument("--since", default="", help="ISO time or epoch ms (inclusive)")
+    p_query.add_argument("--until", default="", help="ISO time or epoch ms (exclusive)")
+    p_query.add_argument("--group-by", default="event", help="Text column to group by (event, sessionId, source, ...)")
+    p_query.add_argument("--value", default="", help="Numeric column to summarise per group (e.g. charLen)")
+    p_query.add_argument("--bucket-ms", type=int, default=0, help="Also print counts per time bucket of this size")
+    args = parser.parse_args()
+
+    if np is None:
+        print("ERROR: NumPy is required for telemetry_store.py.")
+        return 2
+
+    if args.command == "build":
+        inputs = collect_inputs(args.inputs)
+        if not inputs:
+            print("ERROR: no telemetry inputs found.")
+            return 2
+        rows, failures = build(inputs, Path(args.output))
+        print(f"OK: {rows} events from {len(inputs) - len(failures)} / {len(inputs)} files -> {args.output}")
+        if failures:
+            print("")
+            print("Failures:")
+            for item in failures:
+                print(f"- {item}")
+            return 1
+        return 0
+
+    store = TelemetryStore(Path(args.store))
+    if not store.is_text(args.group_by):
+        print(f"ERROR: --group-by needs a text column: {args.group_by}")
+        return 2
+    if args.value and (args.value not in store.columns or store.is_text(args.value)):
+        print(f"ERROR: --value needs a numeric column: {args.value}")
+        return 2
+    mask = store.where(
+        event=split_arg(args.event),
+        session=split_arg(args.session),
+        since=args.since or None,
+        until=args.until or None,
+    )
+    print(f"== Telemetry Query == {int(mask.sum())} / {len(store)} events")
+    if args.value:
+        result: object = store.stats_by(args.group_by, args.value, mask)
+    else:
+        result = store.count_by(args.group_by, mask)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.bucket_ms > 0:
+        print(json.dumps(store.histogram(args.bucket_ms, mask), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())